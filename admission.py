@@ -0,0 +1,323 @@
+# admission.py
+import asyncio
+import concurrent.futures
+import contextvars
+import heapq
+import ipaddress
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+import metrics
+
+# === CONFIGURATION ===
+# Token bucket per UI session: sustained analyses per minute, and how many may arrive at once.
+# Only analyses that reach the model are charged (cache hits, joined in-flight calls and local
+# answers are refunded), and one takes 10-20s, so 10/min only stops scripted clicking
+RATE_PER_MINUTE = float(os.environ.get("CAREER_BUDDY_RATE_PER_MINUTE", "10"))  # 0 = no rate limit
+RATE_BURST = int(os.environ.get("CAREER_BUDDY_RATE_BURST", "5"))
+# Looser bucket per client address: a client can open any number of sessions, but one address is
+# often a whole office or campus behind NAT
+RATE_PER_IP_PER_MINUTE = float(os.environ.get("CAREER_BUDDY_RATE_PER_IP_PER_MINUTE", "40"))  # 0 = none
+RATE_PER_IP_BURST = int(os.environ.get("CAREER_BUDDY_RATE_PER_IP_BURST", "20"))
+RATE_MAX_CLIENTS = 10000  # buckets kept; the least recently seen are forgotten (i.e. refilled)
+# Reverse proxies (addresses or CIDR ranges, comma-separated) whose X-Forwarded-For is believed;
+# from anyone else the header is ignored, since a client could otherwise pick its own rate-limit key
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in os.environ.get("CAREER_BUDDY_TRUSTED_PROXIES", "").split(",")
+    if item.strip()
+]
+# Model calls allowed at once, and how many may wait for one before new requests are shed
+MODEL_CONCURRENCY = int(os.environ.get("CAREER_BUDDY_MODEL_CONCURRENCY", "8"))
+MODEL_QUEUE_SIZE = int(os.environ.get("CAREER_BUDDY_MODEL_QUEUE", "64"))
+MAX_WAIT_SECONDS = float(os.environ.get("CAREER_BUDDY_MAX_WAIT", "90"))  # shed when the estimate is longer
+SERVICE_TIME_PRIOR_SECONDS = 20.0  # estimate used until model calls have been measured
+SERVICE_TIME_ALPHA = 0.2  # EWMA weight of the newest measurement
+
+# Lower runs first. Cache hits and local-only analyses never take a model slot at all.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the estimated wait is too long. `retry_after` is in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+OVERLOADED_PREFIX = "⚠️ Career Buddy is busy right now"
+
+
+def _seconds(value):
+    return max(1, int(math.ceil(value)))
+
+
+def rate_limited_message(retry_after):
+    return f"⚠️ Too many requests. Please try again in {_seconds(retry_after)}s."
+
+
+def overloaded_message(retry_after):
+    return f"{OVERLOADED_PREFIX} (estimated wait about {_seconds(retry_after)}s). Please try again shortly."
+
+
+# === RATE LIMITING ===
+def _trusted_proxy(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_address(peer, forwarded=None):
+    """
+    The client's address for rate limiting. `forwarded` (X-Forwarded-For) only counts when `peer`
+    is a trusted proxy: its hops are read right to left, skipping trusted proxies, and the first
+    other hop is the client. Otherwise the peer address is the client.
+    """
+    if not peer or not forwarded or not _trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+class RateLimiter:
+    """Token bucket per client key (IP address, API key...), refilled continuously."""
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=RATE_BURST, max_clients=RATE_MAX_CLIENTS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, client):
+        """Takes a token for `client`. Returns 0.0 if allowed, else the seconds until one is available."""
+        if self.rate <= 0 or not client:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / self.rate
+
+    def refund(self, client):
+        """Gives back a token taken by `acquire`, for a request that turned out not to cost anything."""
+        if self.rate <= 0 or not client:
+            return
+        with self._lock:
+            if client in self._buckets:
+                tokens, updated_at = self._buckets[client]
+                self._buckets[client] = (min(self.burst, tokens + 1), updated_at)
+
+
+def charge(limits):
+    """
+    Takes a token for each (RateLimiter, client) pair in `limits`, all or none. Returns 0.0 if
+    allowed, else the seconds until the pair that refused has a token.
+    """
+    taken = []
+    for limiter, client in limits:
+        retry_after = limiter.acquire(client)
+        if retry_after:
+            refund(taken)
+            return retry_after
+        taken.append((limiter, client))
+    return 0.0
+
+
+def refund(limits):
+    for limiter, client in limits:
+        limiter.refund(client)
+
+
+# Set per request by whoever charged it; model slots taken in that context are appended to it
+_model_calls = contextvars.ContextVar("career_buddy_model_calls", default=None)
+
+
+def track_model_calls():
+    """
+    Starts counting the model slots taken by the current request (in its async context and the
+    tasks it starts). Returns a list with one entry per slot: empty means no model call was made.
+    """
+    calls = []
+    _model_calls.set(calls)
+    return calls
+
+
+# === MODEL SLOTS ===
+class ModelSlots:
+    """
+    Bounds concurrent model calls. Requests that find every slot busy wait in a priority queue
+    (FIFO within a priority); when the estimated wait (queue position x measured service time) is
+    over `max_wait`, or the queue is full, they are shed at once with that estimate instead.
+    Safe to use from several event loops (the sync API runs its own).
+    """
+
+    def __init__(self, slots=MODEL_CONCURRENCY, max_queued=MODEL_QUEUE_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self.slots = slots
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.service_time = SERVICE_TIME_PRIOR_SECONDS
+        self._busy = 0
+        self._waiting = []  # heap of (priority, seq, loop, future)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _queued_ahead(self, priority):
+        return sum(1 for p, _, _, future in self._waiting if p <= priority and not future.done())
+
+    def estimated_wait(self, priority=PRIORITY_INTERACTIVE):
+        """Seconds a request of `priority` arriving now would wait for a slot."""
+        with self._lock:
+            return self._estimate(priority)
+
+    def _estimate(self, priority):
+        if self._busy < self.slots:
+            return 0.0
+        # Every `slots` requests ahead cost one service time, plus the wait for a running call to end
+        return (self._queued_ahead(priority) // self.slots + 1) * self.service_time
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_INTERACTIVE):
+        """Holds a model slot for the duration of the block; raises Overloaded instead of queueing too long."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = None
+            if self._busy < self.slots and not self._queued_ahead(priority):
+                self._busy += 1
+            else:
+                wait = self._estimate(priority)
+                if len(self._waiting) >= self.max_queued or wait > self.max_wait:
+                    metrics.inc("admission_total", outcome="shed")
+                    raise Overloaded(overloaded_message(wait), wait)
+                future = loop.create_future()
+                heapq.heappush(self._waiting, (priority, next(self._seq), loop, future))
+
+        queued_at = time.perf_counter()
+        if future is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()  # the slot arrived just as we gave up: pass it on
+                raise
+        metrics.observe("admission_wait_seconds", time.perf_counter() - queued_at)
+        metrics.inc("admission_total", outcome="admitted" if future is None else "queued")
+        calls = _model_calls.get()
+        if calls is not None:
+            calls.append(priority)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.service_time += SERVICE_TIME_ALPHA * (elapsed - self.service_time)
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            while self._waiting:
+                _, _, loop, future = heapq.heappop(self._waiting)
+                if future.done():
+                    continue  # cancelled while waiting
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return  # the slot passes to the waiter; _busy is unchanged
+                except RuntimeError:
+                    continue  # its event loop is closed
+            self._busy -= 1
+
+    def _grant(self, future):
+        if future.done():
+            self._release()  # cancelled between hand-off and wake-up
+        else:
+            future.set_result(None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "busy": self._busy,
+                "queued": sum(1 for *_, future in self._waiting if not future.done()),
+                "service_time_seconds": self.service_time,
+            }
+
+
+# === IN-FLIGHT DEDUPLICATION ===
+class InFlight:
+    """
+    Identical submissions (same response cache key) share one model call: the first becomes the
+    leader, later ones wait for its (feedback, error) result. If the leader goes away without a
+    result, waiting requests get None and retry on their own.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> concurrent.futures.Future (thread-safe, awaitable from any loop)
+        self._lock = threading.Lock()
+
+    async def join(self, key):
+        """The (feedback, error) result of an identical request already running, or None if there is none."""
+        while True:
+            with self._lock:
+                pending = self._calls.get(key)
+            if pending is None:
+                return None
+            result = await asyncio.wrap_future(pending)
+            if result is not None:
+                metrics.inc("admission_total", outcome="deduped")
+                return result
+
+    @contextmanager
+    def lead(self, key):
+        """
+        Marks `key` in flight for the duration of the block. Call the yielded function with the
+        (feedback, error) result; leaving the block without a result releases waiters empty-handed.
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._calls.setdefault(key, future)
+        try:
+            yield lambda result: future.done() or future.set_result(result)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+            if not future.done():
+                future.set_result(None)
+
+    def __len__(self):
+        return len(self._calls)
+
+
+rate_limiter = RateLimiter()  # per UI session
+address_rate_limiter = RateLimiter(RATE_PER_IP_PER_MINUTE, RATE_PER_IP_BURST)
+model_slots = ModelSlots()
+in_flight = InFlight()
+
+
+def _collect():
+    stats = model_slots.stats()
+    yield "model_slots_busy", "gauge", stats["busy"], {}
+    yield "model_queue_length", "gauge", stats["queued"], {}
+    yield "model_service_time_seconds", "gauge", round(stats["service_time_seconds"], 4), {}
+    yield "in_flight_requests", "gauge", len(in_flight), {}
+
+
+metrics.registry.register_collector(_collect)
@@ -0,0 +1,297 @@
+# api.py
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import metrics
+import pipeline
+from admission import (
+    OVERLOADED_PREFIX, client_address, PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimiter, model_slots, rate_limited_message,
+    track_model_calls,
+)
+
+# === CONFIGURATION ===
+API_HOST = os.environ.get("CAREER_BUDDY_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("CAREER_BUDDY_API_PORT", "8000"))
+# Integrations send more than a person clicking, so the API has its own, looser bucket per client
+API_RATE_PER_MINUTE = float(os.environ.get("CAREER_BUDDY_API_RATE_PER_MINUTE", "60"))
+API_RATE_BURST = int(os.environ.get("CAREER_BUDDY_API_RATE_BURST", "10"))
+# Comma-separated keys that get a bucket of their own; an unlisted X-API-Key is ignored, since
+# a client could otherwise send a fresh key with every request
+API_KEYS = frozenset(key.strip() for key in os.environ.get("CAREER_BUDDY_API_KEYS", "").split(",") if key.strip())
+BATCH_MAX_ITEMS = int(os.environ.get("CAREER_BUDDY_API_BATCH_MAX_ITEMS", "200"))
+BATCH_CONCURRENCY = int(os.environ.get("CAREER_BUDDY_API_BATCH_CONCURRENCY", "8"))  # per batch request
+FILE_FIELDS = ("jd_file", "resume_file")
+
+rate_limiter = RateLimiter(API_RATE_PER_MINUTE, API_RATE_BURST)
+
+
+# === INPUTS ===
+def _client_key(request):
+    """Rate-limit key: a known X-API-Key (API_KEYS), else the client address (see admission.client_address)."""
+    api_key = request.headers.get("x-api-key")
+    if api_key in API_KEYS:
+        return "key:" + api_key
+    return client_address(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+
+
+def _temp_path(filename):
+    # Keep the extension: plain-text uploads are told apart by it (PDF / DOCX by magic bytes)
+    fd, path = tempfile.mkstemp(prefix="career_buddy_api_", suffix=os.path.splitext(filename or "")[1][:8])
+    os.close(fd)
+    return path
+
+
+async def _save_upload(upload):
+    path = _temp_path(upload.filename)
+    with open(path, "wb") as out:
+        await asyncio.to_thread(shutil.copyfileobj, upload.file, out)
+    return path
+
+
+async def _save_base64(name, value):
+    """Writes a batch item's {"filename", "content_base64"} file to a temp path, off the event loop."""
+    if not isinstance(value, dict) or not isinstance(value.get("content_base64"), str):
+        raise ValueError(f'"{name}" must be {{"filename": ..., "content_base64": ...}}')
+    content = value["content_base64"]
+    # 4 base64 characters per 3 bytes: an oversized file is turned away before it is decoded
+    if len(content) * 3 / 4 > pipeline.MAX_FILE_SIZE_MB * 1024 * 1024:
+        raise ValueError(f'"{name}" is over the {pipeline.MAX_FILE_SIZE_MB} MB limit')
+    filename = _text(value.get("filename"), f"{name}.filename")
+    return await asyncio.to_thread(_write_base64, name, content, filename)
+
+
+def _write_base64(name, content, filename):
+    try:
+        data = base64.b64decode(content, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError(f'"{name}.content_base64" is not valid base64')
+    path = _temp_path(filename)
+    with open(path, "wb") as out:
+        out.write(data)
+    return path
+
+
+async def _read_body(request):
+    """
+    Returns (fields, paths): the JSON body or form fields, and {"jd_file" / "resume_file": temp path}
+    for uploaded files, which the caller deletes. Raises ValueError on a malformed body.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        fields = {key: value for key, value in form.items() if isinstance(value, str)}
+        paths = {}
+        for name in FILE_FIELDS:
+            upload = form.get(name)
+            if upload is not None and not isinstance(upload, str) and upload.filename:
+                paths[name] = await _save_upload(upload)
+        return fields, paths
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("Send a JSON object or multipart/form-data")
+    if not isinstance(body, dict):
+        raise ValueError("Send a JSON object or multipart/form-data")
+    return body, {}
+
+
+def _remove(paths):
+    for path in paths.values():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _text(value, name):
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'"{name}" must be a string')
+    return value
+
+
+def _years(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        raise ValueError('"years_experience" must be a number')
+
+
+# === ANALYSIS ===
+async def _analyze(fields, paths, priority, defaults=None):
+    """Returns (feedback, error) for one JD/resume pair; pasted text is used where no file was sent."""
+    defaults = defaults or {}
+    return await pipeline.analyze_async(
+        _text(fields.get("jd_text"), "jd_text"), paths.get("jd_file"), paths.get("resume_file"),
+        _text(fields.get("domain", defaults.get("domain")), "domain"),
+        _years(fields.get("years_experience", defaults.get("years_experience"))),
+        priority=priority, resume_text_input=_text(fields.get("resume_text"), "resume_text"),
+    )
+
+
+def _status(error):
+    if error.startswith(OVERLOADED_PREFIX):
+        return 503
+    if pipeline.is_retryable_error(error):
+        return 502
+    return 400  # bad input
+
+
+def _retry_after():
+    return str(max(1, math.ceil(model_slots.estimated_wait(PRIORITY_INTERACTIVE))))
+
+
+def _result(feedback, error):
+    return {"feedback": feedback, "error": error, "retryable": pipeline.is_retryable_error(error)}
+
+
+def _rate_limited(request):
+    """A 429 response when the client is over its rate, else None."""
+    retry_after = rate_limiter.acquire(_client_key(request))
+    if not retry_after:
+        return None
+    metrics.inc("requests_total", outcome="rate_limited")
+    return JSONResponse(
+        _result(None, rate_limited_message(retry_after)) | {"retryable": True},
+        status_code=429, headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+# === ROUTES ===
+@asynccontextmanager
+async def _lifespan(app):
+    # Every worker process pays its own start-up costs before taking traffic
+    if pipeline.WARMUP:
+        await asyncio.to_thread(pipeline.warm_up)
+    yield
+
+
+api = FastAPI(title="Career Buddy API", lifespan=_lifespan)
+
+
+@api.get("/healthz")
+async def healthz():
+    return {"status": "ok", "model_slots": model_slots.stats()}
+
+
+@api.post("/v1/analyze")
+async def analyze(request: Request):
+    """
+    One analysis. JSON {"jd_text", "resume_text", "domain"?, "years_experience"?}, or multipart
+    form data with the same fields and/or "jd_file" / "resume_file" uploads (PDF, DOCX or text).
+    Returns {"feedback", "error", "retryable"}; `feedback` is the normalized dict the UI renders.
+    Errors: 400 bad input, 429 rate limited, 502 model failure, 503 overloaded (with Retry-After).
+    """
+    metrics.new_request()
+    limited = _rate_limited(request)
+    if limited:
+        return limited
+    model_calls = track_model_calls()
+    paths = {}
+    with metrics.span("total"):
+        try:
+            fields, paths = await _read_body(request)
+            feedback, error = await _analyze(fields, paths, PRIORITY_INTERACTIVE)
+        except ValueError as e:
+            feedback, error = None, f"⚠️ {e}"
+        finally:
+            _remove(paths)
+    if not model_calls:
+        rate_limiter.refund(_client_key(request))  # only model calls are charged
+    if not error:
+        return _result(feedback, None)
+    headers = {"Retry-After": _retry_after()} if _status(error) == 503 else None
+    return JSONResponse(_result(None, error), status_code=_status(error), headers=headers)
+
+
+@api.post("/v1/batch")
+async def batch(request: Request):
+    """
+    Many analyses in one call. JSON {"items": [item, ...], "domain"?, "years_experience"?}, each
+    item shaped like /v1/analyze's JSON plus an optional "id"; files go in as
+    {"filename", "content_base64"} under "jd_file" / "resume_file". Top-level domain / years are
+    defaults for the items. Streams NDJSON, one line per item as soon as it finishes (so not in
+    input order): {"id", "index", "feedback", "error", "retryable", "seconds"}.
+    """
+    limited = _rate_limited(request)
+    if limited:
+        return limited
+    try:
+        body, _ = await _read_body(request)
+    except ValueError as e:
+        return JSONResponse(_result(None, f"⚠️ {e}"), status_code=400)
+    items = body.get("items")
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return JSONResponse(_result(None, '⚠️ "items" must be a non-empty list of objects'), status_code=400)
+    if len(items) > BATCH_MAX_ITEMS:
+        return JSONResponse(_result(None, f"⚠️ At most {BATCH_MAX_ITEMS} items per batch"), status_code=400)
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index, item):
+        async with limit:
+            metrics.new_request()  # one request id per item (each task has its own context)
+            started = time.perf_counter()
+            paths = {}
+            try:
+                for name in FILE_FIELDS:
+                    if item.get(name):
+                        paths[name] = await _save_base64(name, item[name])
+                feedback, error = await _analyze(item, paths, PRIORITY_BATCH, body)
+            except ValueError as e:
+                feedback, error = None, f"⚠️ {e}"
+            except Exception as e:
+                # One bad item must not end the stream (and cancel its siblings)
+                print(f"❌ Batch item {index} failed: {type(e).__name__}: {e}")
+                feedback, error = None, f"{pipeline.UNEXPECTED_ERROR_PREFIX}: {e}"
+            finally:
+                _remove(paths)
+            line = {"id": item.get("id", index), "index": index}
+            line.update(_result(feedback, error))
+            line["seconds"] = round(time.perf_counter() - started, 3)
+            return line
+
+    async def lines():
+        tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()  # the client went away
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def main():
+    import uvicorn  # only needed to serve
+
+    parser = argparse.ArgumentParser(description="Career Buddy JSON API: feedback dicts without the UI.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="processes sharing the port (workers keep no state)")
+    parser.add_argument("--ui", action="store_true", help="also serve the Gradio UI at /ui (single worker only)")
+    args = parser.parse_args()
+
+    if args.ui:
+        if args.workers > 1:
+            parser.error("--ui needs --workers 1: Gradio sessions live in one process")
+        import gradio as gr
+        import app
+        gr.mount_gradio_app(api, app.demo, path="/ui", allowed_paths=[app.artifact_store.directory])
+    if args.workers == 1:
+        metrics.start_metrics_server()  # no-op unless CAREER_BUDDY_METRICS_PORT is set; one port per process
+    # Several workers need an import string: each process imports this module on its own
+    uvicorn.run("api:api" if args.workers > 1 else api, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,20 @@
 import gradio as gr
-import google.generativeai as genai
-import json
 import os
-from parsers import get_text_from_file
-from prompts import PROMPT
-from datetime import datetime
+import time
+import metrics
+from admission import address_rate_limiter, charge, client_address, rate_limited_message, rate_limiter, refund, track_model_calls
+from artifacts import artifact_store
+from parser_pool import get_parser_pool
+from pipeline import MAX_WORDS, WARMUP, analyze, analyze_async, analyze_stream_async, warm_up
+from render import FeedbackView, partial_html, render
 
 # === CONFIGURATION ===
-genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-MAX_WORDS = 1000
-MAX_FILE_SIZE_MB = 5  # MB
+# Handlers allowed to run at once vs. requests allowed to wait. Independent knobs: with the
+# async handler most of a request is spent awaiting the model, not holding a thread. Model calls
+# are bounded separately by admission.model_slots (CAREER_BUDDY_MODEL_CONCURRENCY), so this is
+# set well above that: cache hits and local analyses never queue behind model-bound requests.
+CONCURRENCY_LIMIT = int(os.environ.get("CAREER_BUDDY_CONCURRENCY", "64"))
+QUEUE_MAX_SIZE = int(os.environ.get("CAREER_BUDDY_QUEUE_SIZE", "32"))
 
 # === CUSTOM CSS (unchanged from your original) ===
 custom_css = """
@@ -142,324 +147,141 @@ custom_css = """
 }
 """
 
-# === HELPER FUNCTIONS ===
-def format_feedback_to_markdown(feedback):
+# === CORE LOGIC ===
+def _without_artifact(output_html):
+    """Gradio outputs for anything but a finished analysis: no artifact, download controls hidden."""
+    return (output_html, None, gr.update(visible=False), gr.update(value=None, visible=False))
+
+
+def render_feedback(feedback, view=None):
     """
-    Convert normalized feedback dict -> markdown string for download.
+    Normalized feedback dict -> Gradio outputs (html_string, artifact_id_or_None, download button update,
+    download file update). The feedback is kept in the artifact store; markdown is rendered on download.
+    `view` is the FeedbackView streamed so far, if any: sections it already rendered are reused.
     """
-    if not isinstance(feedback, dict):
-        return "Error: Invalid feedback format."
+    try:
+        with metrics.span("render"):
+            if view is not None:
+                view.update(feedback, complete=True)
+            output_html = render(view or feedback, "html")
+
+        with metrics.span("artifact_store"):
+            artifact_id = artifact_store.put(feedback)
+        return (output_html, artifact_id, gr.update(visible=True), gr.update(value=None, visible=False))
+
+    except Exception as e:
+        # Catch-all to avoid crashes; log for debugging
+        print(f"❌ Unexpected error in get_coaching_feedback: {type(e).__name__}: {e}")
+        return _without_artifact(f"❌ Unexpected error: {e}")
 
-    resume_score = feedback.get('resume_score', {}).get('score', 'N/A')
-    match_score_100 = feedback.get('match_score', {}).get('score', 0)
+
+def download_feedback(artifact_id):
+    """Download click: renders this session's report to markdown (first click only) and shows the file."""
     try:
-        match_score_10 = (match_score_100 / 100) * 10
-    except Exception:
-        match_score_10 = 0
-
-    current_date = datetime.now().strftime("%Y-%m-%d")
-
-    md = [
-        f"# Career Buddy Resume Analysis\n",
-        f"**Date:** {current_date}\n",
-        f"## 📊 Scores",
-        f"- **Resume Score (Best Practices):** {resume_score}/100 ({feedback.get('resume_score', {}).get('bucket', 'N/A')})",
-        f"- **Match Score (Against JD):** {match_score_10:.1f}/10 ({feedback.get('match_score', {}).get('bucket', 'N/A')})\n",
-        f"## 💎 Strengths\n"
-    ]
-
-    strengths = feedback.get('strengths', [])
-    if isinstance(strengths, (list, tuple)):
-        md.extend([f"* {s}" for s in strengths])
-    elif isinstance(strengths, str):
-        md.append(f"* {strengths}")
-
-    md.append("\n## 🛠️ Areas of Improvement\n")
-    for a in feedback.get('improvement_areas', []):
-        area = a.get('area', 'General') if isinstance(a, dict) else str(a)
-        suggestion = a.get('suggestion', '') if isinstance(a, dict) else ''
-        md.append(f"* **{area}**: {suggestion}")
-
-    md.append("\n## 📝 Rewritten Resume Bullets\n")
-    for b in feedback.get('rewritten_bullets', []):
-        original = b.get('original', '') if isinstance(b, dict) else ''
-        rewritten = b.get('rewritten', '') if isinstance(b, dict) else ''
-        md.append(f"---")
-        md.append(f"**Original:** {original}")
-        md.append(f"**Rewritten:** {rewritten}")
-
-    return "\n".join(md)
-
-
-def ensure_list_of_dicts(data, required_keys):
-    """
-    Ensure `data` is a list of dicts containing required_keys. Convert simple "Key: Value" strings when possible.
-    Returns cleaned list of dicts.
-    """
-    if not isinstance(data, list):
-        return []
+        with metrics.span("artifact_export"):
+            path = artifact_store.export_markdown(artifact_id, lambda feedback: render(feedback, "markdown"))
+    except Exception as e:
+        print(f"Failed to write markdown file: {e}")
+        path = None
+    if path is None:
+        gr.Warning("This report is no longer available. Please run the analysis again.")
+        return gr.update(value=None, visible=False)
+    return gr.update(value=path, visible=True)
 
-    cleaned = []
-    for item in data:
-        if isinstance(item, dict) and all(k in item for k in required_keys):
-            cleaned.append(item)
-        elif isinstance(item, dict):
-            # Keep what's there but ensure keys exist (fill blanks)
-            new_item = {k: item.get(k, "") for k in required_keys}
-            cleaned.append(new_item)
-        elif isinstance(item, str):
-            # Try "Key: Value" parsing for two-key expected structures
-            if len(required_keys) == 2 and ":" in item:
-                parts = item.split(":", 1)
-                cleaned.append({required_keys[0]: parts[0].strip(), required_keys[1]: parts[1].strip()})
-            else:
-                # For single key cases, store under first key
-                cleaned.append({required_keys[0]: item})
-        # else ignore non-string/non-dict entries
-    return cleaned
 
+def _start_request(enqueued_at):
+    print("--- New Request ---")
+    metrics.new_request()
+    if enqueued_at:
+        metrics.observe("queue_wait_seconds", max(0.0, time.time() - enqueued_at))
 
-def build_output_html(feedback, resume_score_info, match_score_info, match_score_display):
-    """
-    Build the final HTML string for Gradio output and return (html, markdown_content).
-    Keeps your original visual structure but uses normalized data.
-    """
-    # Normalize strengths
-    strengths = feedback.get('strengths', [])
-    if isinstance(strengths, str):
-        strengths = [strengths]
-    strengths_list_html = ""
-    for s in strengths:
-        # format_strength_item behavior: split on ':' to bold the left part
-        parts = s.split(":", 1)
-        if len(parts) > 1:
-            formatted = f"<span style='font-weight: 700; color: var(--color-success);'>{parts[0]}:</span> <span style='font-weight: 500; color: var(--color-text-dark);'>{parts[1].strip()}</span>"
-        else:
-            formatted = f"<span style='font-weight: 500; color: var(--color-text-dark);'>{s}</span>"
-        strengths_list_html += f"<li style='margin-bottom: 0.75rem;'>💎 {formatted}</li>"
-
-    # Improvements
-    improvements_list = ""
-    for a in feedback.get('improvement_areas', []):
-        area = a.get('area', '') if isinstance(a, dict) else str(a)
-        suggestion = a.get('suggestion', '') if isinstance(a, dict) else ""
-        improvements_list += f"<li style='margin-bottom: 0.75rem; font-weight: 500; color: var(--color-text-dark);'>🛠️ <span style='font-weight: 600; color: var(--color-accent-500);'>{area}</span>: {suggestion}</li>"
-
-    # Rewritten bullets
-    rewritten_pointers_html = ""
-    for b in feedback.get('rewritten_bullets', []):
-        original = b.get('original', '') if isinstance(b, dict) else ""
-        rewritten = b.get('rewritten', '') if isinstance(b, dict) else ""
-        rewritten_pointers_html += f"""
-            <div class='bullet-pointer'>
-                <p style='margin-bottom: 0.5rem; font-size: 0.95rem; line-height: 1.4;'>
-                    <span style='font-weight: 700; color: var(--color-accent-500);'>📝 Original:</span>
-                    <span style='font-weight: 500; color: var(--color-text-dark);'>{original}</span>
-                </p>
-                <p style='font-size: 1.0rem; line-height: 1.4;'>
-                    <span style='font-weight: 700; color: var(--color-success);'>💡 Rewritten:</span>
-                    <span style='font-weight: 500; color: var(--color-text-dark);'>{rewritten}</span>
-                </p>
-            </div>
-        """
-
-    # Scores HTML (safe defaults if missing)
-    resume_score_val = resume_score_info.get('score', 0) if isinstance(resume_score_info, dict) else 0
-    resume_score_bucket = resume_score_info.get('bucket', 'N/A') if isinstance(resume_score_info, dict) else 'N/A'
-    match_score_bucket = match_score_info.get('bucket', 'N/A') if isinstance(match_score_info, dict) else 'N/A'
-    match_score_pct = match_score_info.get('score', 0) if isinstance(match_score_info, dict) else 0
-
-    scores_html = f"""
-    <div class='output-card'>
-        <h2>📊 Performance Scores</h2>
-        <hr style='border: 0; border-top: 1px solid #e0e0e0; margin-bottom: 1.5rem;'/>
-        <div style='margin-bottom: 1.5rem;'>
-            <h3 style='font-weight: 700; color: var(--color-text-dark); margin-bottom: 0.5rem;'>🎯 Resume Score:
-                <span style='color: var(--color-accent-500); font-size: 1.4rem;'>{resume_score_val}/100 ({resume_score_bucket})</span>
-            </h3>
-            <div class='score-progress'><div class='score-progress-fill' style='width:{resume_score_val}%; background:var(--color-accent-500);'></div></div>
-        </div>
-        <div>
-            <h3 style='font-weight: 700; color: var(--color-text-dark); margin-bottom: 0.5rem;'>🎯 Match Score:
-                <span style='color: var(--color-accent-500); font-size: 1.4rem;'>{match_score_display:.1f}/10 ({match_score_bucket})</span>
-            </h3>
-            <div class='score-progress'><div class='score-progress-fill' style='width:{match_score_pct}%; background:var(--color-accent-500);'></div></div>
-        </div>
-    </div>
-    """
 
-    strengths_html = f"""
-    <div class='output-card strengths-section'>
-        <h3 style='font-weight: 700; color: var(--color-success); margin-bottom: 1.5rem;'>💎 Strengths</h3>
-        <ul style='list-style-type: none; padding-left: 0; margin-top: 1rem;'>{strengths_list_html}</ul>
-    </div>
+def _rate_limits(request):
     """
-
-    improvements_html = f"""
-    <div class='output-card'>
-        <h3 style='font-weight: 700; color: var(--color-accent-500); margin-bottom: 1.5rem;'>🛠️ Key Areas for Improvement</h3>
-        <ul style='color: var(--color-text-dark); list-style-type: none; padding-left: 0; margin-top: 1rem;'>{improvements_list}</ul>
-    </div>
+    (limiter, key) pairs an analysis is charged to: its Gradio session, and more loosely its client
+    address (see admission.client_address), since the session hash is chosen by the client.
     """
+    if request is None:
+        return []
+    forwarded = request.headers.get("x-forwarded-for") if request.headers else None
+    address = client_address(request.client.host if request.client else None, forwarded)
+    return [(rate_limiter, request.session_hash), (address_rate_limiter, address)]
 
-    rewritten_section_html = f"""
-    <div class='output-card'>
-        <h2 style='color: var(--color-text-dark); margin-top: 0; font-size: 1.6rem; font-weight: 700;'>📝 Rewritten Resume Bullets</h2>
-        <p style='margin-bottom: 1.5rem; color: var(--color-text-medium); font-size: 1rem;'>Use these suggestions to immediately improve your resume's impact.</p>
-        {rewritten_pointers_html}
-    </div>
-    """
 
-    output_html = f"<div>{scores_html}{strengths_html}{improvements_html}{rewritten_section_html}</div>"
+def _mark_enqueued():
+    # Runs unqueued on click; the queued handler subtracts this to get its queue wait
+    return time.time()
 
-    markdown_content = format_feedback_to_markdown(feedback)
 
-    return output_html, markdown_content
+def get_coaching_feedback(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, enqueued_at=None):
+    """
+    Returns a tuple for Gradio outputs (see `render_feedback`).
+    """
+    _start_request(enqueued_at)
+    with metrics.span("total"):
+        feedback, error = analyze(jd_text_input, jd_file_input, resume_input_file, domain, years_experience)
+        if error:
+            return _without_artifact(error)
+        return render_feedback(feedback)
 
 
-# === CORE LOGIC ===
-def get_coaching_feedback(jd_text_input, jd_file_input, resume_input_file, domain, years_experience):
+async def get_coaching_feedback_async(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, enqueued_at=None):
     """
-    Returns a tuple for Gradio outputs: (html_string, markdown_file_path_or_None, gr.update(visible=True/False))
+    Async variant of `get_coaching_feedback`: JD and resume are parsed concurrently and the model
+    call is awaited, so many analyses can be in flight on one event loop.
     """
-    print("--- New Request ---")
-    jd_text = jd_text_input.strip() if jd_text_input else ""
-    resume_text = ""
-
-    # === File reading helper with clear errors ===
-    def read_file_safely(file_path, label):
-        if not file_path:
-            return ""
-        try:
-            size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            if size_mb > MAX_FILE_SIZE_MB:
-                return f"ERROR__TOO_LARGE__{label}"
-            text = get_text_from_file(file_path)
-            if text == "PDF_PARSING_ERROR":
-                return f"ERROR__PDF_PARSE__{label}"
-            return text
-        except Exception as e:
-            print(f"Error reading {label}: {e}")
-            return f"ERROR__READ__{label}"
-
-    if not jd_text and jd_file_input:
-        jd_text = read_file_safely(jd_file_input, "JD")
-        if isinstance(jd_text, str) and jd_text.startswith("ERROR__"):
-            return (f"❌ {jd_text.replace('ERROR__','').replace('__',' ')}", None, gr.update(visible=False))
-
-    if resume_input_file:
-        resume_text = read_file_safely(resume_input_file, "Resume")
-        if isinstance(resume_text, str) and resume_text.startswith("ERROR__"):
-            return (f"❌ {resume_text.replace('ERROR__','').replace('__',' ')}", None, gr.update(visible=False))
-
-    # Mandatory validation
-    if not jd_text or not resume_text:
-        return ("⚠️ Please provide both JD and Resume.", None, gr.update(visible=False))
-
-    if len(jd_text.split()) > MAX_WORDS:
-        return (f"⚠️ Job Description exceeds {MAX_WORDS} words.", None, gr.update(visible=False))
-    if len(resume_text.split()) > MAX_WORDS:
-        return (f"⚠️ Resume exceeds {MAX_WORDS} words.", None, gr.update(visible=False))
-
-    # Build prompt
-    full_prompt = (
-        PROMPT.replace("<JD_TEXT>", jd_text)
-        .replace("<RESUME_TEXT>", resume_text)
-        .replace("<DOMAIN>", domain or "General")
-        .replace("<YEARS_OF_EXPERIENCE>", str(years_experience))
-    )
-
-    model = genai.GenerativeModel("gemini-2.5-pro")
+    _start_request(enqueued_at)
+    with metrics.span("total"):
+        feedback, error = await analyze_async(jd_text_input, jd_file_input, resume_input_file, domain, years_experience)
+        if error:
+            return _without_artifact(error)
+        return render_feedback(feedback)
 
-    try:
-        response = model.generate_content(full_prompt, generation_config={"temperature": 0.2})
-        # Access text safely
-        raw_text = getattr(response, "text", None)
-        if raw_text is None:
-            raw_text = str(response)
-
-        raw_text = raw_text.strip()
-
-        # Strip common markdown code fences if present
-        if "```" in raw_text:
-            raw_text = raw_text.replace("```json", "").replace("```", "").strip()
-
-        # Attempt to parse JSON
-        try:
-            feedback = json.loads(raw_text)
-        except json.JSONDecodeError:
-            # Log raw text for debugging
-            print("⚠️ JSON decode failed. Raw model output:")
-            print(raw_text[:10000])  # print up to 10k chars
-            return ("⚠️ AI returned invalid JSON. Retry.", None, gr.update(visible=False))
-
-        if not isinstance(feedback, dict):
-            print("⚠️ Model returned JSON that is not an object/dict:")
-            print(type(feedback), feedback)
-            return ("⚠️ AI returned unexpected structure. Retry.", None, gr.update(visible=False))
-
-        # Normalize expected fields
-        feedback.setdefault("strengths", feedback.get("strengths", []))
-        feedback["improvement_areas"] = ensure_list_of_dicts(feedback.get("improvement_areas", []), ["area", "suggestion"])
-        # Normalize rewritten bullets with fallback keys
-        rewritten_raw = feedback.get("rewritten_bullets", [])
-        normalized_rewritten = []
-        
-        if isinstance(rewritten_raw, list):
-            for item in rewritten_raw:
-                if isinstance(item, dict):
-                    original = (
-                        item.get("original")
-                        or item.get("old")
-                        or item.get("before")
-                        or item.get("previous")
-                        or item.get("existing")
-                        or item.get("old_bullet")
-                        or item.get("original_pointer")
-                    )
-                    rewritten = (
-                        item.get("rewritten")
-                        or item.get("new")
-                        or item.get("after")
-                        or item.get("improved")
-                        or item.get("suggestion")
-                        or item.get("new_bullet")
-                        or item.get("improved_pointer")
-                    )
-                    if original or rewritten:
-                        normalized_rewritten.append({"original": original or "", "rewritten": rewritten or ""})
-                elif isinstance(item, str) and "→" in item:
-                    parts = item.split("→", 1)
-                    normalized_rewritten.append({"original": parts[0].strip(), "rewritten": parts[1].strip()})
-        feedback["rewritten_bullets"] = normalized_rewritten
-
-        # Safely get score dicts
-        resume_score_info = feedback.get("resume_score", {"score": 0, "bucket": "N/A"})
-        match_score_info = feedback.get("match_score", {"score": 0, "bucket": "N/A"})
-        try:
-            match_score_display = (match_score_info.get("score", 0) / 100) * 10
-        except Exception:
-            match_score_display = 0.0
-
-        # Build HTML + markdown
-        output_html, markdown_content = build_output_html(feedback, resume_score_info, match_score_info, match_score_display)
-
-        # Save markdown to a temporary path that Gradio File component can serve
-        temp_file_path = "career_buddy_feedback.md"
-        try:
-            with open(temp_file_path, "w", encoding="utf-8") as f:
-                f.write(markdown_content)
-        except Exception as e:
-            print(f"Failed to write markdown file: {e}")
-            temp_file_path = None
-
-        visible_update = gr.update(visible=bool(temp_file_path))
-        return (output_html, temp_file_path, visible_update)
 
-    except Exception as e:
-        # Catch-all to avoid crashes; log for debugging
-        print(f"❌ Unexpected error in get_coaching_feedback: {type(e).__name__}: {e}")
-        return (f"❌ Unexpected error: {e}", None, gr.update(visible=False))
+async def get_coaching_feedback_stream(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, enqueued_at=None,
+                                       resume_session=None, request: gr.Request = None):
+    """
+    Streaming variant for the UI: an async generator that yields partial HTML as each section of
+    the model's JSON completes, then the final outputs (same tuple as `get_coaching_feedback`,
+    plus the session's parsed resume).
+    A local keyword pre-score is shown first, until the model's own scores replace it.
+    `resume_session` is the resume parsed by this session's previous analysis: while the same file
+    stays uploaded, trying other JDs skips all resume work (see pipeline.analyze_stream_async).
+    Each session and client address is rate limited (see _rate_limits), but only for analyses that
+    reach the model; Gradio passes `request` in.
+    """
+    _start_request(enqueued_at)
+    limits = _rate_limits(request)
+    retry_after = charge(limits)
+    if retry_after:
+        metrics.inc("requests_total", outcome="rate_limited")
+        yield _without_artifact(rate_limited_message(retry_after)) + (resume_session,)
+        return
+    model_calls = track_model_calls()
+    view = FeedbackView.partial({})  # updated as sections arrive; each section's HTML is rendered once
+    prescore = None
+    with metrics.span("total"):
+        async for event in analyze_stream_async(
+            jd_text_input, jd_file_input, resume_input_file, domain, years_experience, resume_session=resume_session
+        ):
+            if event[0] == "resume":
+                resume_session = event[1]
+                continue
+            if event[0] == "prescore":
+                prescore = event[1]
+                yield _without_artifact(partial_html(view, prescore)) + (resume_session,)
+                continue
+            if event[0] == "section":
+                view.update(event[1])
+                yield _without_artifact(partial_html(view, prescore)) + (resume_session,)
+                continue
+            _, feedback, error = event
+            if not model_calls:
+                refund(limits)  # cache hit, joined in-flight call, local answer or invalid input
+            if error:
+                yield _without_artifact(error) + (resume_session,)
+            else:
+                yield render_feedback(feedback, view) + (resume_session,)
 
 
 # === GRADIO UI ===
@@ -477,7 +299,7 @@ with gr.Blocks(theme=gr.themes.Monochrome(), css=custom_css) as demo:
                 gr.Markdown("## 📋 Job Description (JD)")
                 with gr.Row(equal_height=True):
                     with gr.Column(scale=1):
-                        jd_input_text = gr.Textbox(label="Paste JD Text", lines=5, placeholder="Paste JD here (max 1000 words)")
+                        jd_input_text = gr.Textbox(label="Paste JD Text", lines=5, placeholder=f"Paste JD here (max {MAX_WORDS} words)")
                     gr.Markdown("<div class='or-text'>OR</div>")
                     with gr.Column(scale=1):
                         jd_input_file = gr.File(label="Upload JD (PDF/DOCX)", type="filepath")
@@ -518,18 +340,27 @@ with gr.Blocks(theme=gr.themes.Monochrome(), css=custom_css) as demo:
             reset_button = gr.Button("🔄 Try Again (Reset)", scale=1)
             download_button_ui = gr.Button("⬇️ Download Feedback (.md)", scale=2, visible=False)
 
+        # This session's finished analysis (an artifact_store id); the report is rendered on download
+        artifact_id = gr.State(None)
+        # This session's parsed resume (text, segmentation, hash), reused while the same file stays uploaded
+        resume_state = gr.State(None)
+
         # Reset outputs list
         reset_outputs = [
             jd_input_text, jd_input_file, resume_input_file,
-            domain_input, years_exp_input, output_text, download_file,
+            domain_input, years_exp_input, output_text, download_file, artifact_id, resume_state,
         ]
 
-        # Hook up analyze button
+        # Hook up analyze button (the first, unqueued step timestamps the click for queue-wait metrics)
+        enqueued_at = gr.State(None)
         analyze_button.click(
-            fn=get_coaching_feedback,
-            inputs=[jd_input_text, jd_input_file, resume_input_file, domain_input, years_exp_input],
-            outputs=[output_text, download_file, download_button_ui],
+            fn=_mark_enqueued, inputs=[], outputs=[enqueued_at], queue=False,
+        ).then(
+            fn=get_coaching_feedback_stream,
+            inputs=[jd_input_text, jd_input_file, resume_input_file, domain_input, years_exp_input, enqueued_at, resume_state],
+            outputs=[output_text, artifact_id, download_button_ui, download_file, resume_state],
             show_progress=True,
+            concurrency_limit=CONCURRENCY_LIMIT,
         )
 
         # Reset logic: clear inputs and hide download button
@@ -544,17 +375,21 @@ with gr.Blocks(theme=gr.themes.Monochrome(), css=custom_css) as demo:
             queue=False
         )
 
-        # Download button simply triggers the file component to be visible/downlaodable; keep as UI affordance
-        # We keep it clickable with no extra effect (file is already created and bound to download_file)
+        # Download button renders the markdown for this session's artifact and reveals the file link
         download_button_ui.click(
-            fn=lambda: None,
-            inputs=[],
-            outputs=[],
+            fn=download_feedback,
+            inputs=[artifact_id],
+            outputs=[download_file],
             queue=False
         )
 
 # Enable queue for scalability
-demo.queue(max_size=3)
+demo.queue(max_size=QUEUE_MAX_SIZE)
 
 if __name__ == "__main__":
-    demo.launch()
+    if WARMUP:
+        warm_up()  # parser workers, model connections and local stages, before taking traffic
+    else:
+        get_parser_pool()  # start parser workers before taking traffic
+    metrics.start_metrics_server()  # no-op unless CAREER_BUDDY_METRICS_PORT is set
+    demo.launch(allowed_paths=[artifact_store.directory])
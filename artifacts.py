@@ -0,0 +1,125 @@
+# artifacts.py
+import atexit
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from cache import DiskCache, LRUCache
+
+# === CONFIGURATION ===
+ARTIFACT_MAX_MB = int(os.environ.get("CAREER_BUDDY_ARTIFACT_MAX_MB", "64"))  # in memory
+ARTIFACT_MAX_ITEMS = 5000
+ARTIFACT_TTL_SECONDS = int(os.environ.get("CAREER_BUDDY_ARTIFACT_TTL", str(2 * 60 * 60)))
+ARTIFACT_SPILL_MAX_MB = 256
+# Must be under the system temp dir (or passed to launch(allowed_paths=...)) for Gradio to serve downloads
+ARTIFACT_DIR = os.environ.get("CAREER_BUDDY_ARTIFACT_DIR")  # unset = a private temp dir
+DOWNLOAD_FILENAME = "career_buddy_feedback.md"
+
+
+class ArtifactStore:
+    """
+    Finished analyses, one per session (the UI keeps the artifact id in gr.State).
+    Normalized feedback dicts live in a byte-bounded LRU with a TTL; entries pushed out of memory
+    spill to JSON files in a temp directory. The markdown report is rendered and written only when
+    a download is requested, to a per-artifact path so concurrent sessions never share a file.
+    """
+
+    def __init__(self, max_bytes=ARTIFACT_MAX_MB * 1024 * 1024, max_items=ARTIFACT_MAX_ITEMS,
+                 ttl=ARTIFACT_TTL_SECONDS, directory=ARTIFACT_DIR, spill_max_bytes=ARTIFACT_SPILL_MAX_MB * 1024 * 1024):
+        self.ttl = ttl
+        self._memory = LRUCache(max_bytes, max_items=max_items, ttl=ttl, on_evict=self._spill)
+        self._directory = directory
+        self._spill_max_bytes = spill_max_bytes
+        self._disk = None
+        self._lock = threading.Lock()
+        self.spills = 0
+
+    @property
+    def directory(self):
+        # Created on first use, so importing the app does not touch the filesystem
+        with self._lock:
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix="career_buddy_artifacts_")
+                atexit.register(shutil.rmtree, self._directory, True)
+            os.makedirs(self._directory, exist_ok=True)
+            return self._directory
+
+    def _spill_cache(self):
+        if self._disk is None:
+            self._disk = DiskCache(os.path.join(self.directory, "spill"), self._spill_max_bytes)
+        return self._disk
+
+    def _spill(self, artifact_id, entry):
+        if self._expired(entry):
+            return
+        self._spill_cache().set(artifact_id, json.dumps(entry, ensure_ascii=False))
+        self.spills += 1
+
+    def _expired(self, entry):
+        return bool(self.ttl) and entry["created_at"] + self.ttl < time.time()
+
+    def put(self, feedback):
+        """Stores a normalized feedback dict; returns its artifact id."""
+        artifact_id = secrets.token_hex(16)
+        self._memory.set(artifact_id, {"feedback": feedback, "created_at": time.time()})
+        return artifact_id
+
+    def get(self, artifact_id):
+        """The feedback dict for `artifact_id`, or None if unknown or expired."""
+        if not artifact_id:
+            return None
+        entry = self._memory.get(artifact_id)
+        if entry is None and self._disk is not None:
+            raw = self._disk.get(artifact_id)
+            entry = json.loads(raw) if raw else None
+        if entry is None or self._expired(entry):
+            return None
+        return entry["feedback"]
+
+    def export_markdown(self, artifact_id, render):
+        """
+        Renders `render(feedback)` to <directory>/<artifact_id>/career_buddy_feedback.md on first request.
+        Returns the path, or None if the artifact is gone.
+        """
+        feedback = self.get(artifact_id)
+        if feedback is None:
+            return None
+        folder = os.path.join(self.directory, artifact_id)
+        path = os.path.join(folder, DOWNLOAD_FILENAME)
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(render(feedback))
+            os.replace(tmp_path, path)
+            self._prune_exports()
+        return path
+
+    def _prune_exports(self):
+        # Exported reports live as long as their artifact's TTL
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            folder = os.path.join(self.directory, name)
+            if name == "spill" or not os.path.isdir(folder):
+                continue
+            try:
+                if os.stat(folder).st_mtime < cutoff:
+                    shutil.rmtree(folder, ignore_errors=True)
+            except OSError:
+                pass
+
+    def stats(self):
+        return {
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory.size_bytes,
+            "memory_evictions": self._memory.evictions,
+            "spills": self.spills,
+        }
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,233 @@
+# batch.py
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import metrics
+import pipeline
+from admission import PRIORITY_BATCH, model_slots
+from cache import content_hash
+from metrics import percentile
+from parser_pool import PARSER_WORKERS
+from preprocess import prepare_resume
+
+# === CONFIGURATION ===
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 2.0  # doubled on every retry, with +/-50% jitter
+MAX_BACKOFF_SECONDS = 60.0
+INPUT_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+
+
+# === JOBS ===
+def _files_in(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(INPUT_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def _job(resume, jd=None, jd_text=None, domain=None, years_experience=0, job_id=None):
+    if job_id is None:
+        # Everything the feedback depends on: the same pair for another domain or seniority is another job
+        jd_key = jd if jd is not None else "text:" + content_hash(jd_text or "")[:16]
+        job_id = f"{resume}::{jd_key}::{domain or ''}::{years_experience or 0}"
+    return {
+        "id": job_id, "resume": resume, "jd": jd, "jd_text": jd_text,
+        "domain": domain, "years_experience": years_experience,
+    }
+
+
+def jobs_from_manifest(path, domain=None, years_experience=0):
+    """
+    One job per JSONL line: {"resume": path, "jd": path | "jd_text": str, "id"?, "domain"?,
+    "years_experience"?}. Relative paths are resolved against the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    resolve = lambda p: p if p is None or os.path.isabs(p) else os.path.join(base, p)
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "resume" not in entry or not (entry.get("jd") or entry.get("jd_text")):
+                raise ValueError(f"{path}:{line_no}: needs \"resume\" and \"jd\" or \"jd_text\"")
+            jobs.append(_job(
+                resolve(entry["resume"]), resolve(entry.get("jd")), entry.get("jd_text"),
+                entry.get("domain", domain), entry.get("years_experience", years_experience), entry.get("id"),
+            ))
+    return jobs
+
+
+def jobs_from_paths(resume, jd, domain=None, years_experience=0):
+    """Every resume against every JD; either side may be a file or a directory of files."""
+    resumes = _files_in(resume) if os.path.isdir(resume) else [resume]
+    jds = _files_in(jd) if os.path.isdir(jd) else [jd]
+    return [_job(r, j, domain=domain, years_experience=years_experience) for r in resumes for j in jds]
+
+
+# === CHECKPOINT ===
+def completed_ids(output_path):
+    """Ids already written with status "ok" (failed jobs are retried on resume)."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by the interruption
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+# === RUN ===
+async def _parse_files(paths, workers):
+    """Parses each unique file once (the parser pool also dedups identical bytes). Returns {path: text}."""
+    limit = asyncio.Semaphore(max(1, workers))  # more would only wait for an idle parser worker
+
+    async def parse(path):
+        async with limit:
+            return path, await asyncio.to_thread(pipeline.read_file_safely, path, os.path.basename(path))
+
+    return dict(await asyncio.gather(*(parse(p) for p in paths)))
+
+
+async def _analyze_with_retries(job, jd_text, resume_text, retries, backoff):
+    """Returns (feedback, error, attempts)."""
+    attempt = 0
+    while True:
+        attempt += 1
+        feedback, error = await pipeline.analyze_text_async(
+            jd_text, resume_text, job["domain"], job["years_experience"], priority=PRIORITY_BATCH
+        )
+        if not error or attempt > retries or not pipeline.is_retryable_error(error):
+            return feedback, error, attempt
+        delay = min(MAX_BACKOFF_SECONDS, backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        print(f"Retrying {job['id']} in {delay:.1f}s (attempt {attempt} failed: {error})")
+        metrics.inc("batch_retries_total")
+        await asyncio.sleep(delay)
+
+
+async def run_batch(jobs, output_path, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+                    backoff=DEFAULT_BACKOFF_SECONDS, parser_workers=PARSER_WORKERS):
+    """
+    Runs `jobs`, appending one JSONL record per job to `output_path` as soon as it finishes (the
+    output doubles as the checkpoint: jobs already there with status "ok" are skipped).
+    Returns the throughput report dict.
+    """
+    started = time.perf_counter()
+    done = completed_ids(output_path)
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+
+    parse_started = time.perf_counter()
+    paths = sorted({job["resume"] for job in pending} | {job["jd"] for job in pending if job["jd"]})
+    texts = await _parse_files(paths, parser_workers)
+    parse_seconds = time.perf_counter() - parse_started
+    print(f"Parsed {len(paths)} unique files in {parse_seconds:.1f}s")
+    # Each resume is cleaned and segmented once, however many JDs it is scored against
+    resumes = {
+        path: prepare_resume(texts[path]) for path in {job["resume"] for job in pending}
+        if not pipeline.file_error_message(texts[path])
+    }
+
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    counts = {"ok": 0, "error": 0}
+
+    async def run(job, out):
+        async with limit:
+            job_started = time.perf_counter()
+            jd_text = job["jd_text"] if job["jd_text"] is not None else texts[job["jd"]]
+            resume_text = resumes.get(job["resume"]) or texts[job["resume"]]
+            attempts = 0
+            error = pipeline.file_error_message(jd_text) or pipeline.file_error_message(resume_text)
+            feedback = None
+            if not error:
+                feedback, error, attempts = await _analyze_with_retries(job, jd_text, resume_text, retries, backoff)
+            seconds = time.perf_counter() - job_started
+            status = "error" if error else "ok"
+            record = {
+                "id": job["id"], "resume": job["resume"], "jd": job["jd"], "status": status, "error": error,
+                "attempts": attempts, "seconds": round(seconds, 3), "feedback": feedback,
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[status] += 1
+            latencies.append(seconds)
+            finished = counts["ok"] + counts["error"]
+            if finished % 25 == 0 or finished == len(pending):
+                print(f"{finished}/{len(pending)} done ({counts['error']} errors)")
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        if out.tell() and not _ends_with_newline(output_path):
+            out.write("\n")  # terminate a record cut short by the interruption
+        await asyncio.gather(*(run(job, out) for job in pending))
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "jobs": len(jobs),
+        "skipped": len(jobs) - len(pending),
+        "ok": counts["ok"],
+        "errors": counts["error"],
+        "unique_files": len(paths),
+        "parse_seconds": round(parse_seconds, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "jobs_per_minute": round(len(pending) / elapsed * 60, 1) if elapsed else 0.0,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p95_seconds": round(percentile(latencies, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score resumes against JDs without the UI: one resume vs many JDs, many resumes vs one JD, or a manifest."
+    )
+    parser.add_argument("--resume", help="resume file, or a directory of resumes")
+    parser.add_argument("--jd", help="JD file, or a directory of JDs")
+    parser.add_argument("--manifest", help='JSONL of {"resume": ..., "jd": ... | "jd_text": ..., "id"?, "domain"?, "years_experience"?}')
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results; also the checkpoint to resume from")
+    parser.add_argument("--domain", default=None)
+    parser.add_argument("--years", type=float, default=0, help="years of experience")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="model calls in flight")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS, help="first retry delay (s)")
+    parser.add_argument("--report", help="also write the throughput report as JSON here")
+    args = parser.parse_args()
+
+    if args.manifest:
+        jobs = jobs_from_manifest(args.manifest, args.domain, args.years)
+    elif args.resume and args.jd:
+        jobs = jobs_from_paths(args.resume, args.jd, args.domain, args.years)
+    else:
+        parser.error("pass --manifest, or both --resume and --jd")
+
+    # A batch waits for model slots instead of being shed, and owns all of them
+    model_slots.slots = args.concurrency
+    model_slots.max_queued = len(jobs) + 1
+    model_slots.max_wait = float("inf")
+    pipeline.warm_up()
+    report = asyncio.run(run_batch(jobs, args.output, args.concurrency, args.retries, args.backoff))
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+# bench.py
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import corpus
+import llm
+import parsers
+import pipeline
+from fake_llm import FakeBackend, fake_feedback
+from metrics import percentile
+from prescore import prescore
+from preprocess import preprocess_inputs
+from resume_structure import compact_resume
+from scheduler import ScheduledBackend
+
+DEFAULT_OUTPUT = "bench_results.json"
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STARTUP_TOP_MODULES = 8
+
+
+def measure(name, fn, iterations, warmup=2, setup=None):
+    """
+    Times `fn()` over `iterations` runs (after `warmup`), then runs it once more under tracemalloc for peak memory.
+    `setup()` runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    gc.collect()
+    timings = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    total = sum(timings)
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "ops_per_sec": iterations / total if total else 0.0,
+        "mean_ms": total / iterations * 1000,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_mem_kb": peak / 1024,
+    }
+    print(f"{name:<40} {result['ops_per_sec']:>10.1f} ops/s  p50 {result['p50_ms']:>9.3f} ms  "
+          f"p99 {result['p99_ms']:>9.3f} ms  peak {result['peak_mem_kb']:>9.1f} KB")
+    return result
+
+
+# === STAGES ===
+def bench_extraction(paths, iterations):
+    results = []
+    for (fmt, pages), path in sorted(paths.items()):
+        if fmt == "pdf":
+            fn = lambda path=path: parsers.extract_text_from_pdf(path)
+        elif fmt == "docx":
+            fn = lambda path=path: parsers.extract_text_from_docx(path)
+            # Baseline: the python-docx object model (the fallback extractor)
+            baseline = measure(
+                f"extract.docx_python_docx.{pages}p",
+                lambda path=path: parsers.extract_text_from_docx_python_docx(path),
+                iterations,
+            )
+            baseline["bytes"] = os.path.getsize(path)
+            results.append(baseline)
+        else:
+            continue
+        result = measure(f"extract.{fmt}.{pages}p", fn, iterations)
+        result["bytes"] = os.path.getsize(path)
+        results.append(result)
+    return results
+
+
+def bench_prompt(iterations):
+    jd = corpus.make_jd_text(1)
+    resume = "\n".join(corpus.make_resume_lines(40, seed=1))
+    full = measure("prompt.build", lambda: pipeline.build_prompt(jd, resume, "Software Engineering", 5), iterations)
+    full["prompt_chars"] = len(pipeline.build_prompt(jd, resume, "Software Engineering", 5))
+    build_compact = lambda: pipeline.build_prompt(jd, compact_resume(jd, resume), "Software Engineering", 5)
+    compact = measure("prompt.build_compact", build_compact, iterations)
+    compact["prompt_chars"] = len(build_compact())
+    print(f"{'':<40} prompt chars: full {full['prompt_chars']}, compact {compact['prompt_chars']}")
+    return [full, compact]
+
+
+def bench_prescore(iterations):
+    jd = corpus.make_jd_text(1)
+    return [
+        measure(f"prescore.{n}_bullets", lambda resume=resume: prescore(jd, resume), iterations)
+        for n, resume in ((10, "\n".join(corpus.make_resume_lines(10, seed=1))), (80, "\n".join(corpus.make_resume_lines(80, seed=1))))
+    ]
+
+
+def bench_preprocess(iterations):
+    jd = corpus.make_jd_text(1)
+    return [
+        measure(f"preprocess.{n}_bullets", lambda resume=resume: preprocess_inputs(jd, resume), iterations)
+        for n, resume in ((10, "\n".join(corpus.make_resume_lines(10, seed=1))), (300, "\n".join(corpus.make_resume_lines(300, seed=1))))
+    ]
+
+
+def _variant_outputs():
+    prompt = pipeline.build_prompt(corpus.make_jd_text(2), "\n".join(corpus.make_resume_lines(20, seed=2)), "PM", 3)
+    clean = fake_feedback(prompt)
+    # Fallback-key chain: keys late in the chain, plus "a → b" strings and "Key: Value" improvement areas
+    fallback = dict(clean)
+    fallback["rewritten_bullets"] = (
+        [{"original_pointer": b["original"], "improved_pointer": b["rewritten"]} for b in clean["rewritten_bullets"][:2]]
+        + [f"{b['original']} → {b['rewritten']}" for b in clean["rewritten_bullets"][2:]]
+    )
+    fallback["improvement_areas"] = [f"{a['area']}: {a['suggestion']}" for a in clean["improvement_areas"]]
+    return {
+        "clean": json.dumps(clean, indent=2),
+        "fenced": "```json\n" + json.dumps(clean, indent=2) + "\n```",
+        "fallback_keys": json.dumps(fallback, indent=2),
+    }
+
+
+def bench_parse(iterations):
+    return [
+        measure(f"parse.{name}", lambda raw=raw: pipeline.parse_model_output(raw), iterations)
+        for name, raw in _variant_outputs().items()
+    ]
+
+
+def bench_render(iterations):
+    from render import FeedbackView, RENDERERS, partial_html
+    feedback, _ = pipeline.parse_model_output(_variant_outputs()["clean"])
+    results = [measure("render.view", lambda: FeedbackView(feedback), iterations)]
+    # The renderers themselves on a fresh (untimed) view each call: a view keeps what it rendered
+    views = [None]
+
+    def fresh_view():
+        views[0] = FeedbackView(feedback)
+
+    results += [
+        measure(f"render.{fmt}", lambda fn=fn: fn(views[0]), iterations, setup=fresh_view)
+        for fmt, fn in RENDERERS.items()
+    ]
+
+    prescore_result = prescore(corpus.make_jd_text(1), "\n".join(corpus.make_resume_lines(10, seed=1)))
+
+    def stream():
+        # What a streamed UI request renders: the pre-score, one partial page per section, the final page
+        partial = FeedbackView.partial({})
+        partial_html(partial, prescore_result)
+        for key, value in feedback.items():
+            partial.update({key: value})
+            partial_html(partial, prescore_result)
+        partial.update(feedback, complete=True)
+        partial.render("html")
+
+    results.append(measure("render.stream", stream, iterations))
+    return results
+
+
+def bench_end_to_end(paths, iterations, latency):
+    import app
+    llm.set_backend(llm.LLM_BACKEND, FakeBackend(latency=f"fixed:{latency}"))
+    jd = corpus.make_jd_text(3, boilerplate=False)
+    resume = paths[("docx", 1)]
+
+    def cold():
+        # Every request misses both caches, like a first-time upload
+        parsers.text_cache.clear()
+        if pipeline.response_cache:
+            pipeline.response_cache.clear()
+
+    run = lambda: app.get_coaching_feedback(jd, None, resume, "Software Engineering", 4)
+    return [
+        measure(f"e2e.cold.fake_{latency * 1000:.0f}ms", run, iterations, setup=cold),
+        measure("e2e.warm_cache", run, iterations),
+    ]
+
+
+def _import_times(module):
+    """
+    Imports `module` in a fresh interpreter under -X importtime.
+    Returns (total_us, {module it imports directly: cumulative_us}).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, env=env, check=True
+    )
+    children, total, direct = {}, 0, {}
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative, name = int(fields[1]), fields[2]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            # Children are printed before their parent, so the lines gathered so far belong to it
+            if name.strip() == module:
+                total, direct = cumulative, children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = cumulative
+    return total, direct
+
+
+def _warm_up_times():
+    """pipeline.warm_up() in a fresh interpreter against the fake backend; returns {step: seconds}."""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, CAREER_BUDDY_LLM_BACKEND="fake")
+    code = "import json, pipeline; print(json.dumps(pipeline.warm_up()))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _samples_result(name, samples_ms, breakdown):
+    samples_ms.sort()
+    mean_ms = sum(samples_ms) / len(samples_ms)
+    print(f"{name:<40} {1000 / mean_ms:>10.1f} ops/s  p50 {percentile(samples_ms, 50):>9.3f} ms  "
+          f"p99 {percentile(samples_ms, 99):>9.3f} ms")
+    for part, ms in sorted(breakdown.items(), key=lambda item: -item[1])[:STARTUP_TOP_MODULES]:
+        print(f"    {part:<36} {ms:>9.1f} ms")
+    return {
+        "name": name,
+        "iterations": len(samples_ms),
+        "ops_per_sec": 1000 / mean_ms if mean_ms else 0.0,
+        "mean_ms": mean_ms,
+        "p50_ms": percentile(samples_ms, 50),
+        "p99_ms": percentile(samples_ms, 99),
+        "peak_mem_kb": None,
+        "breakdown_ms": breakdown,
+    }
+
+
+def bench_startup(runs):
+    """
+    Cold-start cost: import time of app (the UI) and pipeline (headless use) with the cost of each
+    module they import directly, then pipeline.warm_up() per step. Every run is a fresh interpreter.
+    """
+    results = []
+    for module in ("pipeline", "app"):
+        samples, breakdown = [], {}
+        for _ in range(runs):
+            total, direct = _import_times(module)
+            samples.append(total / 1000)
+            breakdown = {name: us / 1000 for name, us in direct.items()}
+        results.append(_samples_result(f"startup.import.{module}", samples, breakdown))
+    samples, breakdown = [], {}
+    for _ in range(runs):
+        steps = _warm_up_times()
+        samples.append(sum(steps.values()) * 1000)
+        breakdown = {name: seconds * 1000 for name, seconds in steps.items()}
+    results.append(_samples_result("startup.warm_up", samples, breakdown))
+    return results
+
+
+async def _call_latencies(backend, prompt, calls, concurrency, stream=False):
+    """Per-call latency in ms (time to first chunk for streams) and the number of failed calls."""
+    limit = asyncio.Semaphore(concurrency)
+    samples, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        async with limit:
+            start = time.perf_counter()
+            try:
+                if stream:
+                    async for _ in backend.generate_stream_async(prompt):
+                        break
+                else:
+                    await backend.generate_async(prompt)
+            except Exception:
+                failures += 1
+                return
+            samples.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return samples, failures
+
+
+def bench_tail(calls, latency):
+    """
+    Model-call latency against a fake backend with a heavy tail: the backend called directly vs
+    through scheduler.ScheduledBackend (hedging past the observed p95), for one-shot calls and
+    streams; then a failing primary, where the circuit breaker moves calls to the fallback tier.
+    """
+    prompt = pipeline.build_prompt(
+        corpus.make_jd_text(1), "\n".join(corpus.make_resume_lines(20, seed=1)), "Software Engineering", 5
+    )
+    results = []
+    for stream in (False, True):
+        kind = "stream_ttfb" if stream else "call"
+        fake = FakeBackend(latency=latency, seed=1, ttfb_fraction=1.0)
+        scheduled = ScheduledBackend(fake, retries=0)
+        asyncio.run(_call_latencies(scheduled, prompt, 50, 10, stream))  # fills the latency window
+        for name, backend in (("direct", fake), ("scheduled", scheduled)):
+            calls_before = fake.calls
+            samples, failures = asyncio.run(_call_latencies(backend, prompt, calls, 10, stream))
+            extra = fake.calls - calls_before - calls
+            results.append(_samples_result(f"tail.{kind}.{name}", samples, {}))
+            print(f"    failures {failures}, extra backend calls (hedges) {extra}")
+
+    primary = FakeBackend(latency="fixed:0.01", error_rate=1.0, model_name="fake-down")
+    fallback = FakeBackend(latency="fixed:0.01", model_name="fake-fast")
+    scheduled = ScheduledBackend(primary, fallback, retries=1)
+    samples, failures = asyncio.run(_call_latencies(scheduled, prompt, calls, 10))
+    results.append(_samples_result("tail.breaker_fallback", samples, {}))
+    print(f"    failures {failures}, primary calls {primary.calls}, fallback calls {fallback.calls}")
+    return results
+
+
+# === RUNNER ===
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, results):
+    """Prints ops/sec and p99 ratios against a previous results file."""
+    with open(old_path, encoding="utf-8") as f:
+        old = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\n{'benchmark':<40} {'ops/s new/old':>14} {'p99 new/old':>12}")
+    for r in results:
+        before = old.get(r["name"])
+        if not before:
+            continue
+        ops = r["ops_per_sec"] / before["ops_per_sec"] if before["ops_per_sec"] else float("nan")
+        p99 = r["p99_ms"] / before["p99_ms"] if before["p99_ms"] else float("nan")
+        print(f"{r['name']:<40} {ops:>14.2f} {p99:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of get_coaching_feedback.")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--only", default="", help="comma-separated stages: startup,extract,prompt,prescore,preprocess,parse,render,e2e,tail")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed fake-model latency (s) for e2e")
+    parser.add_argument("--tail-latency", default="lognormal:0.05:1.0", help="fake-model latency distribution for tail")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args()
+
+    scale = 0.2 if args.quick else 1.0
+    n = lambda base: max(3, int(base * scale))
+    only = set(filter(None, args.only.split(",")))
+    wanted = lambda stage: not only or stage in only
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="career_buddy_bench_") as tmp:
+        paths = corpus.build_corpus(os.path.join(tmp, "corpus"))
+        cwd = os.getcwd()
+        os.chdir(tmp)  # keep anything the handlers write out of the checkout
+        try:
+            if wanted("startup"):
+                results += bench_startup(max(1, n(5)))
+            if wanted("extract"):
+                results += bench_extraction(paths, n(20))
+            if wanted("prompt"):
+                results += bench_prompt(n(5000))
+            if wanted("prescore"):
+                results += bench_prescore(n(500))
+            if wanted("preprocess"):
+                results += bench_preprocess(n(200))
+            if wanted("parse"):
+                results += bench_parse(n(2000))
+            if wanted("render"):
+                results += bench_render(n(2000))
+            if wanted("e2e"):
+                results += bench_end_to_end(paths, n(30), args.latency)
+            if wanted("tail"):
+                results += bench_tail(n(500), args.tail_latency)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(*parts):
+    """
+    Returns a hex sha256 over the given parts (bytes or str), used as a content-addressed cache key.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(part)
+        h.update(b"\x00")  # separator so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+
+def _sizeof(value):
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(repr(value))
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache bounded by the total size of stored values (bytes).
+    Optional `ttl` (seconds) expires entries on read. `on_evict(key, value)` is called (outside the lock)
+    for entries pushed out by the size bounds.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_items=None, ttl=None, on_evict=None):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[2] is not None and entry[2] < time.monotonic():
+                del self._data[key]
+                self._bytes -= entry[1]
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return  # never cache something that would evict everything else
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._data and (
+                self._bytes > self.max_bytes
+                or (self.max_items is not None and len(self._data) > self.max_items)
+            ):
+                evicted_key, (evicted_value, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+                if self.on_evict is not None:
+                    evicted.append((evicted_key, evicted_value))
+        for evicted_key, evicted_value in evicted:
+            self.on_evict(evicted_key, evicted_value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+class DiskCache:
+    """
+    Directory-backed text cache: one file per key, oldest (by mtime) evicted first when over max_bytes.
+    The directory is only scanned when the size tracked across writes goes over max_bytes (eviction
+    then frees down to `low_water` of it, so a full cache is not rescanned on every write), and every
+    `rescan_writes` writes to pick up what other processes sharing it have written.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, low_water=0.9, rescan_writes=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.rescan_writes = rescan_writes
+        self._lock = threading.Lock()
+        self._size = None  # bytes as of the last scan plus this process's writes since; None: not scanned yet
+        self._writes = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)  # touch so recently used entries survive eviction
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Disk cache read error: {e}")
+            return None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(value)
+            added = os.path.getsize(tmp_path) - _file_size(path)
+            os.replace(tmp_path, path)  # atomic, so concurrent readers never see partial files
+        except OSError as e:
+            print(f"Disk cache write error: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += added
+            due = self._size is None or self._size > self.max_bytes or self._writes % self.rescan_writes == 0
+        if due:
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            try:
+                entries = []
+                for name in os.listdir(self.directory):
+                    if not name.endswith(".txt"):
+                        continue
+                    st = os.stat(os.path.join(self.directory, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+            except OSError as e:
+                print(f"Disk cache scan error: {e}")
+                return
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * self.low_water if total > self.max_bytes else total
+            for _, size, name in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    total -= size
+                    self.evictions += 1
+                except OSError:
+                    pass
+            self._size = total
+
+    def clear(self):
+        self._size = None
+        for name in os.listdir(self.directory):
+            if name.endswith(".txt"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class SQLiteCache:
+    """
+    SQLite-backed text cache with TTL and LRU eviction (by last access), shareable across processes.
+    """
+
+    def __init__(self, path, max_items=10000, ttl=None):
+        self.path = path
+        self.max_items = max_items
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] is not None and row[1] < now:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"SQLite cache read error: {e}")
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+                excess = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_items
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions += excess
+        except sqlite3.Error as e:
+            print(f"SQLite cache write error: {e}")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    @property
+    def size_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()[0]
+
+
+class TieredCache:
+    """
+    Primary store (LRUCache or SQLiteCache) in front of an optional DiskCache. Disk hits are promoted.
+    Tracks hit/miss counters, see `stats()`.
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "memory_items": len(self.memory),
+            "memory_bytes": self.memory.size_bytes,
+            "memory_evictions": self.memory.evictions,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+        }
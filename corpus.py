@@ -0,0 +1,120 @@
+# corpus.py
+import os
+import random
+import docx
+
+VERBS = ["Led", "Built", "Designed", "Shipped", "Automated", "Scaled", "Migrated", "Optimized", "Launched", "Owned"]
+OBJECTS = [
+    "a data pipeline", "the checkout service", "an A/B testing platform", "CI/CD workflows", "a Django REST API",
+    "the mobile onboarding flow", "SEO reporting dashboards", "an AWS cost review", "the pricing experiment",
+    "a customer churn model", "Kubernetes deployments", "the analytics warehouse",
+]
+RESULTS = [
+    "cutting latency by {n}%", "saving ${n}K per year", "for {n}K monthly users", "raising conversion {n}%",
+    "with a team of {n} engineers", "reducing incidents {n}%", "in {n} weeks",
+]
+SKILLS = ["Python", "SQL", "AWS", "Django", "Agile", "Tableau", "Google Analytics", "Kubernetes", "A/B testing", "Figma"]
+JD_BOILERPLATE = (
+    "We are an equal opportunity employer and value diversity at our company. We do not discriminate on the basis "
+    "of race, religion, color, national origin, gender, sexual orientation, age, marital status, veteran status, or "
+    "disability status. Benefits include health insurance, 401(k) matching, unlimited PTO and a learning stipend."
+)
+
+
+def make_bullet(rng):
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}, {rng.choice(RESULTS).format(n=rng.randint(5, 60))}"
+
+
+def make_resume_lines(n_bullets, seed=0):
+    """Plain resume as a list of lines: header, summary, experience bullets, skills."""
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", "SUMMARY", f"{rng.randint(1, 15)} years building products with {', '.join(rng.sample(SKILLS, 3))}.", "EXPERIENCE"]
+    for i in range(n_bullets):
+        if i % 6 == 0:
+            lines.append(f"Company {i // 6 + 1} - Senior Role ({2015 + i // 6}-{2016 + i // 6})")
+        lines.append(f"- {make_bullet(rng)}")
+    lines += ["SKILLS", ", ".join(rng.sample(SKILLS, 6))]
+    return lines
+
+
+def make_jd_text(seed=0, boilerplate=True):
+    rng = random.Random(seed + 10_000)
+    skills = rng.sample(SKILLS, 5)
+    text = (
+        f"We are hiring a {rng.choice(['Product Manager', 'Software Engineer', 'Marketing Analyst'])}. "
+        f"Requirements: {', '.join(skills)}. You will {make_bullet(rng).lower()} and {make_bullet(rng).lower()}."
+    )
+    return f"{text}\n\n{JD_BOILERPLATE}" if boilerplate else text
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+def write_pdf(path, lines, lines_per_page=45):
+    """
+    Writes a minimal text-only PDF (Helvetica, one line per text row). No third-party dependency.
+    """
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for p, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * p, 5 + 2 * p
+        kids.append(page_id)
+        stream = b"BT /F1 10 Tf 50 780 Td 14 TL " + b" ".join(b"(" + _pdf_escape(l) + b") '" for l in page_lines) + b" ET"
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % len(pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref_at = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for obj_id in range(1, size):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_at)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, lines, table_rows=0):
+    """Writes lines as paragraphs; `table_rows` adds a two-column skills table (text python-docx's paragraphs miss)."""
+    doc = docx.Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    if table_rows:
+        table = doc.add_table(rows=table_rows, cols=2)
+        for i, row in enumerate(table.rows):
+            row.cells[0].text = SKILLS[i % len(SKILLS)]
+            row.cells[1].text = f"{i % 10 + 1} years"
+    doc.save(path)
+
+
+def write_txt(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def build_corpus(directory, page_counts=(1, 2, 4, 8), formats=("pdf", "docx", "txt"), lines_per_page=45):
+    """
+    Writes one synthetic resume per (format, page count) into `directory`.
+    Returns {(format, pages): path}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    writers = {"pdf": lambda p, l: write_pdf(p, l, lines_per_page), "docx": write_docx, "txt": write_txt}
+    paths = {}
+    for pages in page_counts:
+        lines = make_resume_lines(max(1, pages * lines_per_page - 8), seed=pages)
+        for fmt in formats:
+            path = os.path.join(directory, f"resume_{pages}p.{fmt}")
+            writers[fmt](path, lines)
+            paths[(fmt, pages)] = path
+    return paths
@@ -0,0 +1,230 @@
+# fake_llm.py
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm import LLMError
+
+BUCKETS = ((95, "Excellent"), (75, "High"), (50, "Average"))
+STREAM_CHUNK_CHARS = 64
+
+
+def _bucket(score, low_label):
+    for threshold, label in BUCKETS:
+        if score >= threshold:
+            return label
+    return low_label
+
+
+def parse_latency(spec):
+    """
+    Latency distribution spec -> sampler(rng) returning seconds:
+      "0" / "fixed:S" / "uniform:LO:HI" / "lognormal:MEDIAN:SIGMA"
+    """
+    parts = str(spec).split(":")
+    kind, args = parts[0], [float(x) for x in parts[1:]]
+    if kind in ("0", "none", "zero"):
+        return lambda rng: 0.0
+    if kind == "fixed":
+        return lambda rng: args[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "lognormal":
+        median, sigma = args
+        return lambda rng: rng.lognormvariate(0.0, sigma) * median
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+def _section(prompt, start, end):
+    match = re.search(re.escape(start) + r"(.*?)" + re.escape(end), prompt, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def fake_feedback(prompt):
+    """
+    Deterministic, schema-valid feedback for `prompt` (same prompt -> same output), shaped like PROMPT's output format.
+    """
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    # Incremental prompts carry only the added lines instead of the whole resume
+    resume = _section(prompt, "- **Resume:**", "- **Job Description:**") or _section(
+        prompt, "- **Added to the Resume:**", "- **Job Description:**"
+    )
+    lines = [l.strip(" •-*\t") for l in resume.splitlines() if len(l.split()) >= 4]
+    while len(lines) < 4:
+        lines.append(f"Contributed to team deliverables ({len(lines) + 1})")
+    picks = rng.sample(lines, 4)
+
+    resume_score = rng.randint(40, 98)
+    match_score = rng.randint(30, 98)
+    return {
+        "resume_score": {"score": resume_score, "bucket": _bucket(resume_score, "Needs Improvement")},
+        "match_score": {"score": match_score, "bucket": _bucket(match_score, "Low")},
+        "strengths": [f"Relevant experience: {line[:80]}" for line in picks[:3]],
+        "improvement_areas": [
+            {"area": "Quantified impact", "suggestion": "Add metrics (%, $, time saved) to your top bullets."},
+            {"area": "JD keywords", "suggestion": "Mirror the job description's key tools and skills verbatim."},
+            {"area": "Summary", "suggestion": "Open with a two-line summary targeted at this role."},
+        ],
+        "rewritten_bullets": [
+            {"original": line[:160], "rewritten": f"{' '.join(line.split()[:12])}, improving outcomes by {rng.randint(10, 60)}%"}
+            for line in picks
+        ],
+    }
+
+
+def _malform(text, rng):
+    """One of the ways real model output goes wrong."""
+    kind = rng.choice(("fence", "prose", "trailing_comma", "truncated", "single_quotes"))
+    if kind == "fence":
+        return f"```json\n{text}\n```"
+    if kind == "prose":
+        return f"Sure! Here is the analysis you asked for:\n{text}\nLet me know if you need anything else."
+    if kind == "trailing_comma":
+        return text.replace("}\n  ]", "},\n  ]", 1).replace("\n}", ",\n}", 1)
+    if kind == "truncated":
+        return text[: rng.randint(len(text) // 3, len(text) - 1)]
+    return text.replace('"', "'")
+
+
+class FakeBackend:
+    """
+    In-process stand-in for the LLM backend with configurable latency, error and malformed-output rates.
+    Output content is deterministic per prompt; latency/errors come from a seeded RNG.
+    With a `response_schema` it returns only the schema's fields, and malformed output is limited to truncation.
+    """
+
+    supports_response_schema = True
+
+    def __init__(self, latency="0", error_rate=0.0, malformed_rate=0.0, seed=0, model_name="fake", ttfb_fraction=0.1):
+        self.model_name = model_name
+        self.ttfb_fraction = ttfb_fraction  # streaming: share of the latency spent before the first chunk
+        self.latency_spec = latency
+        self._sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=os.environ.get("CAREER_BUDDY_FAKE_LATENCY", "0"),
+            error_rate=float(os.environ.get("CAREER_BUDDY_FAKE_ERROR_RATE", "0")),
+            malformed_rate=float(os.environ.get("CAREER_BUDDY_FAKE_MALFORMED_RATE", "0")),
+            seed=int(os.environ.get("CAREER_BUDDY_FAKE_SEED", "0")),
+        )
+
+    def _plan(self):
+        # Draw everything random up front under the lock so concurrent callers stay reproducible per call order
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._sample_latency(self._rng))
+            fail = self._rng.random() < self.error_rate
+            malformed = self._rng.random() < self.malformed_rate
+            malform_rng = random.Random(self._rng.random())
+        return delay, fail, malformed, malform_rng
+
+    def _respond(self, prompt, fail, malformed, malform_rng, response_schema):
+        if fail:
+            raise LLMError("503 fake backend unavailable", retryable=True)
+        feedback = fake_feedback(prompt)
+        if response_schema is not None:
+            feedback = {key: feedback[key] for key in response_schema.get("properties", feedback) if key in feedback}
+        text = json.dumps(feedback, indent=2, ensure_ascii=False)
+        if not malformed:
+            return text
+        if response_schema is not None:
+            # Constrained decoding always yields valid JSON, but can still hit the output token limit
+            return text[: malform_rng.randint(len(text) // 3, len(text) - 1)]
+        return _malform(text, malform_rng)
+
+    def generate(self, prompt, response_schema=None):
+        delay, fail, malformed, malform_rng = self._plan()
+        time.sleep(delay)
+        return self._respond(prompt, fail, malformed, malform_rng, response_schema)
+
+    async def generate_async(self, prompt, response_schema=None):
+        delay, fail, malformed, malform_rng = self._plan()
+        await asyncio.sleep(delay)
+        return self._respond(prompt, fail, malformed, malform_rng, response_schema)
+
+    async def generate_stream_async(self, prompt, response_schema=None):
+        delay, fail, malformed, malform_rng = self._plan()
+        ttfb = delay * self.ttfb_fraction
+        await asyncio.sleep(ttfb)
+        text = self._respond(prompt, fail, malformed, malform_rng, response_schema)
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        gap = (delay - ttfb) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(gap)
+            yield chunk
+
+
+# === LOCAL HTTP SERVER ===
+def serve(backend, host="127.0.0.1", port=8765):
+    """
+    Serves `backend` over HTTP for llm.HTTPBackend: POST /generate {"prompt", "response_schema"?} -> {"text"};
+    errors map to 503.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/generate":
+                self.send_error(404)
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                text = backend.generate(payload["prompt"], response_schema=payload.get("response_schema"))
+                body, status = {"text": text}, 200
+            except LLMError as e:
+                body, status = {"error": str(e)}, 503
+            except (KeyError, ValueError) as e:
+                body, status = {"error": f"bad request: {e}"}, 400
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # keep load tests quiet
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake LLM server for offline load tests and CI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:2.0:0.5", help='"fixed:S", "uniform:LO:HI" or "lognormal:MEDIAN:SIGMA"')
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backend = FakeBackend(args.latency, args.error_rate, args.malformed_rate, args.seed)
+    server = serve(backend, args.host, args.port)
+    print(f"Fake LLM listening on http://{args.host}:{args.port} (latency={args.latency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# feedback.py
+import json
+
+# Fallback keys the model has been seen to use instead of "original" / "rewritten"
+ORIGINAL_BULLET_KEYS = ("original", "old", "before", "previous", "existing", "old_bullet", "original_pointer")
+REWRITTEN_BULLET_KEYS = ("rewritten", "new", "after", "improved", "suggestion", "new_bullet", "improved_pointer")
+
+
+# === OUTPUT SCHEMA ===
+# JSON schema of PROMPT's output format, for backends that support constrained (schema-guided) output
+_SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {"score": {"type": "integer"}, "bucket": {"type": "string"}},
+    "required": ["score", "bucket"],
+}
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "resume_score": _SCORE_SCHEMA,
+        "match_score": _SCORE_SCHEMA,
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "improvement_areas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"area": {"type": "string"}, "suggestion": {"type": "string"}},
+                "required": ["area", "suggestion"],
+            },
+        },
+        "rewritten_bullets": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"original": {"type": "string"}, "rewritten": {"type": "string"}},
+                "required": ["original", "rewritten"],
+            },
+        },
+    },
+}
+FEEDBACK_KEYS = tuple(FEEDBACK_SCHEMA["properties"])
+FEEDBACK_SCHEMA["required"] = list(FEEDBACK_KEYS)
+
+
+def feedback_schema(keys=FEEDBACK_KEYS):
+    """FEEDBACK_SCHEMA restricted to the top-level `keys` (split sub-prompts, continuation requests)."""
+    return {
+        "type": "object",
+        "properties": {key: FEEDBACK_SCHEMA["properties"][key] for key in keys},
+        "required": list(keys),
+    }
+
+
+def ensure_list_of_dicts(data, required_keys):
+    """
+    Ensure `data` is a list of dicts containing required_keys. Convert simple "Key: Value" strings when possible.
+    Returns cleaned list of dicts.
+    """
+    if not isinstance(data, list):
+        return []
+
+    cleaned = []
+    for item in data:
+        if isinstance(item, dict) and all(k in item for k in required_keys):
+            cleaned.append(item)
+        elif isinstance(item, dict):
+            # Keep what's there but ensure keys exist (fill blanks)
+            new_item = {k: item.get(k, "") for k in required_keys}
+            cleaned.append(new_item)
+        elif isinstance(item, str):
+            # Try "Key: Value" parsing for two-key expected structures
+            if len(required_keys) == 2 and ":" in item:
+                parts = item.split(":", 1)
+                cleaned.append({required_keys[0]: parts[0].strip(), required_keys[1]: parts[1].strip()})
+            else:
+                # For single key cases, store under first key
+                cleaned.append({required_keys[0]: item})
+        # else ignore non-string/non-dict entries
+    return cleaned
+
+
+def _first_present(item, keys):
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return None
+
+
+def normalize_rewritten_bullets(rewritten_raw):
+    """
+    Normalize rewritten bullets with fallback keys -> list of {"original", "rewritten"} dicts.
+    """
+    normalized_rewritten = []
+    if isinstance(rewritten_raw, list):
+        for item in rewritten_raw:
+            if isinstance(item, dict):
+                original = _first_present(item, ORIGINAL_BULLET_KEYS)
+                rewritten = _first_present(item, REWRITTEN_BULLET_KEYS)
+                if original or rewritten:
+                    normalized_rewritten.append({"original": original or "", "rewritten": rewritten or ""})
+            elif isinstance(item, str) and "→" in item:
+                parts = item.split("→", 1)
+                normalized_rewritten.append({"original": parts[0].strip(), "rewritten": parts[1].strip()})
+    return normalized_rewritten
+
+
+def normalize_section(key, value):
+    """Normalize a single top-level field (used for complete and streamed feedback alike)."""
+    if key == "improvement_areas":
+        return ensure_list_of_dicts(value, ["area", "suggestion"])
+    if key == "rewritten_bullets":
+        return normalize_rewritten_bullets(value)
+    return value
+
+
+def normalize_feedback(feedback):
+    """
+    Normalize expected fields of a parsed feedback dict in place and return it.
+    """
+    feedback.setdefault("strengths", [])
+    for key in ("improvement_areas", "rewritten_bullets"):
+        feedback[key] = normalize_section(key, feedback.get(key, []))
+    return feedback
+
+
+class StreamingFeedbackParser:
+    """
+    Incremental parser for the single JSON object the model streams back.
+    `feed(chunk)` scans only the new characters and returns the top-level members that were
+    completed by this chunk, e.g. {"resume_score": {...}}, already normalized.
+    Anything before the first "{" (fences, prose) is skipped; members that don't parse on
+    their own are left for the final full parse.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.done = False
+        self.sections = {}
+
+    def feed(self, chunk):
+        completed = {}
+        if self.done or not chunk:
+            self._chunks.append(chunk)
+            self._pos += len(chunk)
+            return completed
+        base = self._pos
+        self._chunks.append(chunk)
+        self._pos += len(chunk)
+        for offset, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    if ch != "{":
+                        self._depth = 0  # top level must be an object; keep looking
+                        continue
+                    self._member_start = base + offset + 1
+            elif ch in "}]" and self._depth > 0:
+                if self._depth == 1:
+                    self._complete_member(base + offset, completed)
+                    self.done = True
+                    self._depth = 0
+                    break
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._complete_member(base + offset, completed)
+                self._member_start = base + offset + 1
+        return completed
+
+    def _complete_member(self, end, completed):
+        member = "".join(self._chunks)[self._member_start:end]
+        if not member.strip():
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return
+        for key, value in parsed.items():
+            value = normalize_section(key, value)
+            self.sections[key] = value
+            completed[key] = value
+
+    def text(self):
+        return "".join(self._chunks)
@@ -0,0 +1,146 @@
+# incremental.py
+import json
+import os
+import re
+from collections import Counter
+from cache import content_hash
+from prompts import INCREMENTAL_PROMPT
+
+# === CONFIGURATION ===
+# Re-analyze an edited resume (same JD, domain and years) from its diff instead of from scratch
+INCREMENTAL = os.environ.get("CAREER_BUDDY_INCREMENTAL", "1") != "0"
+# Share of the resume's units (bullets / lines) that may change before a full analysis is cheaper
+# and more trustworthy than an update
+MAX_CHANGE_RATIO = float(os.environ.get("CAREER_BUDDY_INCREMENTAL_MAX_CHANGE", "0.3"))
+REWRITTEN_BULLETS = 4  # same count PROMPT asks for
+
+
+def analysis_key(jd_text, domain, years_experience):
+    """Identifies what an analysis was for, apart from the resume."""
+    return content_hash(jd_text or "", domain or "", str(years_experience))
+
+
+# === DIFF ===
+def _normalized(text):
+    return " ".join(text.lower().split())
+
+
+def _pick(units, wanted):
+    # `units` whose normalized form is in the Counter `wanted`, in resume order, as often as counted
+    wanted = Counter(wanted)
+    picked = []
+    for section, text in units:
+        key = (section, _normalized(text))
+        if wanted[key] > 0:
+            wanted[key] -= 1
+            picked.append([section, text])
+    return picked
+
+
+def diff_units(old_units, new_units):
+    """
+    Multiset diff of two resume_structure.resume_units() lists (case and spacing ignored, order
+    ignored). Returns {"removed": [units], "added": [units], "unchanged": count}.
+    """
+    old = Counter((section, _normalized(text)) for section, text in old_units)
+    new = Counter((section, _normalized(text)) for section, text in new_units)
+    return {
+        "removed": _pick(old_units, old - new),
+        "added": _pick(new_units, new - old),
+        "unchanged": sum((old & new).values()),
+    }
+
+
+def plan_update(previous_units, units):
+    """The diff to send instead of the whole resume, or None when so much changed that a full analysis is due."""
+    changes = diff_units(previous_units, units)
+    changed = max(len(changes["removed"]), len(changes["added"]))
+    if changed > MAX_CHANGE_RATIO * max(1, len(units)):
+        return None
+    return changes
+
+
+# === PROMPT ===
+def _unit_lines(units):
+    if not units:
+        return "(none)"
+    return "\n  ".join(f"- [{section or 'header'}] {text}" for section, text in units)
+
+
+def build_incremental_prompt(jd_text, resume_text, previous_feedback, changes, domain, years_experience):
+    scores = {key: previous_feedback.get(key) for key in ("resume_score", "match_score")}
+    # Only the rewrite slots not taken by carried-forward rewrites are asked for
+    max_rewrites = max(0, REWRITTEN_BULLETS - len(carried_rewrites(previous_feedback, resume_text)))
+    return (
+        INCREMENTAL_PROMPT.replace("<PREVIOUS_SCORES>", json.dumps(scores, ensure_ascii=False))
+        .replace("<PREVIOUS_IMPROVEMENTS>", json.dumps(previous_feedback.get("improvement_areas", []), ensure_ascii=False))
+        .replace("<REMOVED>", _unit_lines(changes["removed"]))
+        .replace("<ADDED>", _unit_lines(changes["added"]))
+        .replace("<MAX_REWRITES>", str(max_rewrites))
+        .replace("<JD_TEXT>", jd_text)
+        .replace("<DOMAIN>", domain or "General")
+        .replace("<YEARS_OF_EXPERIENCE>", str(years_experience))
+    )
+
+
+# === MERGE ===
+_UNIT_TAG = re.compile(r"^\[[\w ]+\]\s*")  # "[experience] " as the changes are listed in the prompt
+_WORD = re.compile(r"[a-z0-9]+")
+# A strength quoting this many words that left the resume with the removed units (or one such
+# number: metrics are what strengths usually cite) is about those units
+STALE_STRENGTH_WORDS = 2
+
+
+def _words(text):
+    # Numbers and words of 3+ letters; shorter ones say nothing about which bullet a strength cites
+    return {word for word in _WORD.findall(text.lower()) if len(word) >= 3 or word.isdigit()}
+
+
+def carried_strengths(previous_feedback, removed, resume_text):
+    """Previous strengths, minus those citing text that only the `removed` units had."""
+    remaining = _words(resume_text)
+    gone = set()
+    for _, text in removed:
+        gone |= _words(text) - remaining
+    strengths = previous_feedback.get("strengths", [])
+    if not gone:
+        return list(strengths)
+    carried = []
+    for strength in strengths:
+        cited = _words(str(strength)) & gone
+        if len(cited) < STALE_STRENGTH_WORDS and not any(word.isdigit() for word in cited):
+            carried.append(strength)
+    return carried
+
+
+def carried_rewrites(previous_feedback, resume_text):
+    """Previous rewrites whose original bullet is still in the resume (the user has not acted on them yet)."""
+    resume = _normalized(resume_text)
+    return [
+        bullet for bullet in previous_feedback.get("rewritten_bullets", [])
+        if bullet.get("original") and _normalized(bullet["original"]) in resume
+    ]
+
+
+def merge_section(key, value, previous_feedback, resume_text):
+    """The feedback value of `key` once the update's `value` is applied."""
+    if key == "rewritten_bullets":
+        # Untouched rewrites stay, then rewrites of the added bullets fill the freed slots
+        added = [dict(bullet, original=_UNIT_TAG.sub("", bullet["original"])) for bullet in value]
+        return (carried_rewrites(previous_feedback, resume_text) + added)[:REWRITTEN_BULLETS]
+    return value
+
+
+def merge_feedback(previous_feedback, update, resume_text, removed=()):
+    """
+    Previous feedback with the incremental `update` (normalized, possibly partial) applied:
+    scores and improvement areas are replaced, strengths carried forward (except those about the
+    `removed` units, see carried_strengths), and rewrites merged.
+    """
+    merged = dict(previous_feedback)
+    merged["strengths"] = carried_strengths(previous_feedback, removed, resume_text)
+    for key, value in update.items():
+        merged[key] = merge_section(key, value, previous_feedback, resume_text)
+    if "rewritten_bullets" not in update:
+        merged["rewritten_bullets"] = carried_rewrites(previous_feedback, resume_text)
+    return merged
@@ -0,0 +1,152 @@
+# json_repair.py
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _closes_single_quote(text, i):
+    # In a single-quoted string, an apostrophe ("user's") only ends the string when followed by a delimiter
+    rest = text[i + 1:].lstrip(" \t\r\n")
+    return not rest or rest[0] in ",:}]"
+
+
+def _scan(text, start):
+    """
+    Single pass over `text` from the "{" at `start`, rewriting it into strict JSON:
+    single-quoted strings, raw newlines in strings, Python literals and trailing commas are fixed,
+    and anything after the closing brace is dropped.
+    Returns (json_text, repairs, safe_prefix, safe_depth): `safe_prefix` closes the output after
+    the last complete value (nested `safe_depth` containers deep), for truncated text.
+    """
+    out = []
+    stack = []
+    repairs = set()
+    safe = None  # (len(out), open containers) after the last complete value
+    quote = None
+    escape = False
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+                if ch == "'":
+                    out.pop()  # \' is not a JSON escape
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == quote and (quote == '"' or _closes_single_quote(text, i)):
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')  # inside a single-quoted string
+            elif ch == "\n":
+                repairs.add("newline_in_string")
+                out.append("\\n")
+            else:
+                out.append(ch)
+        elif ch in "\"'":
+            if ch == "'":
+                repairs.add("single_quotes")
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                repairs.add("trailing_comma")
+                out.pop()
+            out.append(stack.pop() if stack else ch)
+            if not stack:
+                if text[i + 1:].strip():
+                    repairs.add("trailing_text")
+                return "".join(out), repairs, None, 0
+            safe = (len(out), tuple(stack))
+        elif ch == ",":
+            safe = (len(out), tuple(stack))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            if word in _PY_LITERALS:
+                repairs.add("python_literals")
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # Ran out of text with containers still open: the output was truncated
+    repairs.add("truncated")
+    if escape:
+        out.pop()
+    if quote:
+        out.append('"')
+    text_out = "".join(out).rstrip().rstrip(",").rstrip()
+    closed = text_out + "".join(reversed(stack))
+    safe_prefix, safe_depth = None, 0
+    if safe is not None:
+        length, open_stack = safe
+        safe_prefix, safe_depth = "".join(out[:length]) + "".join(reversed(open_stack)), len(open_stack)
+    return closed, repairs, safe_prefix, safe_depth
+
+
+def loads_tolerant(raw_text):
+    """
+    Best-effort parse of an LLM's JSON object. Handles markdown fences, prose around the object,
+    trailing commas, single quotes, Python literals and truncated output. For truncated output only
+    the top-level fields that arrived complete are returned, so callers can re-request the rest.
+    Returns (dict_or_None, sorted list of repairs applied).
+    """
+    text = raw_text.strip()
+    try:
+        value = json.loads(text)
+        return (value if isinstance(value, dict) else None), []
+    except json.JSONDecodeError:
+        pass
+
+    repairs = set()
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        repairs.add("fence")
+        text = fenced.group(1).strip()
+        try:
+            value = json.loads(text)  # the common case: a clean object inside the fence
+            if isinstance(value, dict):
+                return value, sorted(repairs)
+        except json.JSONDecodeError:
+            pass
+    start = text.find("{")
+    if start < 0:
+        return None, sorted(repairs)
+    if text[:start].strip():
+        repairs.add("leading_text")
+
+    candidate, scan_repairs, safe_prefix, safe_depth = _scan(text, start)
+    repairs |= scan_repairs
+    truncated = "truncated" in repairs
+    # Truncated: prefer cutting back to the last complete value over closing half a sentence
+    attempts = ((safe_prefix, safe_depth > 1), (candidate, True)) if truncated else ((candidate, False),)
+    for attempt, last_field_partial in attempts:
+        if attempt is None:
+            continue
+        try:
+            value = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(value, dict):
+            continue
+        if last_field_partial and value:
+            value.pop(next(reversed(value)))
+        return value, sorted(repairs)
+    return None, sorted(repairs)
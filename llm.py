@@ -0,0 +1,237 @@
+# llm.py
+import asyncio
+import json
+import os
+import socket
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import metrics
+
+# === CONFIGURATION ===
+LLM_BACKEND = os.environ.get("CAREER_BUDDY_LLM_BACKEND", "gemini")  # gemini | fake | http
+LLM_URL = os.environ.get("CAREER_BUDDY_LLM_URL", "http://127.0.0.1:8765")  # for the http backend
+MODEL_NAME = "gemini-2.5-pro"
+# Model tiers for split analysis (see pipeline.SPLIT_TIERS); "pro" is the default everywhere else
+MODEL_TIERS = {
+    "fast": os.environ.get("CAREER_BUDDY_FAST_MODEL", "gemini-2.5-flash"),
+    "pro": MODEL_NAME,
+}
+DEFAULT_TIER = "pro"
+# Where a tier's calls go while its circuit breaker is open (see scheduler.py)
+FALLBACK_TIERS = {"pro": os.environ.get("CAREER_BUDDY_FALLBACK_TIER", "fast")}
+GENERATION_CONFIG = {"temperature": 0.2}
+HTTP_TIMEOUT_SECONDS = 120  # per attempt, for every backend; scheduler.DEADLINE_SECONDS bounds the whole call
+# Wrap clients in scheduler.ScheduledBackend (deadline, hedging, retries, circuit breaker)
+SCHEDULER = os.environ.get("CAREER_BUDDY_SCHEDULER", "1") != "0"
+
+
+class LLMError(Exception):
+    """Backend call failed. `retryable` marks transient failures (rate limits, 5xx, timeouts)."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _response_text(response):
+    # Access text safely
+    raw_text = getattr(response, "text", None)
+    if raw_text is None:
+        raw_text = str(response)
+    return raw_text
+
+
+def _record_usage(response, model_name):
+    # Gemini 2.5 caches repeated prompt prefixes implicitly (prompts.py puts the resume first);
+    # cached tokens are billed at a discount and show how often a session's prefix was reused
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    metrics.observe_size("model_prompt_tokens", getattr(usage, "prompt_token_count", 0) or 0, model=model_name)
+    metrics.observe_size("model_cached_tokens", getattr(usage, "cached_content_token_count", 0) or 0, model=model_name)
+
+
+def _chunk_text(chunk):
+    # Streamed chunks without text parts (e.g. the final usage-only chunk) raise on .text
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+class GeminiBackend:
+    """
+    google-generativeai client. The GenerativeModel is built once and reused for every request.
+    """
+
+    supports_response_schema = True
+
+    def __init__(self, model_name=MODEL_NAME, generation_config=GENERATION_CONFIG):
+        import google.generativeai as genai  # ~1s to import; only paid when a Gemini client is built
+        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+        self._genai = genai
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self._model = genai.GenerativeModel(model_name)
+        self._request_options = {"timeout": HTTP_TIMEOUT_SECONDS}
+
+    def _config(self, response_schema):
+        if response_schema is None:
+            return self.generation_config
+        # Constrained decoding: the model can only emit JSON matching the schema
+        return {**self.generation_config, "response_mime_type": "application/json", "response_schema": response_schema}
+
+    def warm_up(self):
+        # Model metadata lookup: authenticates and opens the transport without generating anything
+        self._genai.get_model(f"models/{self.model_name}")
+
+    def generate(self, prompt, response_schema=None):
+        response = self._model.generate_content(
+            prompt, generation_config=self._config(response_schema), request_options=self._request_options
+        )
+        _record_usage(response, self.model_name)
+        return _response_text(response)
+
+    async def generate_async(self, prompt, response_schema=None):
+        response = await self._model.generate_content_async(
+            prompt, generation_config=self._config(response_schema), request_options=self._request_options
+        )
+        _record_usage(response, self.model_name)
+        return _response_text(response)
+
+    async def generate_stream_async(self, prompt, response_schema=None):
+        response = await self._model.generate_content_async(
+            prompt, generation_config=self._config(response_schema), stream=True, request_options=self._request_options
+        )
+        last_chunk = None
+        async for chunk in response:
+            last_chunk = chunk
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+        _record_usage(last_chunk, self.model_name)  # usage totals come with the final chunk
+
+
+class HTTPBackend:
+    """
+    Minimal JSON-over-HTTP backend: POST {"prompt": ..., "response_schema": ...} to <url>/generate,
+    expects {"text": ...}. Talks to `fake_llm.serve` (or anything speaking the same protocol).
+    """
+
+    supports_response_schema = True
+
+    def __init__(self, url=LLM_URL, model_name="http", timeout=HTTP_TIMEOUT_SECONDS):
+        self.url = url.rstrip("/") + "/generate"
+        self.model_name = model_name
+        self.timeout = timeout
+
+    def warm_up(self):
+        # Resolves the host and checks the server accepts connections
+        url = urllib.parse.urlsplit(self.url)
+        socket.create_connection((url.hostname, url.port or 80), timeout=self.timeout).close()
+
+    def generate(self, prompt, response_schema=None):
+        payload = {"prompt": prompt}
+        if response_schema is not None:
+            payload["response_schema"] = response_schema
+        body = json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))["text"]
+        except urllib.error.HTTPError as e:
+            raise LLMError(f"HTTP {e.code} from LLM backend", retryable=e.code == 429 or e.code >= 500) from e
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise LLMError(f"LLM backend unreachable: {e}", retryable=True) from e
+
+    async def generate_async(self, prompt, response_schema=None):
+        return await asyncio.to_thread(self.generate, prompt, response_schema)
+
+    async def generate_stream_async(self, prompt, response_schema=None):
+        # The protocol is not streaming; the whole response is one chunk
+        yield await self.generate_async(prompt, response_schema)
+
+
+def _tier_suffix(tier):
+    return "" if tier == DEFAULT_TIER else f"-{tier}"
+
+
+def _make_gemini(tier):
+    return GeminiBackend(MODEL_TIERS[tier])
+
+
+def _make_http(tier):
+    return HTTPBackend(model_name="http" + _tier_suffix(tier))
+
+
+def _make_fake(tier):
+    from fake_llm import FakeBackend  # only needed offline
+    backend = FakeBackend.from_env()
+    backend.model_name += _tier_suffix(tier)
+    return backend
+
+
+# A backend provides: model_name, generate(prompt) -> str, async generate_async(prompt) -> str
+# and async generate_stream_async(prompt) -> async iterator of text chunks. Backends with
+# `supports_response_schema = True` also take a `response_schema=` JSON schema for constrained output.
+# An optional warm_up() opens the connection ahead of the first request (see pipeline.warm_up).
+# Factories take the model tier (a key of MODEL_TIERS).
+BACKENDS = {
+    "gemini": _make_gemini,
+    "http": _make_http,
+    "fake": _make_fake,
+}
+
+_clients = {}
+_scheduled = {}
+_clients_lock = threading.RLock()
+
+
+def _client(name, tier):
+    client = _clients.get((name, tier))
+    if client is None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {name!r} (expected one of {sorted(BACKENDS)})")
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier: {tier!r} (expected one of {sorted(MODEL_TIERS)})")
+        client = BACKENDS[name](tier)
+        _clients[(name, tier)] = client
+    return client
+
+
+def get_backend(name=None, tier=DEFAULT_TIER):
+    """
+    Returns the long-lived client for backend `name` (default: CAREER_BUDDY_LLM_BACKEND) and model `tier`,
+    creating it on first use. Unless CAREER_BUDDY_SCHEDULER=0 it is wrapped in a
+    scheduler.ScheduledBackend that falls back to the FALLBACK_TIERS tier of the same backend.
+    """
+    name = name or LLM_BACKEND
+    with _clients_lock:
+        client = _client(name, tier)
+        if not SCHEDULER:
+            return client
+        scheduled = _scheduled.get((name, tier))
+        if scheduled is None:
+            from scheduler import ScheduledBackend  # scheduler imports LLMError from here
+            fallback_tier = FALLBACK_TIERS.get(tier)
+            fallback = _client(name, fallback_tier) if fallback_tier in MODEL_TIERS and fallback_tier != tier else None
+            if fallback is client:
+                fallback = None  # one client registered for every tier (set_backend)
+            scheduled = ScheduledBackend(client, fallback)
+            _scheduled[(name, tier)] = scheduled
+        return scheduled
+
+
+def set_backend(name, client, tier=None):
+    """
+    Registers an already-built client under `name` for `tier`, or for every tier by default
+    (benchmarks, load tests: fallback and repair calls must not reach a real model either).
+    """
+    with _clients_lock:
+        for key in [(name, tier)] if tier else [(name, tier) for tier in MODEL_TIERS]:
+            _clients[key] = client
+        # Rebuild the scheduler around it (and around it as a fallback) on next use
+        for key in [key for key in _scheduled if key[0] == name]:
+            del _scheduled[key]
@@ -0,0 +1,495 @@
+# loadtest.py
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import corpus
+from admission import OVERLOADED_PREFIX
+from metrics import percentile
+from parser_pool import rss_bytes
+from pipeline import MAX_FILE_SIZE_MB, MAX_PAGES, MAX_WORDS, is_retryable_error
+
+# === CONFIGURATION ===
+DEFAULT_LATENCY = "lognormal:2.0:0.5"  # fake model: ~2s median with a long tail, like the real one
+DEFAULT_RATE = 2.0  # arrivals per second
+DEFAULT_DURATION = 60.0
+SAMPLE_INTERVAL_SECONDS = 1.0
+DRAIN_TIMEOUT_SECONDS = 300.0  # after the last arrival, how long to wait for requests still in flight
+MAX_IN_FLIGHT = 1024  # load generator side; arrivals beyond this are counted as "dropped"
+READY_TIMEOUT_SECONDS = 120.0
+GRADIO_API_NAME = "/get_coaching_feedback_stream"
+RATE_LIMITED_PREFIX = "⚠️ Too many requests"
+
+# Traffic shapes. "repeat" / "oversized" are the shares of arrivals that resubmit the same
+# resume + JD, or upload a file the app must reject; the rest are unique submissions.
+SCENARIOS = {
+    "steady": {"arrivals": "poisson", "repeat": 0.0, "oversized": 0.0},
+    "burst": {"arrivals": "burst", "repeat": 0.0, "oversized": 0.0},
+    "repeat": {"arrivals": "poisson", "repeat": 1.0, "oversized": 0.0},
+    "oversized": {"arrivals": "poisson", "repeat": 0.0, "oversized": 0.3},
+    "mixed": {"arrivals": "burst", "repeat": 0.1, "oversized": 0.05},
+}
+OUTCOMES = ("ok", "shed", "queue_full", "rate_limited", "rejected_input", "error", "dropped")
+
+
+# === WORKLOAD ===
+def build_files(directory):
+    """
+    The synthetic corpus (PDF / DOCX / TXT resumes of 1-8 pages) plus files the app must reject:
+    over MAX_FILE_SIZE_MB, over MAX_PAGES, and over MAX_WORDS. Returns (resumes, oversized) path lists.
+    """
+    resumes = sorted(corpus.build_corpus(os.path.join(directory, "resumes")).values())
+    oversized = []
+    path = os.path.join(directory, "too_large.txt")
+    line = corpus.make_bullet(random.Random(0)) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(line * (MAX_FILE_SIZE_MB * 1024 * 1024 // len(line) + 1))
+    oversized.append(path)
+    path = os.path.join(directory, "too_many_pages.pdf")
+    corpus.write_pdf(path, corpus.make_resume_lines((MAX_PAGES + 2) * 45, seed=99))
+    oversized.append(path)
+    path = os.path.join(directory, "too_many_words.docx")
+    corpus.write_docx(path, corpus.make_resume_lines(MAX_WORDS // 8, seed=98))
+    oversized.append(path)
+    return resumes, oversized
+
+
+def arrival_times(scenario, rate, duration, rng, burst_every=10.0, burst_size=20):
+    """
+    Open-loop arrival offsets (seconds from the start): a Poisson process at `rate`, plus for
+    "burst" scenarios `burst_size` simultaneous arrivals every `burst_every` seconds.
+    """
+    times = []
+    t = rng.expovariate(rate) if rate > 0 else duration
+    while t < duration:
+        times.append(t)
+        t += rng.expovariate(rate)
+    if SCENARIOS[scenario]["arrivals"] == "burst":
+        t = burst_every / 2
+        while t < duration:
+            times += [t] * burst_size
+            t += burst_every
+    return sorted(times)
+
+
+def make_requests(scenario, times, resumes, oversized, rng, domain="Software Engineering"):
+    """One submission per arrival: {"at", "kind", "jd_text", "resume", "domain", "years"}."""
+    shares = SCENARIOS[scenario]
+    requests = []
+    for i, at in enumerate(times):
+        roll = rng.random()
+        if roll < shares["repeat"]:
+            kind, resume, jd_seed = "repeat", resumes[0], 0
+        elif roll < shares["repeat"] + shares["oversized"]:
+            kind, resume, jd_seed = "oversized", rng.choice(oversized), i + 1
+        else:
+            # A JD of its own per request, so no two unique submissions share a cached response
+            kind, resume, jd_seed = "unique", rng.choice(resumes), i + 1
+        requests.append({
+            "at": at, "kind": kind, "jd_text": corpus.make_jd_text(jd_seed), "resume": resume,
+            "domain": domain, "years": rng.randint(0, 15),
+        })
+    return requests
+
+
+def classify(message):
+    """Outcome of a request that produced no feedback, from its UI / API error message."""
+    if not message:
+        return "error"
+    if message.startswith(OVERLOADED_PREFIX):
+        return "shed"
+    if message.startswith(RATE_LIMITED_PREFIX):
+        return "rate_limited"
+    # Model failures and bad model output are worth a retry; the rest is the input (file too large...)
+    return "error" if is_retryable_error(message) else "rejected_input"
+
+
+# === TARGETS ===
+class QueueModel:
+    """
+    Stand-in for demo.queue() when calling the handler in process: at most `concurrency` handlers
+    run at once and at most `max_size` requests wait; joining a full queue is rejected, as Gradio does.
+    """
+
+    def __init__(self, concurrency, max_size):
+        self._slots = asyncio.Semaphore(concurrency)
+        self.max_size = max_size
+        self.waiting = 0
+
+    async def run(self, fn):
+        if self.max_size is not None and self.waiting >= self.max_size and self._slots.locked():
+            return "queue_full", None
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            return await fn()
+        finally:
+            self._slots.release()
+
+
+class HandlerTarget:
+    """app.get_coaching_feedback_stream called in this process, against the fake model."""
+
+    name = "handler"
+
+    def __init__(self, latency, concurrency=None, queue_size=None):
+        import app  # Gradio import, only needed for this target
+        import llm
+        from fake_llm import FakeBackend
+
+        llm.set_backend(llm.LLM_BACKEND, FakeBackend(latency=latency))
+        self._app = app
+        self.queue = QueueModel(concurrency or app.CONCURRENCY_LIMIT, app.QUEUE_MAX_SIZE if queue_size is None else queue_size)
+
+    async def start(self):
+        if self._app.WARMUP:
+            await asyncio.to_thread(self._app.warm_up)
+
+    async def send(self, request):
+        async def handle():
+            outputs = None
+            async for outputs in self._app.get_coaching_feedback_stream(
+                request["jd_text"], None, request["resume"], request["domain"], request["years"], time.time()
+            ):
+                pass
+            if outputs is None:
+                return "error", "no output"
+            return ("ok", None) if outputs[1] else (classify(outputs[0]), outputs[0])
+
+        return await self.queue.run(handle)
+
+    def pids(self):
+        return {"loadgen+app": os.getpid()}
+
+    def close(self):
+        pass
+
+
+class GradioTarget:
+    """The running Gradio app, through gradio_client (files are uploaded like a browser's)."""
+
+    name = "gradio"
+
+    def __init__(self, url, max_in_flight=MAX_IN_FLIGHT):
+        from gradio_client import Client  # only needed for this target
+
+        self._client = Client(url, max_workers=max_in_flight, verbose=False)
+        self._executor = ThreadPoolExecutor(max_in_flight)  # blocking client calls, one thread each
+
+    async def start(self):
+        pass
+
+    def _predict(self, request):
+        from gradio_client import handle_file
+
+        try:
+            outputs = self._client.predict(
+                request["jd_text"], None, handle_file(request["resume"]), request["domain"], request["years"],
+                api_name=GRADIO_API_NAME,
+            )
+        except Exception as e:
+            if "queue is full" in str(e).lower():
+                return "queue_full", None
+            return "error", f"{type(e).__name__}: {e}"
+        return ("ok", None) if outputs[1] else (classify(outputs[0]), outputs[0])
+
+    async def send(self, request):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._predict, request)
+
+    def pids(self):
+        return {}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ApiTarget:
+    """The JSON API (api.py): POST /v1/analyze with the resume as a multipart upload."""
+
+    name = "api"
+    STATUS_OUTCOMES = {200: "ok", 400: "rejected_input", 429: "rate_limited", 503: "shed"}
+
+    def __init__(self, url, users=1):
+        import httpx  # installed with Gradio; only needed for this target
+
+        self._url = url.rstrip("/") + "/v1/analyze"
+        self._users = users
+        self._client = httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=None))
+        self._sent = 0
+
+    async def start(self):
+        pass
+
+    async def send(self, request):
+        # Spread requests over `users` API keys, so per-client rate limits see several clients
+        self._sent += 1
+        headers = {"X-API-Key": f"loadtest-{self._sent % self._users}"}
+        try:
+            with open(request["resume"], "rb") as f:
+                response = await self._client.post(
+                    self._url, headers=headers,
+                    data={"jd_text": request["jd_text"], "domain": request["domain"], "years_experience": str(request["years"])},
+                    files={"resume_file": (os.path.basename(request["resume"]), f.read())},
+                )
+            body = response.json()
+        except Exception as e:
+            return "error", f"{type(e).__name__}: {e}"
+        return self.STATUS_OUTCOMES.get(response.status_code, "error"), body.get("error")
+
+    def pids(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+# === SERVER ===
+def launch_server(target, port, latency, workers=1):
+    """
+    Starts app.py (gradio) or api.py on `port` with the fake model and no per-client rate limit
+    (all load comes from one address). Returns the process once it answers HTTP.
+    """
+    env = dict(os.environ)
+    env.update({"CAREER_BUDDY_LLM_BACKEND": "fake", "CAREER_BUDDY_FAKE_LATENCY": latency})
+    env.setdefault("CAREER_BUDDY_RATE_PER_MINUTE", "0")
+    env.setdefault("CAREER_BUDDY_RATE_PER_IP_PER_MINUTE", "0")
+    env.setdefault("CAREER_BUDDY_API_RATE_PER_MINUTE", "0")
+    repo = os.path.dirname(os.path.abspath(__file__))
+    if target == "gradio":
+        env["GRADIO_SERVER_PORT"] = str(port)
+        command, ready_path = [sys.executable, os.path.join(repo, "app.py")], "/"
+    else:
+        command = [sys.executable, os.path.join(repo, "api.py"), "--port", str(port), "--workers", str(workers)]
+        ready_path = "/healthz"
+    process = subprocess.Popen(command, env=env, cwd=repo, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{target} server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{ready_path}", timeout=2):
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"{target} server not ready after {READY_TIMEOUT_SECONDS:.0f}s")
+
+
+def _children(pid):
+    """Child processes of `pid` (parser workers, uvicorn workers) via /proc; empty where unavailable."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def memory_snapshot(pids):
+    """
+    {label: RSS in MB} for each process in `pids` ({label: pid}) and its descendants (parser
+    workers, uvicorn workers...); a process is counted once, under the first label that reaches it.
+    """
+    snapshot = {}
+    seen = set(pids.values())
+    for label, pid in pids.items():
+        tree, i = [pid], 0
+        while i < len(tree):
+            children = [child for child in _children(tree[i]) if child not in seen]
+            seen.update(children)
+            tree += children
+            i += 1
+        for n, process_id in enumerate(tree):
+            rss = rss_bytes(process_id)
+            if rss is not None:
+                snapshot[label if n == 0 else f"{label}/{process_id}"] = round(rss / (1024 * 1024), 1)
+    return snapshot
+
+
+# === RUN ===
+async def run_load(target, requests, sample_pids, max_in_flight=MAX_IN_FLIGHT, sample_interval=SAMPLE_INTERVAL_SECONDS,
+                   drain_timeout=DRAIN_TIMEOUT_SECONDS):
+    """
+    Replays `requests` open-loop: each is sent at its arrival time whether or not earlier ones have
+    finished, and its latency is measured from that scheduled time (so a slow server cannot hold
+    back the load and hide its own queueing). Returns (results, samples).
+    """
+    results = []
+    samples = []
+    in_flight = set()
+    started = time.perf_counter()
+
+    async def one(request):
+        outcome, detail = await target.send(request)
+        seconds = time.perf_counter() - started - request["at"]
+        results.append({"kind": request["kind"], "outcome": outcome, "seconds": seconds, "detail": detail})
+
+    async def sample():
+        while True:
+            samples.append({
+                "t": round(time.perf_counter() - started, 1),
+                "in_flight": len(in_flight),
+                "completed": len(results),
+                "rss_mb": memory_snapshot(sample_pids),
+            })
+            await asyncio.sleep(sample_interval)
+
+    sampler = asyncio.create_task(sample())
+    for request in requests:
+        delay = started + request["at"] - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            results.append({"kind": request["kind"], "outcome": "dropped", "seconds": 0.0, "detail": None})
+            continue
+        task = asyncio.create_task(one(request))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.wait(set(in_flight), timeout=drain_timeout)
+    for task in in_flight:
+        task.cancel()
+    sampler.cancel()
+    samples.append({
+        "t": round(time.perf_counter() - started, 1), "in_flight": len(in_flight), "completed": len(results),
+        "rss_mb": memory_snapshot(sample_pids),
+    })
+    return results, samples
+
+
+def summarize(results, samples, offered):
+    """Throughput, latency percentiles (successful requests), outcome counts and peak memory."""
+    elapsed = samples[-1]["t"] if samples else 0.0
+    ok = sorted(r["seconds"] for r in results if r["outcome"] == "ok")
+    outcomes = {name: 0 for name in OUTCOMES}
+    by_kind = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+        kind = by_kind.setdefault(r["kind"], {})
+        kind[r["outcome"]] = kind.get(r["outcome"], 0) + 1
+    peak = {}
+    for s in samples:
+        for label, mb in s["rss_mb"].items():
+            peak[label] = max(peak.get(label, 0.0), mb)
+    errors = sorted({r["detail"] for r in results if r["outcome"] == "error" and r["detail"]})
+    return {
+        "requests": len(results),
+        "offered_rps": round(offered, 2),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "outcomes": outcomes,
+        "outcomes_by_kind": by_kind,
+        "latency_seconds": {
+            "p50": round(percentile(ok, 50), 3),
+            "p95": round(percentile(ok, 95), 3),
+            "p99": round(percentile(ok, 99), 3),
+            "max": round(ok[-1], 3) if ok else 0.0,
+        },
+        "peak_rss_mb": peak,
+        "max_in_flight": max((s["in_flight"] for s in samples), default=0),
+        "error_samples": errors[:5],
+    }
+
+
+def _print_summary(summary):
+    latency = summary["latency_seconds"]
+    print(f"\n{summary['requests']} requests offered at {summary['offered_rps']}/s over {summary['elapsed_seconds']}s")
+    print(f"throughput {summary['throughput_rps']} ok/s, peak in flight {summary['max_in_flight']}")
+    print(f"latency p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s  max {latency['max']}s")
+    print("outcomes " + ", ".join(f"{k} {v}" for k, v in summary["outcomes"].items() if v))
+    for kind, counts in summary["outcomes_by_kind"].items():
+        print(f"  {kind:<10} " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+    if summary["peak_rss_mb"]:
+        print("peak RSS " + ", ".join(f"{label} {mb} MB" for label, mb in summary["peak_rss_mb"].items()))
+    for error in summary["error_samples"]:
+        print(f"  error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop load test: replays synthetic traffic against the handler, the Gradio app or the JSON API."
+    )
+    parser.add_argument("--target", choices=("handler", "gradio", "api"), default="handler")
+    parser.add_argument("--url", help="running gradio / api server; without it one is launched with the fake model")
+    parser.add_argument("--port", type=int, default=7861, help="port for a launched server")
+    parser.add_argument("--server-pid", type=int, help="pid of a running server, to sample its memory")
+    parser.add_argument("--api-workers", type=int, default=1, help="worker processes for a launched api server")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="steady")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of arrivals")
+    parser.add_argument("--burst-every", type=float, default=10.0, help="seconds between bursts")
+    parser.add_argument("--burst-size", type=int, default=20, help="simultaneous arrivals per burst")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="fake model latency distribution (see fake_llm.parse_latency)")
+    parser.add_argument("--concurrency", type=int, help="handler target: handlers at once (default app.CONCURRENCY_LIMIT)")
+    parser.add_argument("--queue-size", type=int, help="handler target: waiting requests (default app.QUEUE_MAX_SIZE)")
+    parser.add_argument("--users", type=int, default=1, help="api target: distinct API keys loadtest-0.. to spread requests over "
+                        "(a running server must list them in CAREER_BUDDY_API_KEYS)")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="write the summary, settings and memory timeline as JSON here")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    server = None
+    with tempfile.TemporaryDirectory(prefix="career_buddy_loadtest_") as tmp:
+        resumes, oversized = build_files(tmp)
+        times = arrival_times(args.scenario, args.rate, args.duration, rng, args.burst_every, args.burst_size)
+        requests = make_requests(args.scenario, times, resumes, oversized, rng)
+        print(f"{len(requests)} requests over {args.duration:.0f}s ({args.scenario}, target {args.target})")
+        try:
+            if args.target == "handler":
+                target = HandlerTarget(args.latency, args.concurrency, args.queue_size)
+                sample_pids = target.pids()
+            else:
+                url = args.url
+                sample_pids = {"server": args.server_pid} if args.server_pid else {}
+                if not url:
+                    server = launch_server(args.target, args.port, args.latency, args.api_workers)
+                    url = f"http://127.0.0.1:{args.port}/"
+                    sample_pids = {"server": server.pid}
+                target = GradioTarget(url, args.max_in_flight) if args.target == "gradio" else ApiTarget(url, args.users)
+                sample_pids["loadgen"] = os.getpid()
+
+            async def run():
+                await target.start()
+                return await run_load(target, requests, sample_pids, args.max_in_flight)
+
+            results, samples = asyncio.run(run())
+            target.close()
+        finally:
+            if server is not None:
+                server.send_signal(signal.SIGINT)
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    summary = summarize(results, samples, len(requests) / args.duration if args.duration else 0.0)
+    _print_summary(summary)
+    if args.report:
+        settings = {k: v for k, v in vars(args).items() if k != "report"}
+        report = {
+            "meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "cpus": os.cpu_count(), **settings},
+            "summary": summary,
+            "samples": samples,
+        }
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Wrote {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# metrics.py
+import bisect
+import contextvars
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === CONFIGURATION ===
+METRICS_PORT = os.environ.get("CAREER_BUDDY_METRICS_PORT")  # unset = no endpoint
+METRICS_JSONL = os.environ.get("CAREER_BUDDY_METRICS_JSONL")  # unset = no JSON lines
+PREFIX = "career_buddy_"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SIZE_BUCKETS = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+_request_id = contextvars.ContextVar("career_buddy_request_id", default=None)
+_request_ids = itertools.count(1)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Thread-safe in-process metrics: histograms and counters keyed by (name, labels),
+    plus collectors polled at scrape time for values owned elsewhere (cache stats).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, fn):
+        """`fn()` -> iterable of (name, type, value, labels_dict); type is "gauge" or "counter"."""
+        self._collectors.append(fn)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        samples = {}
+        for fn in self._collectors:
+            try:
+                for name, kind, value, labels in fn():
+                    samples.setdefault((name, kind), []).append((tuple(sorted(labels.items())), value))
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), hist in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += count
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {hist.sum}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {hist.count}")
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        for (name, kind), values in sorted(samples.items()):
+            header(name, kind)
+            for labels, value in values:
+                lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain-dict view, handy for benchmarks and tests."""
+        with self._lock:
+            return {
+                "histograms": {
+                    f"{name}{_labels(labels)}": {"count": h.count, "sum": h.sum}
+                    for (name, labels), h in self._histograms.items()
+                },
+                "counters": {f"{name}{_labels(labels)}": v for (name, labels), v in self._counters.items()},
+            }
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+registry.describe("stage_seconds", "Wall-clock time per stage of get_coaching_feedback.")
+registry.describe("model_ttfb_seconds", "Time from sending the prompt to the first byte of model output.")
+registry.describe("queue_wait_seconds", "Time between the click and the handler starting (Gradio queue).")
+registry.describe("prompt_chars", "Prompt size in characters.")
+registry.describe("response_chars", "Model response size in characters.")
+registry.describe("requests_total", "Analyses by outcome.")
+
+
+# === JSON LINES ===
+_jsonl_lock = threading.Lock()
+
+
+def _emit_jsonl(record):
+    if not METRICS_JSONL:
+        return
+    record.setdefault("ts", time.time())
+    record.setdefault("request_id", _request_id.get())
+    line = json.dumps(record, ensure_ascii=False)
+    with _jsonl_lock:
+        try:
+            with open(METRICS_JSONL, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Metrics JSONL write error: {e}")
+
+
+# === PUBLIC HELPERS ===
+def new_request():
+    """Tags everything recorded in the current (async) context with a fresh request id."""
+    request_id = next(_request_ids)
+    _request_id.set(request_id)
+    return request_id
+
+
+@contextmanager
+def span(stage, **labels):
+    """Times a block as career_buddy_stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("stage_seconds", elapsed, stage=stage, **labels)
+        _emit_jsonl({"stage": stage, "seconds": elapsed, **labels})
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    registry.observe(name, value, buckets=buckets, **labels)
+    _emit_jsonl({"metric": name, "value": value, **labels})
+
+
+def observe_size(name, value, **labels):
+    observe(name, value, buckets=SIZE_BUCKETS, **labels)
+
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, amount, **labels)
+    _emit_jsonl({"metric": name, "inc": amount, **labels})
+
+
+def register_cache(name, cache):
+    """Exports a cache's `stats()` (hits/misses/hit_rate) at scrape time."""
+
+    def collect():
+        stats = cache.stats()
+        yield "cache_hits_total", "counter", stats["hits"], {"cache": name}
+        yield "cache_misses_total", "counter", stats["misses"], {"cache": name}
+        yield "cache_hit_ratio", "gauge", stats["hit_rate"], {"cache": name}
+        yield "cache_items", "gauge", stats["memory_items"], {"cache": name}
+
+    registry.register_collector(collect)
+
+
+# === HTTP ENDPOINT ===
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serves GET /metrics (Prometheus text format) on a daemon thread. Returns the server, or None if no port is set.
+    """
+    port = port or METRICS_PORT
+    if not port:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Metrics on http://{host}:{port}/metrics")
+    return server
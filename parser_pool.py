@@ -0,0 +1,254 @@
+# parser_pool.py
+import atexit
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from multiprocessing.connection import Connection, Pipe
+
+from parsers import (
+    detect_file_type, pdf_page_count, docx_page_count, preload,
+    extract_text_from_pdf, extract_text_from_docx, text_cache, text_cache_key,
+)
+
+# === CONFIGURATION ===
+PARSER_WORKERS = int(os.environ.get("CAREER_BUDDY_PARSER_WORKERS", "2"))
+PARSE_TIMEOUT_SECONDS = 20
+PARSE_MEMORY_LIMIT_MB = 512  # RSS of a worker process, checked while a job runs
+MAX_DOCX_UNCOMPRESSED_MB = 50  # zip-bomb guard
+POLL_INTERVAL_SECONDS = 0.05
+HEADER_BYTES = 4096
+
+# Error codes, surfaced to the UI as ERROR__<CODE>__<label>
+PARSE_TIMEOUT = "TIMEOUT"
+PARSE_MEMORY_LIMIT = "MEMORY_LIMIT"
+PARSE_TOO_MANY_PAGES = "TOO_MANY_PAGES"
+PARSE_UNSUPPORTED_TYPE = "UNSUPPORTED_TYPE"
+PARSE_PDF_ERROR = "PDF_PARSE"
+PARSE_DOCX_ERROR = "DOCX_PARSE"
+PARSE_TEXT_ERROR = "TEXT_DECODE"
+PARSE_BUSY = "BUSY"
+PARSE_WORKER_CRASHED = "WORKER_CRASHED"
+
+
+def rss_bytes(pid):
+    """Resident set size of `pid` via /proc (Linux); None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _parse_job(file_path, kind, max_words, max_pages):
+    """
+    Runs inside a worker process. Returns (error_code_or_None, text).
+    """
+    if kind == "pdf":
+        try:
+            pages = pdf_page_count(file_path)
+        except Exception as e:
+            print(f"PDF page count error: {e}")
+            return PARSE_PDF_ERROR, ""
+        if max_pages is not None and pages > max_pages:
+            return PARSE_TOO_MANY_PAGES, ""
+        text = extract_text_from_pdf(file_path, max_words)
+        if text == "PDF_PARSING_ERROR":
+            return PARSE_PDF_ERROR, ""
+        return None, text
+
+    if kind == "docx":
+        try:
+            with zipfile.ZipFile(file_path) as zf:
+                uncompressed = sum(info.file_size for info in zf.infolist())
+            if uncompressed > MAX_DOCX_UNCOMPRESSED_MB * 1024 * 1024:
+                return PARSE_DOCX_ERROR, ""
+            pages = docx_page_count(file_path)
+            if max_pages is not None and pages is not None and pages > max_pages:
+                return PARSE_TOO_MANY_PAGES, ""
+            return None, extract_text_from_docx(file_path, max_words)
+        except Exception as e:
+            print(f"DOCX parsing error: {e}")
+            return PARSE_DOCX_ERROR, ""
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return None, f.read()
+    except UnicodeDecodeError:
+        return PARSE_TEXT_ERROR, ""
+
+
+def _worker_main(fd):
+    """Entry point of a worker process; `fd` is the worker's end of the job pipe."""
+    conn = Connection(fd)
+    preload()  # workers start ahead of traffic, so the first job does not pay for the imports
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+        try:
+            result = _parse_job(*job)
+        except MemoryError:
+            result = (PARSE_MEMORY_LIMIT, "")
+        except Exception as e:
+            print(f"Parser worker error: {type(e).__name__}: {e}")
+            result = (PARSE_WORKER_CRASHED, "")
+        conn.send(result)
+
+
+class _Worker:
+    # A fresh interpreter that imports only this module. multiprocessing's spawn/forkserver would
+    # re-run __main__ (i.e. build the whole Gradio app) in every worker; fork is unsafe once the
+    # server is multi-threaded.
+    def __init__(self):
+        self.conn, child_conn = Pipe()
+        fd = child_conn.fileno()
+        code = (
+            f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+            f"import parser_pool; parser_pool._worker_main({fd})"
+        )
+        try:
+            self.process = subprocess.Popen([sys.executable, "-c", code], pass_fds=(fd,), stdin=subprocess.DEVNULL)
+        except BaseException:
+            self.conn.close()
+            raise
+        finally:
+            child_conn.close()
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        finally:
+            self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.conn.close()
+
+
+class ParserPool:
+    """
+    Pre-started worker processes that run the PDF / DOCX extractors out of the serving threads.
+    Every job has a hard wall-clock timeout and an RSS cap; a worker that breaches either is
+    killed and replaced, so a bad file only ever costs one slot. A slot whose worker could not be
+    started holds None and starts one on its next checkout.
+    """
+
+    def __init__(self, workers=PARSER_WORKERS, timeout=PARSE_TIMEOUT_SECONDS, memory_limit_mb=PARSE_MEMORY_LIMIT_MB):
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        """A new worker, or None if it could not be started (out of processes or file descriptors...)."""
+        try:
+            return _Worker()
+        except Exception as e:
+            print(f"Parser pool: could not start a worker ({type(e).__name__}: {e}); retrying on next use")
+            return None
+
+    def _run(self, worker, job):
+        """Returns (error_code_or_None, text, worker_is_reusable)."""
+        deadline = time.monotonic() + self.timeout
+        try:
+            worker.conn.send(job)
+            while not worker.conn.poll(POLL_INTERVAL_SECONDS):
+                if not worker.is_alive():
+                    return PARSE_WORKER_CRASHED, "", False
+                if time.monotonic() > deadline:
+                    return PARSE_TIMEOUT, "", False
+                if self.memory_limit is not None:
+                    rss = rss_bytes(worker.process.pid)
+                    if rss is not None and rss > self.memory_limit:
+                        return PARSE_MEMORY_LIMIT, "", False
+            code, text = worker.conn.recv()
+        except (EOFError, OSError):
+            return PARSE_WORKER_CRASHED, "", False
+        # Recycle after a MemoryError too, the worker's heap is likely in a bad state
+        return code, text, code not in (PARSE_MEMORY_LIMIT, PARSE_WORKER_CRASHED)
+
+    def parse(self, file_path, max_words=None, max_pages=None):
+        """
+        Detects the file type from magic bytes, serves from the text cache when possible and
+        otherwise parses in a worker. Returns (error_code_or_None, text).
+        """
+        with open(file_path, 'rb') as f:
+            file_bytes = f.read()
+        kind = detect_file_type(file_bytes[:HEADER_BYTES], file_path)
+        if kind == "unknown":
+            return PARSE_UNSUPPORTED_TYPE, ""
+
+        key = text_cache_key(file_bytes, kind, max_words)
+        del file_bytes
+        text = text_cache.get(key)
+        if text is not None:
+            return None, text
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return PARSE_BUSY, ""
+        if worker is None:
+            worker = self._spawn()
+            if worker is None:
+                self._idle.put(None)  # keep the slot for the next checkout to try again
+                return PARSE_WORKER_CRASHED, ""
+
+        reusable = False
+        try:
+            code, text, reusable = self._run(worker, (file_path, kind, max_words, max_pages))
+        finally:
+            if not reusable:
+                worker.kill()
+                worker = None if self._closed else self._spawn()
+            if worker is not None or not self._closed:
+                self._idle.put(worker)
+
+        if code is None:
+            text_cache.set(key, text)
+        else:
+            print(f"Parser pool: {code} for {os.path.basename(file_path)}")
+        return code, text
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parser_pool():
+    """Returns the process-wide ParserPool, starting its workers on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParserPool()
+            atexit.register(_pool.close)
+        return _pool
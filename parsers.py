@@ -1,41 +1,330 @@
 # parsers.py
-import pdfplumber
-import docx
 import os
+import re
+import zipfile
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from cache import LRUCache, DiskCache, TieredCache, content_hash
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts text from a PDF file."""
-    text = ""
+# Bump whenever extraction output changes so stale cached text is never served.
+PARSER_VERSION = "3"
+TEXT_CACHE_MAX_MB = 32
+TEXT_CACHE_DISK_MAX_MB = 256
+TEXT_CACHE_DIR = os.environ.get("CAREER_BUDDY_TEXT_CACHE_DIR")  # unset = memory tier only
+
+text_cache = TieredCache(
+    LRUCache(max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024),
+    DiskCache(TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_DISK_MAX_MB * 1024 * 1024) if TEXT_CACHE_DIR else None,
+)
+
+# Optional process-pool mode for long PDFs (0 = always extract inline)
+PDF_PARALLEL_WORKERS = int(os.environ.get("CAREER_BUDDY_PDF_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = 8
+PDF_PAGES_PER_CHUNK = 4
+
+# "stream": iterparse word/*.xml straight from the zip (falls back to python-docx on malformed XML).
+# "python-docx": body paragraphs via the python-docx object model only.
+DOCX_PARSER = os.environ.get("CAREER_BUDDY_DOCX_PARSER", "stream")
+
+_pdf_pool = None
+
+def _get_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn, not fork: the Gradio server is multi-threaded
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_PARALLEL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+# pdfplumber/pdfminer and python-docx are imported on first use (or by preload()), so importing
+# this module stays cheap for processes that never parse a file themselves.
+def preload():
+    """Imports the PDF/DOCX libraries now instead of on the first parse."""
+    import pdfplumber
+    import docx
+    from pdfminer.pdftypes import resolve1
+
+def iter_pdf_pages(pdf_path, page_numbers=None):
+    """
+    Yields the text of each page in order, releasing the page's cached layout objects as soon
+    as it has been read so memory stays proportional to a single page.
+    `page_numbers` (1-based) restricts parsing to those pages.
+    """
+    import pdfplumber
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+def _extract_pdf_page_range(pdf_path, first_page, last_page):
+    # Top-level so it can be pickled into pool workers
+    return "\n".join(iter_pdf_pages(pdf_path, list(range(first_page, last_page + 1))))
+
+def _iter_pdf_chunks_parallel(pdf_path, page_count):
+    """Yields text of consecutive page ranges extracted in the process pool, in document order."""
+    pool = _get_pdf_pool()
+    futures = [
+        pool.submit(_extract_pdf_page_range, pdf_path, first, min(first + PDF_PAGES_PER_CHUNK - 1, page_count))
+        for first in range(1, page_count + 1, PDF_PAGES_PER_CHUNK)
+    ]
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
+        for future in futures:
+            yield future.result()
+    finally:
+        # Early cutoff (or an error): drop whatever has not started yet
+        for future in futures:
+            future.cancel()
+
+def detect_file_type(header, file_path=None):
+    """
+    Detects the file type from its leading bytes rather than its name: "pdf", "docx", "txt" or "unknown".
+    `file_path` is only needed to tell DOCX apart from other zip files.
+    """
+    if header.startswith(b"%PDF-"):
+        return "pdf"
+    if header.startswith(b"PK\x03\x04"):
+        if file_path is None:
+            return "docx"
+        try:
+            with zipfile.ZipFile(file_path) as zf:
+                return "docx" if "word/document.xml" in zf.namelist() else "unknown"
+        except zipfile.BadZipFile:
+            return "unknown"
+    if b"\x00" in header:
+        return "unknown"
+    try:
+        header.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the header is still text
+        if e.start < len(header) - 3:
+            return "unknown"
+    return "txt"
+
+def pdf_page_count(pdf_path):
+    """Page count from the PDF page tree, without laying out any page."""
+    import pdfplumber
+    from pdfminer.pdftypes import resolve1
+    with pdfplumber.open(pdf_path) as pdf:
+        count = resolve1(pdf.doc.catalog["Pages"]).get("Count")
+        return int(count) if count is not None else len(pdf.pages)
+
+def docx_page_count(docx_path):
+    """Page count recorded by the authoring app in docProps/app.xml, or None if absent."""
+    with zipfile.ZipFile(docx_path) as zf:
+        try:
+            app_xml = zf.read("docProps/app.xml").decode("utf-8", "ignore")
+        except KeyError:
+            return None
+    match = re.search(r"<Pages>(\d+)</Pages>", app_xml)
+    return int(match.group(1)) if match else None
+
+def iter_pdf_text(pdf_path, max_words=None):
+    """
+    Yields PDF text chunk by chunk (a page, or a page range in parallel mode) and stops as soon as
+    more than `max_words` words have been produced, so oversized documents are never fully parsed.
+    """
+    chunks = None
+    if PDF_PARALLEL_WORKERS > 0:
+        page_count = pdf_page_count(pdf_path)
+        if page_count >= PDF_PARALLEL_MIN_PAGES:
+            chunks = _iter_pdf_chunks_parallel(pdf_path, page_count)
+    if chunks is None:
+        chunks = iter_pdf_pages(pdf_path)
+
+    words = 0
+    try:
+        for chunk in chunks:
+            yield chunk
+            words += len(chunk.split())
+            if max_words is not None and words > max_words:
+                return
+    finally:
+        chunks.close()
+
+def extract_text_from_pdf(pdf_path, max_words=None):
+    """
+    Extracts text from a PDF file.
+    With `max_words`, extraction stops once the budget is exceeded; the returned text is then
+    already over the limit so callers' word checks still reject it.
+    """
+    try:
+        return "\n".join(iter_pdf_text(pdf_path, max_words))
     except Exception as e:
         print(f"PDF parsing error: {e}")
         return "PDF_PARSING_ERROR" # Return a special string to indicate failure
 
-def extract_text_from_docx(docx_path):
-    """Extracts text from a DOCX file."""
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_BREAKS = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+_DOCX_PART = re.compile(r"^word/(header|footer)(\d*)\.xml$")
+
+def _docx_parts(zf):
+    """Text-bearing parts in reading order: headers, the body, then footers."""
+    names = zf.namelist()
+    if "word/document.xml" not in names:
+        raise KeyError("word/document.xml")
+    parts = {"header": [], "footer": []}
+    for name in names:
+        match = _DOCX_PART.match(name)
+        if match:
+            parts[match.group(1)].append((int(match.group(2) or 0), name))
+    return [n for _, n in sorted(parts["header"])] + ["word/document.xml"] + [n for _, n in sorted(parts["footer"])]
+
+def _iter_docx_part_lines(stream):
+    """
+    Yields one line per paragraph of a WordprocessingML part, in document order, via incremental
+    iterparse (elements are discarded as soon as they are read). Table rows become one line with
+    cells joined by " | "; text-box paragraphs become lines of their own. Deleted revisions, field
+    codes and the VML fallback copy of text boxes are skipped.
+    """
+    paragraphs = []  # text pieces of each open w:p (text boxes nest paragraphs)
+    cells = []  # (paragraph depth when the cell opened, [paragraph texts]) per open w:tc
+    rows = []  # [cell texts] per open w:tr
+    skip = 0  # depth inside mc:Fallback
+    body = None
+    pending = []
+
+    def emit(line, keep_empty):
+        # A line directly inside a table cell joins that cell; anything else is yielded
+        if cells and len(paragraphs) == cells[-1][0]:
+            if line:
+                cells[-1][1].append(line)
+        elif line or keep_empty:
+            pending.append(line)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == _MC_FALLBACK:
+            skip += 1 if event == "start" else -1
+            continue
+        if skip:
+            if event == "end":
+                elem.clear()
+            continue
+        if event == "start":
+            if tag == _W + "p":
+                paragraphs.append([])
+            elif tag == _W + "tc":
+                cells.append((len(paragraphs), []))
+            elif tag == _W + "tr":
+                rows.append([])
+            elif tag == _W + "body" or tag in (_W + "hdr", _W + "ftr"):
+                body = elem
+            continue
+
+        if tag == _W + "t":
+            if paragraphs:
+                paragraphs[-1].append(elem.text or "")
+        elif tag in _DOCX_BREAKS:
+            if paragraphs:
+                paragraphs[-1].append(_DOCX_BREAKS[tag])
+        elif tag == _W + "p" and paragraphs:
+            emit("".join(paragraphs.pop()).strip(), keep_empty=not paragraphs)
+        elif tag == _W + "tc" and cells:
+            _, texts = cells.pop()
+            if rows:
+                rows[-1].append(" ".join(texts))
+        elif tag == _W + "tr" and rows:
+            emit(" | ".join(cell for cell in rows.pop() if cell), keep_empty=False)
+        if body is not None and len(body) and elem is body[-1]:
+            body.clear()  # top-level block finished: drop it
+        if pending:
+            yield from pending
+            pending.clear()
+
+def iter_docx_text(docx_path, max_words=None):
+    """
+    Yields DOCX text line by line (headers, body including tables and text boxes, footers) and stops
+    as soon as more than `max_words` words have been produced. Header/footer lines repeated across
+    sections are yielded once.
+    """
+    words = 0
+    seen_edges = set()
+    with zipfile.ZipFile(docx_path) as zf:
+        for part in _docx_parts(zf):
+            edge = part != "word/document.xml"
+            with zf.open(part) as stream:
+                for line in _iter_docx_part_lines(stream):
+                    if edge:
+                        if not line or line in seen_edges:
+                            continue
+                        seen_edges.add(line)
+                    yield line
+                    words += len(line.split())
+                    if max_words is not None and words > max_words:
+                        return
+
+def extract_text_from_docx_python_docx(docx_path, max_words=None):
+    """
+    Body paragraphs through python-docx (no tables, headers or text boxes); the fallback extractor.
+    Stops after the paragraph that takes the text over `max_words` words, like iter_docx_text.
+    """
+    import docx
     doc = docx.Document(docx_path)
     full_text = []
+    words = 0
     for para in doc.paragraphs:
         full_text.append(para.text)
+        words += len(para.text.split())
+        if max_words is not None and words > max_words:
+            break
     return '\n'.join(full_text)
 
-def get_text_from_file(file_obj):
+def extract_text_from_docx(docx_path, max_words=None):
+    """
+    Extracts text from a DOCX file with the streaming extractor, falling back to python-docx if the
+    XML is malformed. With `max_words`, extraction stops once the budget is exceeded (as for PDFs).
+    """
+    if DOCX_PARSER == "python-docx":
+        return extract_text_from_docx_python_docx(docx_path, max_words)
+    try:
+        return "\n".join(iter_docx_text(docx_path, max_words))
+    except (ET.ParseError, KeyError) as e:
+        print(f"DOCX streaming parse failed ({type(e).__name__}: {e}); falling back to python-docx")
+        return extract_text_from_docx_python_docx(docx_path, max_words)
+
+def text_cache_key(file_bytes, kind, max_words=None):
+    """
+    Key = hash of parser version + file kind + word budget + file bytes, so renamed/re-uploaded
+    copies of the same file hit.
+    """
+    return content_hash(PARSER_VERSION, kind, str(max_words), file_bytes)
+
+def extract_text_cached(file_path, extractor, kind, max_words=None):
+    """
+    Runs `extractor(file_path, max_words)` behind the content-addressed text cache.
+    Parse failures are never cached.
+    """
+    with open(file_path, 'rb') as f:
+        key = text_cache_key(f.read(), kind, max_words)
+    text = text_cache.get(key)
+    if text is not None:
+        return text
+    text = extractor(file_path, max_words)
+    if text != "PDF_PARSING_ERROR":
+        text_cache.set(key, text)
+    return text
+
+def get_text_from_file(file_obj, max_words=None):
     """
     Determines file type and extracts text accordingly.
-    Handles Gradio's temporary file object.
+    Handles Gradio's temporary file object as well as a plain file path.
+    `max_words` lets PDF extraction stop early on documents that are over the word limit anyway.
     """
     if file_obj is None:
         return ""
-    
-    file_path = file_obj.name
-    if file_path.endswith('.pdf'):
-        return extract_text_from_pdf(file_path)
-    elif file_path.endswith('.docx'):
-        return extract_text_from_docx(file_path)
+
+    file_path = file_obj if isinstance(file_obj, str) else file_obj.name
+    with open(file_path, 'rb') as f:
+        kind = detect_file_type(f.read(8), file_path)
+    if kind == "pdf":
+        return extract_text_cached(file_path, extract_text_from_pdf, "pdf", max_words)
+    elif kind == "docx":
+        return extract_text_cached(file_path, extract_text_from_docx, "docx", max_words)
     else:
         # Fallback for plain text files
         with open(file_path, 'r', encoding='utf-8') as f:
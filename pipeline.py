@@ -0,0 +1,805 @@
+# pipeline.py
+import asyncio
+import json
+import os
+import time
+import metrics
+from admission import OVERLOADED_PREFIX, PRIORITY_INTERACTIVE, Overloaded, in_flight, model_slots
+from incremental import (
+    INCREMENTAL, analysis_key, build_incremental_prompt, carried_strengths, merge_feedback, merge_section, plan_update,
+)
+from llm import DEFAULT_TIER, get_backend
+from parser_pool import get_parser_pool
+from parsers import text_cache
+from prescore import local_feedback, prescore
+from preprocess import prepare_resume, preprocess_inputs
+from cache import content_hash
+from json_repair import loads_tolerant
+from prompts import PROMPT, SPLIT_PROMPTS, CONTINUE_PROMPT, REPAIR_PROMPT, INCREMENTAL_KEYS
+from feedback import FEEDBACK_KEYS, feedback_schema, normalize_feedback, normalize_section, StreamingFeedbackParser
+from resume_structure import COMPACT_TOP_K, compact_resume, resume_units
+from response_cache import PROMPT_HASH, response_cache, response_cache_key
+from scheduler import answered_by
+
+# === CONFIGURATION ===
+# Hard abuse cap only: inputs under it are cleaned and trimmed to the token budgets in
+# preprocess.py (CAREER_BUDDY_JD_TOKENS / CAREER_BUDDY_RESUME_TOKENS) instead of being rejected.
+MAX_WORDS = 5000
+MAX_FILE_SIZE_MB = 5  # MB
+MAX_PAGES = 10  # checked before any page is parsed
+# "single": one call with PROMPT. "split": SPLIT_PROMPTS run concurrently, each on its own model tier.
+# "local": no model call at all; keyword pre-score only (bulk triage).
+ANALYSIS_MODE = os.environ.get("CAREER_BUDDY_ANALYSIS_MODE", "single")
+# sub-task -> model tier, e.g. "scores=fast,improvements=pro,bullets=pro"
+SPLIT_TIERS = dict(
+    item.split("=", 1)
+    for item in os.environ.get("CAREER_BUDDY_SPLIT_TIERS", "scores=fast,improvements=pro,bullets=pro").split(",")
+    if "=" in item
+)
+SPLIT_PROMPT_HASH = content_hash(*(prompt for prompt, _ in SPLIT_PROMPTS.values()))
+# "full": the whole resume goes into the prompt. "compact": a condensed profile plus the
+# COMPACT_TOP_K bullets most relevant to the JD (fewer input tokens, same output schema).
+PROMPT_MODE = os.environ.get("CAREER_BUDDY_PROMPT_MODE", "full")
+# Stream a local keyword pre-score before the model answers
+PRESCORE = os.environ.get("CAREER_BUDDY_PRESCORE", "1") != "0"
+# Ask backends that support it for schema-constrained JSON
+STRUCTURED_OUTPUT = os.environ.get("CAREER_BUDDY_STRUCTURED_OUTPUT", "1") != "0"
+REPAIR_TIER = "fast"  # repair requests only reformat, so they go to the cheaper model
+# Run warm_up() before serving (app.py); "0" leaves every start-up cost to the first request
+WARMUP = os.environ.get("CAREER_BUDDY_WARMUP", "1") != "0"
+MAX_REPAIR_CHARS = 20000
+
+# User-facing errors of a failed model call (as opposed to bad input), see is_retryable_error
+INVALID_OUTPUT_ERROR = "⚠️ AI returned invalid JSON. Retry."
+UNEXPECTED_ERROR_PREFIX = "❌ Unexpected error"
+
+metrics.register_cache("text", text_cache)
+if response_cache:
+    metrics.register_cache("response", response_cache)
+
+
+# === INPUTS ===
+def read_file_safely(file_path, label):
+    """
+    Returns the extracted text, or an "ERROR__<CODE>__<label>" string.
+    """
+    if not file_path:
+        return ""
+    try:
+        with metrics.span("file_size_check", file=label):
+            size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        if size_mb > MAX_FILE_SIZE_MB:
+            metrics.inc("file_errors_total", code="TOO_LARGE", file=label)
+            return f"ERROR__TOO_LARGE__{label}"
+        # Parsed in a sandboxed worker process with its own timeout and memory cap
+        with metrics.span("extract", file=label):
+            error_code, text = get_parser_pool().parse(file_path, max_words=MAX_WORDS, max_pages=MAX_PAGES)
+        if error_code:
+            metrics.inc("file_errors_total", code=error_code, file=label)
+            return f"ERROR__{error_code}__{label}"
+        return text
+    except Exception as e:
+        print(f"Error reading {label}: {e}")
+        return f"ERROR__READ__{label}"
+
+
+def file_error_message(text):
+    """User-facing message for an "ERROR__<CODE>__<label>" result of read_file_safely, else None."""
+    if isinstance(text, str) and text.startswith("ERROR__"):
+        return f"❌ {text.replace('ERROR__','').replace('__',' ')}"
+    return None
+
+
+def load_inputs(jd_text_input, jd_file_input, resume_input_file):
+    """
+    Resolves the JD (pasted text wins over an uploaded file) and the resume.
+    Returns (jd_text, resume_text, error_message_or_None).
+    """
+    jd_text = jd_text_input.strip() if jd_text_input else ""
+    if not jd_text and jd_file_input:
+        jd_text = read_file_safely(jd_file_input, "JD")
+        error = file_error_message(jd_text)
+        if error:
+            return "", "", error
+
+    resume_text = read_file_safely(resume_input_file, "Resume") if resume_input_file else ""
+    error = file_error_message(resume_text)
+    if error:
+        return "", "", error
+    return jd_text, resume_text, None
+
+
+async def load_inputs_async(jd_text_input, jd_file_input, resume_input_file, resume_text_input=None):
+    """
+    Same as `load_inputs`, but the JD file and the resume are parsed concurrently in worker threads.
+    `resume_text_input` is pasted resume text, used when there is no resume file (API clients).
+    """
+    # asyncio.to_thread (not run_in_executor) so metrics' request id follows the work into the thread
+    jd_text = jd_text_input.strip() if jd_text_input else ""
+    jd_job = None
+    if not jd_text and jd_file_input:
+        jd_job = asyncio.to_thread(read_file_safely, jd_file_input, "JD")
+    resume_job = asyncio.to_thread(read_file_safely, resume_input_file, "Resume") if resume_input_file else None
+
+    jd_result, resume_text = await asyncio.gather(
+        jd_job if jd_job is not None else _resolved(jd_text),
+        resume_job if resume_job is not None else _resolved(resume_text_input.strip() if resume_text_input else ""),
+    )
+    # Report the JD error first, matching the sequential path
+    for text in (jd_result, resume_text):
+        error = file_error_message(text)
+        if error:
+            return "", "", error
+    return jd_result, resume_text, None
+
+
+async def _resolved(value):
+    return value
+
+
+def file_key(file_path):
+    """
+    Content hash of an uploaded file (Gradio rewrites the upload on every submit, so path and
+    mtime say nothing). None if it is unreadable or over MAX_FILE_SIZE_MB.
+    """
+    try:
+        if os.path.getsize(file_path) > MAX_FILE_SIZE_MB * 1024 * 1024:
+            return None
+        with open(file_path, "rb") as f:
+            return content_hash(f.read())
+    except (OSError, TypeError):
+        return None
+
+
+def validate_inputs(jd_text, resume_text):
+    """Mandatory validation. `resume_text` may be a preprocess.prepare_resume() result. Returns a user-facing message or None."""
+    if isinstance(resume_text, dict):
+        resume_text = resume_text["text"]
+    if not jd_text or not resume_text:
+        return "⚠️ Please provide both JD and Resume."
+    if len(jd_text.split()) > MAX_WORDS:
+        return f"⚠️ Job Description exceeds {MAX_WORDS} words."
+    if len(resume_text.split()) > MAX_WORDS:
+        return f"⚠️ Resume exceeds {MAX_WORDS} words."
+    return None
+
+
+def _preprocess(jd_text, resume):
+    """
+    Cleanup, JD boilerplate stripping and token budgeting; see preprocess.preprocess_inputs.
+    Returns (jd_text, resume_text, resume_structure_or_None).
+    """
+    with metrics.span("preprocess"):
+        jd_text, resume_text, report = preprocess_inputs(jd_text, resume)
+    for name in ("jd", "resume"):
+        metrics.observe_size("input_tokens", report[f"{name}_tokens"], input=name)
+        if report[f"{name}_trimmed"]:
+            metrics.inc("input_trimmed_total", input=name)
+    if report["boilerplate_chars"]:
+        metrics.observe_size("jd_boilerplate_chars", report["boilerplate_chars"])
+    if report["boilerplate_fallback"]:
+        metrics.inc("jd_boilerplate_fallback_total")
+    return jd_text, resume_text, report["resume_structure"]
+
+
+def prompt_resume_text(jd_text, resume_text, structure=None):
+    """The resume as it goes into prompts under PROMPT_MODE. `structure` is its segmentation, if known."""
+    if PROMPT_MODE != "compact":
+        return resume_text
+    with metrics.span("resume_compact"):
+        return compact_resume(jd_text, resume_text, structure=structure)
+
+
+def _prompt_hash(template_hash):
+    # Compact prompts see different input, so they must not share cache entries with full ones
+    return template_hash if PROMPT_MODE == "full" else content_hash(template_hash, PROMPT_MODE, str(COMPACT_TOP_K))
+
+
+def build_prompt(jd_text, resume_text, domain, years_experience, template=PROMPT):
+    return (
+        template.replace("<JD_TEXT>", jd_text)
+        .replace("<RESUME_TEXT>", resume_text)
+        .replace("<DOMAIN>", domain or "General")
+        .replace("<YEARS_OF_EXPERIENCE>", str(years_experience))
+    )
+
+
+# === MODEL OUTPUT ===
+def parse_model_output(raw_text):
+    """
+    Parses (repairing fences, prose, trailing commas, quotes and truncation locally) and normalizes
+    the model's JSON. Returns (feedback, error_message_or_None).
+    """
+    feedback, _ = loads_tolerant(raw_text)
+    if feedback is None:
+        # Log raw text for debugging
+        print("⚠️ JSON decode failed. Raw model output:")
+        print(raw_text[:10000])  # print up to 10k chars
+        return None, INVALID_OUTPUT_ERROR
+    return normalize_feedback(feedback), None
+
+
+def build_continue_prompt(prompt, parsed, missing_keys):
+    return (
+        prompt
+        + CONTINUE_PROMPT.replace("<PARTIAL_OUTPUT>", json.dumps(parsed, ensure_ascii=False))
+        .replace("<MISSING_KEYS>", ", ".join(missing_keys))
+    )
+
+
+def build_repair_prompt(raw_text, keys):
+    return REPAIR_PROMPT.replace("<SCHEMA>", json.dumps(feedback_schema(keys))).replace(
+        "<RAW_OUTPUT>", raw_text[:MAX_REPAIR_CHARS]
+    )
+
+
+def _schema_kwargs(backend, keys):
+    if STRUCTURED_OUTPUT and getattr(backend, "supports_response_schema", False):
+        return {"response_schema": feedback_schema(keys)}
+    return {}
+
+
+def _parse_output(raw_text, prompt, keys=FEEDBACK_KEYS, **labels):
+    """
+    Local parse with repair. Returns (parsed_or_None, follow_up_or_None), where follow_up is the
+    cheapest model request that completes the output, as (prompt, keys_to_fetch, kind):
+      "continue": some fields are missing (truncated output); re-asks for just those fields
+      "repair": nothing could be parsed; asks for a reformat of the raw output
+    """
+    metrics.observe_size("response_chars", len(raw_text), **labels)
+    with metrics.span("json_parse", **labels):
+        parsed, repairs = loads_tolerant(raw_text)
+    for repair in repairs:
+        metrics.inc("json_repairs_total", kind=repair)
+    if parsed is None:
+        print("⚠️ JSON decode failed. Raw model output:")
+        print(raw_text[:10000])  # print up to 10k chars
+        return None, (build_repair_prompt(raw_text, keys), list(keys), "repair")
+    missing = [key for key in keys if key not in parsed]
+    if not missing:
+        return parsed, None
+    return parsed, (build_continue_prompt(prompt, parsed, missing), missing, "continue")
+
+
+def _follow_up_backend(kind, backend, explicit_backend):
+    # An explicitly passed backend (tests, benchmarks) serves follow-ups too
+    if kind == "repair" and explicit_backend is None:
+        return get_backend(tier=REPAIR_TIER)
+    return backend
+
+
+def _merge_follow_up(parsed, raw_text, keys):
+    extra, _ = loads_tolerant(raw_text)
+    if extra is None:
+        return parsed
+    merged = dict(parsed or {})
+    merged.update({key: extra[key] for key in keys if key in extra})
+    return merged
+
+
+def _follow_up(parsed, follow_up, backend, explicit_backend):
+    """Sends the follow-up request once; returns `parsed` completed with whatever it produced."""
+    prompt, keys, kind = follow_up
+    client = _follow_up_backend(kind, backend, explicit_backend)
+    metrics.inc("model_follow_ups_total", kind=kind)
+    try:
+        with metrics.span("model_follow_up", kind=kind):
+            raw_text = client.generate(prompt, **_schema_kwargs(client, keys))
+    except Exception as e:
+        print(f"⚠️ Follow-up ({kind}) failed: {type(e).__name__}: {e}")
+        return parsed
+    return _merge_follow_up(parsed, raw_text, keys)
+
+
+async def _follow_up_async(parsed, follow_up, backend, explicit_backend):
+    prompt, keys, kind = follow_up
+    client = _follow_up_backend(kind, backend, explicit_backend)
+    metrics.inc("model_follow_ups_total", kind=kind)
+    try:
+        with metrics.span("model_follow_up", kind=kind):
+            raw_text = await client.generate_async(prompt, **_schema_kwargs(client, keys))
+    except Exception as e:
+        print(f"⚠️ Follow-up ({kind}) failed: {type(e).__name__}: {e}")
+        return parsed
+    return _merge_follow_up(parsed, raw_text, keys)
+
+
+def _prepare(jd_text, resume_text, domain, years_experience, backend, structure=None):
+    """Returns (cache_key, cached_feedback_or_None, prompt_or_None)."""
+    cache_key = response_cache_key(
+        jd_text, resume_text, domain, years_experience, backend.model_name, _prompt_hash(PROMPT_HASH)
+    )
+    feedback = response_cache.get(cache_key) if response_cache else None
+    if feedback is not None:
+        print("Response cache hit")
+        metrics.inc("requests_total", outcome="cache_hit")
+        return cache_key, feedback, None
+    with metrics.span("prompt_build"):
+        prompt = build_prompt(jd_text, prompt_resume_text(jd_text, resume_text, structure), domain, years_experience)
+    metrics.observe_size("prompt_chars", len(prompt))
+    return cache_key, None, prompt
+
+
+async def _stream_sections(backend, prompt, parser, keys=FEEDBACK_KEYS):
+    """Streams the model's answer into `parser`, yielding the top-level fields each chunk completes."""
+    start = time.perf_counter()
+    consumer_seconds = 0.0  # time spent by our caller between chunks, excluded from model_call
+    first_chunk = True
+    async for chunk in backend.generate_stream_async(prompt, **_schema_kwargs(backend, keys)):
+        if first_chunk:
+            first_chunk = False
+            metrics.observe("model_ttfb_seconds", time.perf_counter() - start)
+        completed = parser.feed(chunk)
+        if completed:
+            yielded_at = time.perf_counter()
+            yield completed
+            consumer_seconds += time.perf_counter() - yielded_at
+    metrics.observe("stage_seconds", time.perf_counter() - start - consumer_seconds, stage="model_call")
+
+
+def _cacheable(backend):
+    # While the primary model's circuit is open a ScheduledBackend answers from its fallback tier:
+    # those answers must not be cached under the primary model's key
+    return answered_by(backend) == backend.model_name
+
+
+def _finish(parsed, cache_key, ttfb_seconds=None, cacheable=True):
+    if ttfb_seconds is not None:
+        metrics.observe("model_ttfb_seconds", ttfb_seconds)
+    if parsed is None:
+        metrics.inc("requests_total", outcome="invalid_output")
+        return None, INVALID_OUTPUT_ERROR
+    feedback = normalize_feedback(parsed)
+    if response_cache and cacheable:
+        response_cache.set(cache_key, feedback)
+    metrics.inc("requests_total", outcome="ok")
+    return feedback, None
+
+
+def _prescore(jd_text, resume_text):
+    with metrics.span("prescore"):
+        return prescore(jd_text, resume_text)
+
+
+def _analyze_local(jd_text, resume_text):
+    feedback = normalize_feedback(local_feedback(_prescore(jd_text, resume_text)))
+    metrics.inc("requests_total", outcome="local")
+    return feedback, None
+
+
+def _invalid(error):
+    metrics.inc("requests_total", outcome="invalid_input")
+    return None, error
+
+
+def is_retryable_error(error):
+    """True for errors worth retrying unchanged: invalid model output, backend failures, load shedding."""
+    return bool(error) and (
+        error == INVALID_OUTPUT_ERROR or error.startswith(UNEXPECTED_ERROR_PREFIX) or error.startswith(OVERLOADED_PREFIX)
+    )
+
+
+def _shed(e):
+    print(f"Shedding request: {e}")
+    metrics.inc("requests_total", outcome="shed")
+    return None, str(e)
+
+
+def _unexpected(e):
+    # Catch-all to avoid crashes; log for debugging
+    print(f"❌ Unexpected error in analysis: {type(e).__name__}: {e}")
+    metrics.inc("requests_total", outcome="error")
+    return None, f"{UNEXPECTED_ERROR_PREFIX}: {e}"
+
+
+# === ANALYSIS ===
+def analyze_text(jd_text, resume_text, domain, years_experience, backend=None):
+    """
+    Runs the analysis on already-extracted text. Returns (normalized_feedback, error_message_or_None).
+    `resume_text` may also be a preprocess.prepare_resume() result, to skip the resume's cleanup
+    and segmentation. `backend` defaults to the configured LLM backend (see llm.get_backend).
+    """
+    if ANALYSIS_MODE == "split":
+        return asyncio.run(analyze_text_split_async(jd_text, resume_text, domain, years_experience, backend))
+    error = validate_inputs(jd_text, resume_text)
+    if error:
+        return _invalid(error)
+    jd_text, resume_text, structure = _preprocess(jd_text, resume_text)
+    if ANALYSIS_MODE == "local":
+        return _analyze_local(jd_text, resume_text)
+    explicit_backend, backend = backend, backend or get_backend()
+    cache_key, feedback, prompt = _prepare(jd_text, resume_text, domain, years_experience, backend, structure)
+    if feedback is not None:
+        return feedback, None
+    try:
+        start = time.perf_counter()
+        with metrics.span("model_call"):
+            raw_text = backend.generate(prompt, **_schema_kwargs(backend, FEEDBACK_KEYS))
+        # Non-streaming call: the first byte arrives with the whole response
+        ttfb_seconds = time.perf_counter() - start
+        cacheable = _cacheable(backend)
+        parsed, follow_up = _parse_output(raw_text, prompt)
+        if follow_up:
+            parsed = _follow_up(parsed, follow_up, backend, explicit_backend)
+            cacheable = cacheable and _cacheable(backend)
+        return _finish(parsed, cache_key, ttfb_seconds, cacheable)
+    except Exception as e:
+        return _unexpected(e)
+
+
+async def analyze_text_async(jd_text, resume_text, domain, years_experience, backend=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Async `analyze_text`: the model call does not hold a thread while waiting on the network.
+    Model calls go through admission control: they wait (by `priority`) for one of the model
+    slots or are shed when the wait would be too long, and identical requests already in
+    flight are joined instead of repeated.
+    """
+    if ANALYSIS_MODE == "split":
+        return await analyze_text_split_async(jd_text, resume_text, domain, years_experience, backend, priority)
+    error = validate_inputs(jd_text, resume_text)
+    if error:
+        return _invalid(error)
+    jd_text, resume_text, structure = _preprocess(jd_text, resume_text)
+    if ANALYSIS_MODE == "local":
+        return _analyze_local(jd_text, resume_text)
+    explicit_backend, backend = backend, backend or get_backend()
+    cache_key, feedback, prompt = _prepare(jd_text, resume_text, domain, years_experience, backend, structure)
+    if feedback is not None:
+        return feedback, None
+    joined = await in_flight.join(cache_key)
+    if joined is not None:
+        return joined
+    with in_flight.lead(cache_key) as resolve:
+        try:
+            async with model_slots.slot(priority):
+                start = time.perf_counter()
+                with metrics.span("model_call"):
+                    raw_text = await backend.generate_async(prompt, **_schema_kwargs(backend, FEEDBACK_KEYS))
+                ttfb_seconds = time.perf_counter() - start
+                cacheable = _cacheable(backend)
+                parsed, follow_up = _parse_output(raw_text, prompt)
+                if follow_up:
+                    parsed = await _follow_up_async(parsed, follow_up, backend, explicit_backend)
+                    cacheable = cacheable and _cacheable(backend)
+            result = _finish(parsed, cache_key, ttfb_seconds, cacheable)
+        except Overloaded as e:
+            result = _shed(e)
+        except Exception as e:
+            result = _unexpected(e)
+        resolve(result)
+        return result
+
+
+async def analyze_text_stream_async(jd_text, resume_text, domain, years_experience, backend=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Streaming `analyze_text_async`. Async generator of events:
+      ("prescore", prescore.prescore(...) result)  at most once, first, before the model is called
+      ("section", {key: value, ...})  whenever top-level fields of the model's JSON complete
+      ("done", feedback_or_None, error_or_None)  exactly once, last
+    """
+    error = validate_inputs(jd_text, resume_text)
+    if error:
+        yield ("done",) + _invalid(error)
+        return
+    jd_text, resume_text, structure = _preprocess(jd_text, resume_text)
+    if ANALYSIS_MODE == "local":
+        yield ("done",) + _analyze_local(jd_text, resume_text)
+        return
+    if PRESCORE:
+        yield ("prescore", _prescore(jd_text, resume_text))
+    if ANALYSIS_MODE == "split":
+        async for event in analyze_text_split_stream_async(
+            jd_text, resume_text, domain, years_experience, backend, priority, prepared=True, structure=structure
+        ):
+            yield event
+        return
+    explicit_backend, backend = backend, backend or get_backend()
+    cache_key, feedback, prompt = _prepare(jd_text, resume_text, domain, years_experience, backend, structure)
+    if feedback is not None:
+        yield ("done", feedback, None)
+        return
+    joined = await in_flight.join(cache_key)
+    if joined is not None:
+        yield ("done",) + joined
+        return
+
+    with in_flight.lead(cache_key) as resolve:
+        parser = StreamingFeedbackParser()
+        try:
+            async with model_slots.slot(priority):
+                async for completed in _stream_sections(backend, prompt, parser):
+                    yield ("section", completed)
+                cacheable = _cacheable(backend)
+                parsed, follow_up = _parse_output(parser.text(), prompt)
+                if follow_up:
+                    parsed = await _follow_up_async(parsed, follow_up, backend, explicit_backend)
+                    cacheable = cacheable and _cacheable(backend)
+            if follow_up:
+                fetched = {key: normalize_section(key, parsed[key]) for key in follow_up[1] if parsed and key in parsed}
+                if fetched:
+                    yield ("section", fetched)
+            result = _finish(parsed, cache_key, cacheable=cacheable)
+        except Overloaded as e:
+            result = _shed(e)
+        except Exception as e:
+            result = _unexpected(e)
+        resolve(result)
+    yield ("done",) + result
+
+
+# === INCREMENTAL ANALYSIS ===
+async def analyze_text_incremental_stream_async(
+    jd_text, resume, previous_feedback, changes, domain, years_experience, backend=None, priority=PRIORITY_INTERACTIVE
+):
+    """
+    `analyze_text_stream_async` for an edited resume whose previous analysis (same JD, domain and
+    years) was `previous_feedback`: only `changes` (incremental.plan_update) and the previous
+    scores and improvement areas go to the model, and its answer is merged into the previous
+    feedback (still-applicable strengths and rewrites carried forward). Yields the same events.
+    """
+    error = validate_inputs(jd_text, resume)
+    if error:
+        yield ("done",) + _invalid(error)
+        return
+    jd_text, resume_text, _ = _preprocess(jd_text, resume)
+    if PRESCORE:
+        yield ("prescore", _prescore(jd_text, resume_text))
+    yield ("section", {"strengths": carried_strengths(previous_feedback, changes["removed"], resume_text)})
+    if not changes["removed"] and not changes["added"]:
+        metrics.inc("requests_total", outcome="incremental_unchanged")
+        yield ("done", merge_feedback(previous_feedback, {}, resume_text), None)
+        return
+
+    explicit_backend, backend = backend, backend or get_backend()
+    with metrics.span("prompt_build"):
+        prompt = build_incremental_prompt(jd_text, resume_text, previous_feedback, changes, domain, years_experience)
+    metrics.observe_size("prompt_chars", len(prompt))
+    metrics.observe_size("incremental_changed_units", len(changes["removed"]) + len(changes["added"]))
+    merged = lambda sections: {
+        key: merge_section(key, value, previous_feedback, resume_text) for key, value in sections.items()
+    }
+    parser = StreamingFeedbackParser()
+    try:
+        async with model_slots.slot(priority):
+            async for completed in _stream_sections(backend, prompt, parser, INCREMENTAL_KEYS):
+                yield ("section", merged(completed))
+            parsed, follow_up = _parse_output(parser.text(), prompt, INCREMENTAL_KEYS)
+            if follow_up:
+                parsed = await _follow_up_async(parsed, follow_up, backend, explicit_backend)
+        if parsed is None:
+            metrics.inc("requests_total", outcome="invalid_output")
+            result = (None, INVALID_OUTPUT_ERROR)
+        else:
+            update = {key: normalize_section(key, parsed[key]) for key in INCREMENTAL_KEYS if key in parsed}
+            if follow_up:
+                fetched = {key: update[key] for key in follow_up[1] if key in update}
+                if fetched:
+                    yield ("section", merged(fetched))
+            feedback = normalize_feedback(merge_feedback(previous_feedback, update, resume_text, changes["removed"]))
+            metrics.inc("requests_total", outcome="incremental")
+            result = (feedback, None)
+    except Overloaded as e:
+        result = _shed(e)
+    except Exception as e:
+        result = _unexpected(e)
+    yield ("done",) + result
+
+
+# === SPLIT ANALYSIS ===
+def _split_backends(backend=None):
+    """sub-task -> client; an explicit `backend` serves every sub-task."""
+    return {task: backend or get_backend(tier=SPLIT_TIERS.get(task, "pro")) for task in SPLIT_PROMPTS}
+
+
+async def _run_subtask(task, prompt, backend, explicit_backend):
+    """
+    Returns (task, {key: normalized value}, error_or_None, cacheable) for one sub-prompt; `cacheable`
+    is False when a fallback model answered (see _cacheable).
+    """
+    _, keys = SPLIT_PROMPTS[task]
+    start = time.perf_counter()
+    try:
+        with metrics.span("model_call", subtask=task):
+            raw_text = await backend.generate_async(prompt, **_schema_kwargs(backend, keys))
+        metrics.observe("model_ttfb_seconds", time.perf_counter() - start, subtask=task)
+        cacheable = _cacheable(backend)
+        parsed, follow_up = _parse_output(raw_text, prompt, keys, subtask=task)
+        if follow_up:
+            parsed = await _follow_up_async(parsed, follow_up, backend, explicit_backend)
+            cacheable = cacheable and _cacheable(backend)
+    except Exception as e:
+        print(f"❌ Sub-task {task} failed: {type(e).__name__}: {e}")
+        return task, None, f"{UNEXPECTED_ERROR_PREFIX}: {e}", False
+    if parsed is None:
+        return task, None, INVALID_OUTPUT_ERROR, False
+    return task, {key: normalize_section(key, parsed[key]) for key in keys if key in parsed}, None, cacheable
+
+
+async def analyze_text_split_stream_async(
+    jd_text, resume_text, domain, years_experience, backend=None, priority=PRIORITY_INTERACTIVE, prepared=False,
+    structure=None,
+):
+    """
+    `analyze_text_stream_async` over SPLIT_PROMPTS: the sub-prompts run concurrently (each on the
+    model tier from SPLIT_TIERS) and each one's fields are yielded as a "section" event when it
+    finishes, so latency is bounded by the slowest sub-task. The merged dict has the same shape
+    as single-prompt feedback. `prepared=True` means the inputs were already validated and preprocessed
+    (`structure` is then the resume's segmentation, if known).
+    """
+    if not prepared:
+        error = validate_inputs(jd_text, resume_text)
+        if error:
+            yield ("done",) + _invalid(error)
+            return
+        jd_text, resume_text, structure = _preprocess(jd_text, resume_text)
+    backends = _split_backends(backend)
+    model_name = "split:" + ",".join(f"{task}={b.model_name}" for task, b in sorted(backends.items()))
+    cache_key = response_cache_key(
+        jd_text, resume_text, domain, years_experience, model_name, _prompt_hash(SPLIT_PROMPT_HASH)
+    )
+    feedback = response_cache.get(cache_key) if response_cache else None
+    if feedback is not None:
+        print("Response cache hit")
+        metrics.inc("requests_total", outcome="cache_hit")
+        yield ("done", feedback, None)
+        return
+    joined = await in_flight.join(cache_key)
+    if joined is not None:
+        yield ("done",) + joined
+        return
+
+    with metrics.span("prompt_build"):
+        prompt_resume = prompt_resume_text(jd_text, resume_text, structure)
+        prompts = {
+            task: build_prompt(jd_text, prompt_resume, domain, years_experience, template)
+            for task, (template, _) in SPLIT_PROMPTS.items()
+        }
+    metrics.observe_size("prompt_chars", sum(len(p) for p in prompts.values()))
+
+    with in_flight.lead(cache_key) as resolve:
+        merged = {}
+        result = None
+        cacheable = True
+        tasks = []
+        try:
+            # One slot per analysis: the sub-prompts are parts of the same request
+            async with model_slots.slot(priority):
+                tasks = [
+                    asyncio.ensure_future(_run_subtask(task, prompts[task], backends[task], backend)) for task in prompts
+                ]
+                for next_done in asyncio.as_completed(tasks):
+                    task, sections, error, task_cacheable = await next_done
+                    cacheable = cacheable and task_cacheable
+                    if error:
+                        outcome = "error" if error.startswith("❌") else "invalid_output"
+                        metrics.inc("requests_total", outcome=outcome)
+                        result = (None, error)
+                        break
+                    merged.update(sections)
+                    yield ("section", sections)
+        except Overloaded as e:
+            result = _shed(e)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        if result is None:
+            feedback = normalize_feedback(merged)
+            if response_cache and cacheable:
+                response_cache.set(cache_key, feedback)
+            metrics.inc("requests_total", outcome="ok")
+            result = (feedback, None)
+        resolve(result)
+    yield ("done",) + result
+
+
+async def analyze_text_split_async(jd_text, resume_text, domain, years_experience, backend=None, priority=PRIORITY_INTERACTIVE):
+    """Non-streaming split analysis. Returns (normalized_feedback, error_message_or_None)."""
+    async for event in analyze_text_split_stream_async(jd_text, resume_text, domain, years_experience, backend, priority):
+        if event[0] == "done":
+            return event[1], event[2]
+
+
+def analyze(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, backend=None):
+    """
+    Full pipeline from raw UI inputs. Returns (normalized_feedback, error_message_or_None).
+    """
+    jd_text, resume_text, error = load_inputs(jd_text_input, jd_file_input, resume_input_file)
+    if error:
+        return _invalid(error)
+    return analyze_text(jd_text, resume_text, domain, years_experience, backend)
+
+
+async def analyze_async(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, backend=None,
+                        priority=PRIORITY_INTERACTIVE, resume_text_input=None):
+    jd_text, resume_text, error = await load_inputs_async(jd_text_input, jd_file_input, resume_input_file, resume_text_input)
+    if error:
+        return _invalid(error)
+    return await analyze_text_async(jd_text, resume_text, domain, years_experience, backend, priority)
+
+
+async def analyze_stream_async(jd_text_input, jd_file_input, resume_input_file, domain, years_experience, backend=None,
+                               priority=PRIORITY_INTERACTIVE, resume_session=None):
+    """
+    Streaming `analyze_async`; yields the same events as `analyze_text_stream_async`, plus
+    ("resume", prepared) whenever the session's resume state changes: after the file was (re)parsed,
+    and before "done" once an analysis succeeded (`prepared["analysis"]` then holds the feedback).
+    `resume_session` is the last such `prepared` resume of this user session: when the uploaded
+    file is unchanged it is reused as is, so trying another JD skips all resume parsing and cleanup.
+    When an edited resume is analyzed for the same JD, domain and years as the session's last
+    analysis, only the diff is re-analyzed (see analyze_text_incremental_stream_async).
+    """
+    previous = resume_session.get("analysis") if resume_session else None
+    key = file_key(resume_input_file) if resume_input_file else None
+    reuse = resume_session is not None and key is not None and resume_session.get("file") == key
+    if reuse:
+        metrics.inc("resume_session_reuse_total")
+        resume_input_file = None
+    jd_text, resume, error = await load_inputs_async(jd_text_input, jd_file_input, resume_input_file)
+    if error:
+        yield ("done",) + _invalid(error)
+        return
+    if reuse:
+        resume = resume_session
+    elif resume:
+        with metrics.span("resume_prepare"):
+            resume = dict(prepare_resume(resume), file=key)
+        yield ("resume", resume)
+    if not resume:
+        async for event in analyze_text_stream_async(jd_text, resume, domain, years_experience, backend, priority):
+            yield event
+        return
+
+    units = resume_units(resume["text"], resume["structure"])
+    this_analysis = analysis_key(jd_text, domain, years_experience)
+    changes = None
+    if INCREMENTAL and ANALYSIS_MODE != "local" and previous and previous["key"] == this_analysis:
+        changes = plan_update(previous["units"], units)
+        metrics.inc("incremental_total", outcome="update" if changes else "full")
+    if changes is not None:
+        events = analyze_text_incremental_stream_async(
+            jd_text, resume, previous["feedback"], changes, domain, years_experience, backend, priority
+        )
+    else:
+        events = analyze_text_stream_async(jd_text, resume, domain, years_experience, backend, priority)
+    async for event in events:
+        if event[0] == "done" and event[1] is not None:
+            analysis = {"key": this_analysis, "units": units, "feedback": event[1]}
+            yield ("resume", dict(resume, analysis=analysis))
+        yield event
+
+
+# === WARM-UP ===
+def _warm_up_model(tier):
+    backend = get_backend(tier=tier)
+    if hasattr(backend, "warm_up"):
+        backend.warm_up()
+
+
+def warm_up():
+    """
+    Pays one-off start-up costs before traffic arrives: starts the parser workers (which pre-import
+    the PDF/DOCX libraries), builds the LLM client for every tier this configuration uses and opens
+    its connection, and runs the local text stages once. A failing step is logged and skipped.
+    Returns {step: seconds}.
+    """
+    tiers = {DEFAULT_TIER}
+    if ANALYSIS_MODE == "split":
+        tiers = set(SPLIT_TIERS.get(task, "pro") for task in SPLIT_PROMPTS)
+    steps = [("parser_pool", get_parser_pool)]
+    if ANALYSIS_MODE != "local":
+        tiers.add(REPAIR_TIER)
+        steps += [(f"model.{tier}", lambda tier=tier: _warm_up_model(tier)) for tier in sorted(tiers)]
+    sample_jd, sample_resume = "Python engineer. Requirements: SQL.", "EXPERIENCE\n- Built Python and SQL services"
+    steps.append(("text", lambda: prescore(*preprocess_inputs(sample_jd, sample_resume)[:2])))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️ Warm-up step {name} failed: {type(e).__name__}: {e}")
+        timings[name] = round(time.perf_counter() - start, 4)
+    print(f"Warm-up done in {sum(timings.values()):.2f}s: {timings}")
+    return timings
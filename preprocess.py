@@ -0,0 +1,288 @@
+# preprocess.py
+import math
+import os
+import re
+import unicodedata
+from cache import content_hash
+from resume_structure import rank_bullets, segment_resume
+
+# === CONFIGURATION ===
+JD_TOKEN_BUDGET = int(os.environ.get("CAREER_BUDDY_JD_TOKENS", "1500"))
+RESUME_TOKEN_BUDGET = int(os.environ.get("CAREER_BUDDY_RESUME_TOKENS", "2000"))
+MIN_BULLETS = 4  # the model rewrites 4 bullets, so trimming never goes below that
+REPEATED_LINE_MIN = 3  # a short line seen this often is a running header/footer
+REPEATED_LINE_MAX_WORDS = 8
+# Boilerplate stripping that would leave less than this share of the JD's words is not trusted:
+# the JD goes on as it was (stripping is a token saving, never worth losing the requirements)
+BOILERPLATE_MIN_KEPT = 0.2
+
+# Resume sections dropped first when over budget, in this order
+RESUME_LOW_PRIORITY = ("interests", "languages", "publications", "volunteering", "awards", "certifications")
+
+# === TOKEN COUNTING ===
+# Approximates a SentencePiece/BPE vocabulary: short words are one token, longer ones split every
+# ~4 characters, digits go in groups of up to 3, and each symbol is its own token.
+_PIECE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+
+def count_tokens(text):
+    """Approximate model token count of `text` (within ~10-15% for English prose)."""
+    tokens = 0
+    for piece in _PIECE.findall(text or ""):
+        if len(piece) <= 6:
+            tokens += 1
+        else:
+            tokens += 1 + math.ceil((len(piece) - 6) / 4)
+    return tokens
+
+
+# === CLEANUP ===
+_INVISIBLE = re.compile("[­​-‏⁠﻿]")
+_SPACES = re.compile(r"[ \t  - 　]+")
+_HYPHEN_BREAK = re.compile(r"([a-z])-\n([a-z])")
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.I)
+
+
+def clean_text(text):
+    """
+    Normalizes extracted text: NFKC (ligatures, full-width forms), invisible characters, words
+    hyphenated across line breaks, page numbers, running headers/footers repeated on every page,
+    and runs of spaces and blank lines. Line structure is kept (bullets, sections).
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _INVISIBLE.sub("", text).replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n")
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    counts = {}
+    for line in lines:
+        if line and len(line.split()) <= REPEATED_LINE_MAX_WORDS:
+            counts[line] = counts.get(line, 0) + 1
+    seen = set()
+    out = []
+    for line in lines:
+        if _PAGE_NUMBER.match(line):
+            continue
+        if counts.get(line, 0) >= REPEATED_LINE_MIN:
+            if line in seen:
+                continue
+            seen.add(line)
+        if not line and (not out or not out[-1]):
+            continue  # collapse blank runs
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+# === JD BOILERPLATE ===
+_BOILERPLATE_HEADING = re.compile(
+    r"^(?:about (?:us|the company|our company|the team)|who we are|our (?:mission|story|values|culture)|"
+    r"(?:company )?benefits|perks(?: (?:and|&) benefits)?|what we offer|why (?:join us|work (?:here|with us))|"
+    r"compensation (?:and|&) benefits|equal (?:employment )?opportunity(?: employer)?|eeo(?: statement)?|"
+    r"diversity(?:,? equity)?(?: (?:and|&) inclusion)?|accommodations?|how to apply|privacy(?: notice)?|"
+    r"disclaimer|pay transparency|legal)\s*:?$",
+    re.I,
+)
+# Sections whose lines are never stripped
+_REQUIREMENT_HEADING = re.compile(
+    r"requirement|qualification|responsibilit|\bdut(?:y|ies)\b|skills|what you(?:'ll| will)|you(?:'ll| will) (?:do|bring|have)|"
+    r"looking for|must[- ]haves?|nice[- ]to[- ]haves?|\b(?:the|your) role\b|about the (?:job|position)",
+    re.I,
+)
+_REQUIREMENT_CUES = re.compile(
+    r"requir|qualif|must|experience (?:with|in)|proficien|knowledge of|skills?|responsib|you will|you'll|"
+    r"degree|years|familiar|expert|nice to have|preferred|ability to",
+    re.I,
+)
+_HEADING_SMALL_WORDS = frozenset(("and", "or", "of", "to", "the", "a", "an", "for", "in", "on", "with", "&", "/"))
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+# Outside boilerplate sections only these mark a sentence as boilerplate
+_STRONG = re.compile(
+    r"equal (?:employment )?opportunity|without regard to|regardless of (?:race|age|gender)|"
+    r"(?:race|religion|color|national origin|sexual orientation|gender identity|veteran status|disability)"
+    r"(?:,| or| and)[^.]*(?:race|religion|color|national origin|sexual orientation|gender identity|veteran status|disability)|"
+    r"reasonable accommodation|e-verify|affirmative action|do not discriminate|protected (?:veteran|characteristic)|"
+    r"recruitment agenc|unsolicited (?:resume|application)s?|privacy (?:notice|policy)",
+    re.I,
+)
+# Topics of benefits and company blurbs: a sub-heading about them ("Health & Wellness", "401(k)")
+# does not end a boilerplate section. Never used on their own, since JDs for healthcare, dental or
+# compensation roles are full of these words
+_WEAK = re.compile(
+    r"\b(?:benefits?|401\(?k\)?|pto|paid time off|health(?:care| insurance)?|dental|vision|parental leave|"
+    r"stipend|perks?|equity|bonus(?:es)?|wellness|gym|snacks|remote-friendly|culture|mission|values|"
+    r"diversity|inclusion|inclusive|founded|headquartered|industry[- ]leading|fast-growing|world-class)\b",
+    re.I,
+)
+
+
+def _looks_like_heading(line):
+    # Anything heading-like ends a boilerplate section: "Requirements:", "WHAT YOU'LL DO", "What You'll Do"
+    words = line.rstrip(":").split()
+    if not words or len(words) > 6 or line.endswith((".", ",", ";")):
+        return False
+    return line.endswith(":") or all(w[0].isupper() or w.lower() in _HEADING_SMALL_WORDS for w in words)
+
+
+def _is_boilerplate_sentence(sentence):
+    return bool(_STRONG.search(sentence)) and not _REQUIREMENT_CUES.search(sentence)
+
+
+def strip_boilerplate(jd_text):
+    """
+    Removes EEO statements, benefits/perks lists, company blurbs and application/legal notices from
+    a JD: sections under a boilerplate heading, and sentences with unmistakable boilerplate
+    (_STRONG) anywhere else. Lines under a requirements/responsibilities heading and lines with
+    requirement cues are always kept. Returns (text, removed_chars).
+    """
+    kept = []
+    section = None  # "boilerplate", "requirements" or None, from the last heading
+    for line in (jd_text or "").split("\n"):
+        stripped = line.strip().lstrip("•*-–# ").strip()
+        if stripped and _BOILERPLATE_HEADING.match(stripped):
+            section = "boilerplate"
+            continue
+        if stripped and _looks_like_heading(stripped):
+            if _REQUIREMENT_HEADING.search(stripped):
+                section = "requirements"
+            elif section != "boilerplate" or not _WEAK.search(stripped):
+                section = None
+        if not stripped and section == "requirements":
+            section = None  # requirement lists are one block; an EEO paragraph often follows them
+        if not stripped or section == "requirements" or _REQUIREMENT_CUES.search(stripped):
+            kept.append(line)
+            continue
+        if section == "boilerplate":
+            continue
+        sentences = [s for s in _SENTENCE_SPLIT.split(line) if not _is_boilerplate_sentence(s)]
+        if sentences:
+            kept.append(" ".join(sentences))
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+    return text, max(0, len(jd_text or "") - len(text))
+
+
+# === BUDGETING ===
+def _drop_lines(lines, order, budget):
+    """Blanks lines in `order` (lowest priority first) until the text fits `budget` tokens."""
+    costs = [count_tokens(line) + 1 for line in lines]  # +1 for the newline
+    total = sum(costs)
+    dropped = set()
+    for group in order:
+        if total <= budget:
+            break
+        for i in group:
+            if i not in dropped:
+                dropped.add(i)
+                total -= costs[i]
+    return [line for i, line in enumerate(lines) if i not in dropped], total
+
+
+def truncate_tokens(text, budget):
+    """Hard cut at roughly `budget` tokens, on a line (or else word) boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    out, used = [], 0
+    for line in text.split("\n"):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            words = []
+            for word in line.split():
+                cost = count_tokens(word)
+                if used + cost > budget:
+                    break
+                words.append(word)
+                used += cost
+            if words:
+                out.append(" ".join(words))
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+
+def fit_resume(resume_text, jd_text, budget=RESUME_TOKEN_BUDGET, structure=None, tokens=None):
+    """
+    Trims a resume to `budget` tokens by priority instead of rejecting it: low-value sections go
+    first, then the bullets least relevant to the JD (keeping MIN_BULLETS), then a hard cut.
+    `structure` / `tokens` are the text's segment_resume() / count_tokens(), if already known.
+    Returns (text, trimmed).
+    """
+    if (count_tokens(resume_text) if tokens is None else tokens) <= budget:
+        return resume_text, False
+    lines = resume_text.split("\n")
+    structure = structure or segment_resume(resume_text)
+    line_sections = structure["line_sections"]
+    order = [
+        [i for i, section in enumerate(line_sections) if section == name]
+        for name in RESUME_LOW_PRIORITY
+    ]
+    ranked = rank_bullets(jd_text, structure["bullets"])
+    order += [bullet["lines"] for bullet in reversed(ranked[MIN_BULLETS:])]
+    kept, total = _drop_lines(lines, order, budget)
+    text = "\n".join(kept)
+    return (truncate_tokens(text, budget) if total > budget else text), True
+
+
+def fit_jd(jd_text, budget=JD_TOKEN_BUDGET):
+    """
+    Trims a JD to `budget` tokens: lines without requirement cues go first (from the end), then a
+    hard cut. Returns (text, trimmed).
+    """
+    if count_tokens(jd_text) <= budget:
+        return jd_text, False
+    lines = jd_text.split("\n")
+    plain = [i for i in reversed(range(len(lines))) if not _REQUIREMENT_CUES.search(lines[i])]
+    kept, total = _drop_lines(lines, [plain], budget)
+    text = "\n".join(kept)
+    return (truncate_tokens(text, budget) if total > budget else text), True
+
+
+def prepare_resume(resume_text):
+    """
+    The JD-independent part of resume preprocessing: cleanup, segmentation, token count and hash.
+    Done once per uploaded resume and reused for every JD tried against it (see app.py's session state).
+    """
+    text = clean_text(resume_text)
+    return {
+        "text": text,
+        "hash": content_hash(text),
+        "tokens_in": count_tokens(resume_text),
+        "tokens": count_tokens(text),
+        "structure": segment_resume(text),
+    }
+
+
+def preprocess_inputs(jd_text, resume, jd_budget=JD_TOKEN_BUDGET, resume_budget=RESUME_TOKEN_BUDGET):
+    """
+    Cleanup, JD boilerplate removal and token budgeting for both inputs. `resume` is the resume
+    text or a prepare_resume() result.
+    Returns (jd_text, resume_text, report) where report has token counts before/after, what was
+    trimmed and "resume_structure": the segmentation of the returned resume text, when known.
+    """
+    prepared = resume if isinstance(resume, dict) else None
+    jd_before = count_tokens(jd_text)
+    stripped, boilerplate_chars = strip_boilerplate(clean_text(jd_text))
+    # Re-validate: stripping that leaves (almost) nothing went wrong, so the original text is used
+    boilerplate_fallback = len(stripped.split()) < max(1, BOILERPLATE_MIN_KEPT * len(jd_text.split()))
+    if boilerplate_fallback:
+        stripped, boilerplate_chars = jd_text, 0
+    jd_text, jd_trimmed = fit_jd(stripped, jd_budget)
+    if prepared:
+        resume_before, resume_text = prepared["tokens_in"], prepared["text"]
+        resume_text, resume_trimmed = fit_resume(
+            resume_text, jd_text, resume_budget, prepared["structure"], prepared["tokens"]
+        )
+    else:
+        resume_before, resume_text = count_tokens(resume), clean_text(resume)
+        resume_text, resume_trimmed = fit_resume(resume_text, jd_text, resume_budget)
+    report = {
+        "jd_tokens_in": jd_before,
+        "jd_tokens": count_tokens(jd_text),
+        "resume_tokens_in": resume_before,
+        "resume_tokens": prepared["tokens"] if prepared and not resume_trimmed else count_tokens(resume_text),
+        "boilerplate_chars": boilerplate_chars,
+        "boilerplate_fallback": boilerplate_fallback,
+        "jd_trimmed": jd_trimmed,
+        "resume_trimmed": resume_trimmed,
+        "resume_structure": prepared["structure"] if prepared and not resume_trimmed else None,
+    }
+    return jd_text, resume_text, report
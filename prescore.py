@@ -0,0 +1,228 @@
+# prescore.py
+import re
+import numpy as np
+
+# === CONFIGURATION ===
+MAX_KEYWORDS = 25  # JD terms considered for coverage
+MAX_MISSING = 10  # missing keywords reported
+BM25_K1 = 1.2
+BM25_B = 0.75
+SKILL_BOOST = 2.0  # weight multiplier for known skill terms
+BIGRAM_WEIGHT = 0.5  # weight multiplier for other word pairs
+# Provisional score = blend of weighted keyword coverage and BM25 cosine (cosine of COSINE_FULL counts as 1.0)
+COVERAGE_WEIGHT = 0.75
+COSINE_FULL = 0.6
+
+BUCKETS = ((95, "Excellent"), (75, "High"), (50, "Average"))  # same cut-offs as PROMPT's Match Score
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been being below between both but by can could
+did do does doing down during each etc few for from further had has have having he her here hers him his how i if
+in into is it its itself just me more most my no nor not now of off on once only or other our ours out over own per
+same she should so some such than that the their theirs them then there these they this those through to too under
+until up us very via was we were what when where which while who whom why will with within would you your yours
+able ability across years year experience experienced strong excellent good great plus preferred required requirements
+requirement responsibilities responsible including include includes work working role position candidate candidates
+team teams company join looking seeking ideal etc e.g i.e using use used well new must nice have skills skill
+knowledge understanding proven demonstrated familiarity familiar hands-on based related relevant equivalent degree
+bachelor bachelors master masters minimum least level opportunity opportunities environment day days help
+hiring hire require requires requiring looking seeking want wants need needs plus bonus asset
+""".split())
+
+# Skill terms that matter more than their frequency suggests (matched after normalization)
+KNOWN_SKILLS = frozenset("""
+python java javascript typescript go golang rust c++ c# ruby php scala kotlin swift sql nosql r matlab bash
+django flask fastapi spring rails react angular vue node.js next.js graphql rest grpc html css
+aws gcp azure docker kubernetes terraform ansible linux ci/cd jenkins git github kafka spark hadoop airflow
+snowflake bigquery redshift postgresql mysql mongodb redis elasticsearch tableau looker excel powerbi
+pandas numpy pytorch tensorflow scikit-learn llm nlp etl
+agile scrum jira figma sketch seo sem a/b google analytics salesforce hubspot
+machine learning deep learning data science data analysis product management project management
+a/b testing user research unit testing system design
+""".split()) | frozenset({
+    "google analytics", "machine learning", "deep learning", "data science", "data analysis", "product management",
+    "project management", "a/b testing", "user research", "unit testing", "system design", "power bi",
+})
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+_SEGMENT_SPLIT = re.compile(r"[\n\r•;]+|\.\s+")
+_PHRASE_SPLIT = re.compile(r"[,:()!?\[\]{}|]+|\.\s")
+
+
+def _normalize(token):
+    # Light plural folding so "pipelines" matches "pipeline" ("analytics", "kubernetes" stay intact)
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is", "ics", "es")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens; keeps skill-style tokens such as c++, c#, node.js, ci/cd and a/b intact,
+    but splits other slash compounds ("python/django").
+    """
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        parts = token.split("/") if "/" in token and token not in KNOWN_SKILLS else (token,)
+        tokens.extend(t for t in parts if len(t) > 1 or t in ("c", "r"))
+    return tokens
+
+
+def _is_number(token):
+    return token[0].isdigit() and token not in KNOWN_SKILLS
+
+
+def terms(text):
+    """
+    Content terms of `text`: normalized non-stopword unigrams plus bigrams of adjacent ones
+    (multi-word skills like "google analytics").
+    Returns (terms, {term: first surface form}).
+    """
+    out = []
+    surface = {}
+    for phrase in _PHRASE_SPLIT.split(text or ""):
+        previous = None  # bigrams never span punctuation, so list items stay separate
+        for token in tokenize(phrase):
+            if token in STOPWORDS or _is_number(token):
+                previous = None
+                continue
+            term = _normalize(token)
+            out.append(term)
+            surface.setdefault(term, token)
+            if previous is not None:
+                bigram = f"{previous[0]} {term}"
+                out.append(bigram)
+                surface.setdefault(bigram, f"{previous[1]} {token}")
+            previous = (term, token)
+    return out, surface
+
+
+def segments(text):
+    return [s for s in _SEGMENT_SPLIT.split(text or "") if s.strip()]
+
+
+def _bucket(score):
+    for threshold, label in BUCKETS:
+        if score >= threshold:
+            return label
+    return "Low"
+
+
+def prescore(jd_text, resume_text):
+    """
+    Deterministic keyword/BM25 match between JD and resume, in milliseconds.
+    IDF is estimated over the sentences/lines of both texts, so boilerplate repeated
+    everywhere weighs little; known skills are boosted.
+    Returns {"match_score": {"score", "bucket"}, "matched_keywords", "missing_keywords", "similarity"}.
+    """
+    jd_segments = [terms(s) for s in segments(jd_text)]
+    resume_segments = [terms(s) for s in segments(resume_text)]
+    all_segments = jd_segments + resume_segments
+
+    vocab = {}
+    surface = {}
+    rows, cols = [], []
+    for i, (segment_terms, segment_surface) in enumerate(all_segments):
+        for term in segment_terms:
+            rows.append(i)
+            cols.append(vocab.setdefault(term, len(vocab)))
+        for term, form in segment_surface.items():
+            surface.setdefault(term, form)
+    if not vocab or not jd_segments or not resume_segments:
+        return {"match_score": {"score": 0, "bucket": _bucket(0)}, "matched_keywords": [], "missing_keywords": [], "similarity": 0.0}
+
+    counts = np.zeros((len(all_segments), len(vocab)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows), np.array(cols)), 1.0)
+
+    n_segments = len(all_segments)
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log1p((n_segments - df + 0.5) / (df + 0.5))
+    jd_tf = counts[: len(jd_segments)].sum(axis=0)
+    resume_tf = counts[len(jd_segments):].sum(axis=0)
+    boost = np.ones(len(vocab), dtype=np.float32)
+    keyword_candidate = np.ones(len(vocab), dtype=bool)
+    for term, index in vocab.items():
+        if term in KNOWN_SKILLS or surface.get(term) in KNOWN_SKILLS:
+            boost[index] = SKILL_BOOST
+        elif " " in term:
+            # Arbitrary word pairs add a little similarity, but are only keywords when the JD repeats them
+            boost[index] = BIGRAM_WEIGHT
+            keyword_candidate[index] = jd_tf[index] >= 2
+    saturate = lambda tf: tf * (BM25_K1 + 1) / (tf + BM25_K1)  # BM25 term-frequency saturation
+    jd_vec = saturate(jd_tf) * idf * boost
+    resume_vec = saturate(resume_tf) * idf * boost
+
+    norms = float(np.linalg.norm(jd_vec) * np.linalg.norm(resume_vec))
+    similarity = float(jd_vec @ resume_vec / norms) if norms else 0.0
+
+    # Coverage of the JD's most important terms, weighted by their importance
+    ranked = np.where(keyword_candidate, jd_vec, 0.0)
+    top = np.argsort(-ranked, kind="stable")[:MAX_KEYWORDS]
+    top = top[ranked[top] > 0]
+    present = resume_tf[top] > 0
+    total_weight = float(jd_vec[top].sum())
+    coverage = float(jd_vec[top][present].sum() / total_weight) if total_weight else 0.0
+
+    score = 100 * (COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * min(1.0, similarity / COSINE_FULL))
+    score = int(round(min(100.0, score)))
+    terms_by_index = list(vocab)
+    matched = [surface[terms_by_index[i]] for i in top[present]]
+    missing = [surface[terms_by_index[i]] for i in top[~present]]
+    return {
+        "match_score": {"score": score, "bucket": _bucket(score)},
+        "matched_keywords": _drop_covered(matched),
+        "missing_keywords": _drop_covered(missing)[:MAX_MISSING],
+        "similarity": round(similarity, 4),
+    }
+
+
+def bm25_rank(query_text, documents):
+    """
+    BM25 score of each document in `documents` (list of str) for the terms of `query_text`, as a
+    NumPy array aligned with `documents`. IDF comes from the documents themselves.
+    """
+    query_terms = set(terms(query_text)[0])
+    doc_terms = [terms(d)[0] for d in documents]
+    if not documents or not query_terms:
+        return np.zeros(len(documents), dtype=np.float32)
+    vocab = {term: i for i, term in enumerate(sorted(query_terms))}
+    rows, cols = [], []
+    for i, doc in enumerate(doc_terms):
+        for term in doc:
+            index = vocab.get(term)
+            if index is not None:
+                rows.append(i)
+                cols.append(index)
+    tf = np.zeros((len(documents), len(vocab)), dtype=np.float32)
+    if rows:
+        np.add.at(tf, (np.array(rows), np.array(cols)), 1.0)
+    lengths = np.array([max(1, len(d)) for d in doc_terms], dtype=np.float32)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    boost = np.array([SKILL_BOOST if term in KNOWN_SKILLS else 1.0 for term in vocab], dtype=np.float32)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+    return ((tf * (BM25_K1 + 1)) / (tf + norm[:, None]) * idf * boost).sum(axis=1)
+
+
+def _drop_covered(keywords):
+    # "a/b testing" already says "testing": don't list both
+    phrases = [k for k in keywords if " " in k]
+    return [k for k in keywords if " " in k or not any(k in p.split() for p in phrases)]
+
+
+def local_feedback(prescore_result):
+    """
+    Feedback dict (same shape as the model's) from a pre-score alone, for local-only triage: no resume
+    score or bullet rewrites, keyword matches as strengths, missing keywords as improvement areas.
+    """
+    return {
+        "resume_score": {"score": 0, "bucket": "N/A"},
+        "match_score": dict(prescore_result["match_score"]),
+        "strengths": [f"JD keyword match: {k}" for k in prescore_result["matched_keywords"][:5]],
+        "improvement_areas": [
+            {"area": f"Missing keyword: {k}", "suggestion": f"If you have experience with {k}, name it explicitly in a bullet or your skills section."}
+            for k in prescore_result["missing_keywords"][:5]
+        ],
+        "rewritten_bullets": [],
+        "missing_keywords": list(prescore_result["missing_keywords"]),
+    }
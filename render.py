@@ -0,0 +1,347 @@
+# render.py
+import json
+from datetime import date
+from html import escape
+
+# === FEEDBACK MODEL ===
+_NO_SCORE = (0, "N/A")
+
+
+def _score(info):
+    """(score out of 100, bucket) from a {"score", "bucket"} dict, with safe defaults."""
+    if not isinstance(info, dict):
+        return _NO_SCORE
+    score = info.get("score", 0)
+    if not isinstance(score, int):
+        try:
+            score = round(float(score))
+        except (TypeError, ValueError):
+            score = 0
+    return max(0, min(100, score)), str(info.get("bucket", "N/A"))
+
+
+def _texts(value):
+    if isinstance(value, str):
+        return (value,)
+    return tuple(map(str, value)) if isinstance(value, (list, tuple)) else ()
+
+
+def _pairs(value, first, second):
+    # Normalized sections are lists of dicts; anything else is shown as the first field
+    if not isinstance(value, (list, tuple)):
+        return ()
+    return tuple([
+        (str(item.get(first) or ""), str(item.get(second) or "")) if isinstance(item, dict) else (str(item), "")
+        for item in value
+    ])
+
+
+# Feedback key -> (FeedbackView attribute, converter, extra converter args)
+_SECTIONS = (
+    ("resume_score", "resume_score", _score, ()),
+    ("match_score", "match_score", _score, ()),
+    ("strengths", "strengths", _texts, ()),
+    ("improvement_areas", "improvements", _pairs, ("area", "suggestion")),
+    ("rewritten_bullets", "rewrites", _pairs, ("original", "rewritten")),
+)
+
+
+class FeedbackView:
+    """
+    A normalized feedback dict read once into the shape every output format renders: scores are
+    (score out of 100, bucket), lists are tuples of strings. In a partial() view (feedback still
+    streaming in) sections that have not arrived are None.
+    `render(fmt)` renders a format on first use and keeps the result (see RENDERERS); while
+    streaming, update() the same view so each section's HTML is rendered once.
+    """
+
+    __slots__ = ("resume_score", "match_score", "strengths", "improvements", "rewrites", "_rendered")
+
+    def __init__(self, feedback):
+        self.resume_score = _score(feedback.get("resume_score"))
+        self.match_score = _score(feedback.get("match_score"))
+        self.strengths = _texts(feedback.get("strengths"))
+        self.improvements = _pairs(feedback.get("improvement_areas"), "area", "suggestion")
+        self.rewrites = _pairs(feedback.get("rewritten_bullets"), "original", "rewritten")
+        self._rendered = {}
+
+    @classmethod
+    def partial(cls, sections):
+        """A view of feedback still streaming in: the sections that have not arrived are None."""
+        view = cls(sections)
+        for key, slot, _, _ in _SECTIONS:
+            if key not in sections:
+                setattr(view, slot, None)
+        return view
+
+    def update(self, sections, complete=False):
+        """
+        Applies newly arrived sections; HTML cached for unchanged sections is kept (see _section_html).
+        `complete=True` means `sections` is the whole feedback: missing sections get their defaults.
+        """
+        for key, slot, convert, args in _SECTIONS:
+            if key in sections or complete:
+                value = convert(sections.get(key), *args)
+                if value != getattr(self, slot):
+                    setattr(self, slot, value)
+                    self._rendered.pop(slot, None)
+        for fmt in RENDERERS:
+            self._rendered.pop(fmt, None)
+
+    def render(self, fmt):
+        if fmt not in self._rendered:
+            self._rendered[fmt] = RENDERERS[fmt](self)
+        return self._rendered[fmt]
+
+    def to_dict(self):
+        """The view as plain JSON-able data (sections not yet arrived are left out)."""
+        data = {}
+        for key, score in (("resume_score", self.resume_score), ("match_score", self.match_score)):
+            if score is not None:
+                data[key] = {"score": score[0], "bucket": score[1]}
+        if self.match_score is not None:
+            data["match_score_10"] = round(self.match_score[0] / 10, 1)
+        if self.strengths is not None:
+            data["strengths"] = list(self.strengths)
+        if self.improvements is not None:
+            data["improvement_areas"] = [{"area": a, "suggestion": s} for a, s in self.improvements]
+        if self.rewrites is not None:
+            data["rewritten_bullets"] = [{"original": o, "rewritten": r} for o, r in self.rewrites]
+        return data
+
+
+# === TEMPLATES ===
+def _flatten(template):
+    # One line without the source indentation
+    return " ".join(line.strip() for line in template.strip().splitlines())
+
+
+def _split(template):
+    """A card template's (opening, closing) halves around its {items}, to append around the items."""
+    opening, closing = _flatten(template).split("{items}")
+    return opening, closing
+
+
+# str.format templates; every model-supplied value goes through escape() before it is formatted into them
+_SCORE_BLOCK = _flatten("""
+    <div{wrapper}>
+        <h3 style='font-weight: 700; color: var(--color-text-dark); margin-bottom: 0.5rem;'>🎯 {title}:
+            <span style='color: var(--color-accent-500); font-size: 1.4rem;'>{value}</span>
+        </h3>
+        <div class='score-progress'><div class='score-progress-fill' style='width:{pct}%; background:var(--color-accent-500);'></div></div>
+    </div>
+""")
+_PENDING_BLOCK = _flatten("""
+    <div style='margin-bottom: 1.5rem; color: var(--color-text-medium);'>⏳ {title}: generating…</div>
+""")
+_SCORES_CARD = _split("""
+    <div class='output-card'>
+        <h2>📊 Performance Scores</h2>
+        <hr style='border: 0; border-top: 1px solid #e0e0e0; margin-bottom: 1.5rem;'/>
+        {items}
+    </div>
+""")
+_PENDING_CARD = _flatten("""
+    <div class='output-card'><h3 style='color: var(--color-text-medium);'>⏳ {title}</h3>
+    <p style='color: var(--color-text-medium);'>Generating…</p></div>
+""")
+_STRENGTH_LABELED = _flatten("""
+    <li style='margin-bottom: 0.75rem;'>💎 <span style='font-weight: 700; color: var(--color-success);'>{label}:</span>
+    <span style='font-weight: 500; color: var(--color-text-dark);'>{text}</span></li>
+""")
+_STRENGTH_PLAIN = _flatten("""
+    <li style='margin-bottom: 0.75rem;'>💎 <span style='font-weight: 500; color: var(--color-text-dark);'>{text}</span></li>
+""")
+_STRENGTHS_CARD = _split("""
+    <div class='output-card strengths-section'>
+        <h3 style='font-weight: 700; color: var(--color-success); margin-bottom: 1.5rem;'>💎 Strengths</h3>
+        <ul style='list-style-type: none; padding-left: 0; margin-top: 1rem;'>{items}</ul>
+    </div>
+""")
+_IMPROVEMENT_ITEM = _flatten("""
+    <li style='margin-bottom: 0.75rem; font-weight: 500; color: var(--color-text-dark);'>🛠️
+    <span style='font-weight: 600; color: var(--color-accent-500);'>{area}</span>: {suggestion}</li>
+""")
+_IMPROVEMENTS_CARD = _split("""
+    <div class='output-card'>
+        <h3 style='font-weight: 700; color: var(--color-accent-500); margin-bottom: 1.5rem;'>🛠️ Key Areas for Improvement</h3>
+        <ul style='color: var(--color-text-dark); list-style-type: none; padding-left: 0; margin-top: 1rem;'>{items}</ul>
+    </div>
+""")
+_REWRITE_ITEM = _flatten("""
+    <div class='bullet-pointer'>
+        <p style='margin-bottom: 0.5rem; font-size: 0.95rem; line-height: 1.4;'>
+            <span style='font-weight: 700; color: var(--color-accent-500);'>📝 Original:</span>
+            <span style='font-weight: 500; color: var(--color-text-dark);'>{original}</span>
+        </p>
+        <p style='font-size: 1.0rem; line-height: 1.4;'>
+            <span style='font-weight: 700; color: var(--color-success);'>💡 Rewritten:</span>
+            <span style='font-weight: 500; color: var(--color-text-dark);'>{rewritten}</span>
+        </p>
+    </div>
+""")
+_REWRITES_CARD = _split("""
+    <div class='output-card'>
+        <h2 style='color: var(--color-text-dark); margin-top: 0; font-size: 1.6rem; font-weight: 700;'>📝 Rewritten Resume Bullets</h2>
+        <p style='margin-bottom: 1.5rem; color: var(--color-text-medium); font-size: 1rem;'>Use these suggestions to immediately improve your resume's impact.</p>
+        {items}
+    </div>
+""")
+_KEYWORD_ITEM = _flatten("""
+    <li style='margin-bottom: 0.5rem; font-weight: 500; color: var(--color-text-dark);'>🔑 {keyword}</li>
+""")
+_NO_KEYWORDS = "<li style='color: var(--color-text-medium);'>None. Your resume mentions the JD's key terms.</li>"
+_KEYWORDS_CARD = _split("""
+    <div class='output-card'>
+        <h3 style='font-weight: 700; color: var(--color-accent-500); margin-bottom: 1rem;'>🔎 JD Keywords Missing From Your Resume</h3>
+        <p style='color: var(--color-text-medium);'>Quick keyword check while the full analysis runs.</p>
+        <ul style='list-style-type: none; padding-left: 0; margin-top: 1rem;'>{items}</ul>
+    </div>
+""")
+_WRAPPER_SPACED = " style='margin-bottom: 1.5rem;'"
+_PENDING_CARDS = {
+    slot: _PENDING_CARD.format(title=title) for slot, title in (
+        ("strengths", "💎 Strengths"),
+        ("improvements", "🛠️ Key Areas for Improvement"),
+        ("rewrites", "📝 Rewritten Resume Bullets"),
+    )
+}
+
+
+# === HTML ===
+# Each section appends its pieces to one `out` list, joined once per render (no nested copies)
+def _score_html(title, score, out_of_10=False, spaced=True):
+    if score is None:
+        return _PENDING_BLOCK.format(title=title)
+    value = f"{score[0] / 10:.1f}/10" if out_of_10 else f"{score[0]}/100"
+    return _SCORE_BLOCK.format(
+        wrapper=_WRAPPER_SPACED if spaced else "", title=title,
+        value=f"{value} ({escape(score[1])})", pct=score[0],
+    )
+
+
+def _scores_html(out, view, match_score=None, match_title="Match Score"):
+    out += (
+        _SCORES_CARD[0],
+        _score_html("Resume Score", view.resume_score),
+        _score_html(match_title, view.match_score if match_score is None else match_score, out_of_10=True, spaced=False),
+        _SCORES_CARD[1],
+    )
+
+
+def _strengths_html(out, strengths):
+    out.append(_STRENGTHS_CARD[0])
+    for strength in strengths:
+        label, colon, text = strength.partition(":")
+        if colon:
+            out.append(_STRENGTH_LABELED.format(label=escape(label), text=escape(text.strip())))
+        else:
+            out.append(_STRENGTH_PLAIN.format(text=escape(strength)))
+    out.append(_STRENGTHS_CARD[1])
+
+
+def _improvements_html(out, improvements):
+    out.append(_IMPROVEMENTS_CARD[0])
+    out += [
+        _IMPROVEMENT_ITEM.format(area=escape(area), suggestion=escape(suggestion)) for area, suggestion in improvements
+    ]
+    out.append(_IMPROVEMENTS_CARD[1])
+
+
+def _rewrites_html(out, rewrites):
+    out.append(_REWRITES_CARD[0])
+    out += [
+        _REWRITE_ITEM.format(original=escape(original), rewritten=escape(rewritten)) for original, rewritten in rewrites
+    ]
+    out.append(_REWRITES_CARD[1])
+
+
+def _keywords_html(out, prescore):
+    keywords = prescore.get("missing_keywords", [])
+    out.append(_KEYWORDS_CARD[0])
+    out += [_KEYWORD_ITEM.format(keyword=escape(str(keyword))) for keyword in keywords] if keywords else [_NO_KEYWORDS]
+    out.append(_KEYWORDS_CARD[1])
+
+
+_SECTION_HTML = (("strengths", _strengths_html), ("improvements", _improvements_html), ("rewrites", _rewrites_html))
+
+
+def _section_html(out, view, slot, render_section):
+    # A list section's HTML is kept on the view until update() changes that section
+    html = view._rendered.get(slot)
+    if html is None:
+        section_out = []
+        render_section(section_out, getattr(view, slot))
+        html = view._rendered[slot] = "".join(section_out)
+    out.append(html)
+
+
+def html_report(view):
+    out = ["<div>"]
+    _scores_html(out, view)
+    for slot, render_section in _SECTION_HTML:
+        _section_html(out, view, slot, render_section)
+    out.append("</div>")
+    return "".join(out)
+
+
+def partial_html(view, prescore=None):
+    """
+    HTML for a partial view: arrived sections as in html_report, the rest as placeholders. Until the
+    model's match score arrives, the local `prescore` (if any) stands in for it, with its missing keywords.
+    """
+    out = ["<div>"]
+    if view.match_score is None and prescore is not None:
+        _scores_html(out, view, _score(prescore["match_score"]), "Match Score (provisional)")
+    else:
+        _scores_html(out, view)
+    if prescore is not None:
+        cached = view._rendered.get("keywords")
+        if cached is None or cached[0] is not prescore:
+            keywords_out = []
+            _keywords_html(keywords_out, prescore)
+            cached = view._rendered["keywords"] = (prescore, "".join(keywords_out))
+        out.append(cached[1])
+    for slot, render_section in _SECTION_HTML:
+        if getattr(view, slot) is None:
+            out.append(_PENDING_CARDS[slot])
+        else:
+            _section_html(out, view, slot, render_section)
+    out.append("</div>")
+    return "".join(out)
+
+
+# === MARKDOWN / JSON ===
+def markdown_report(view):
+    """The downloadable report."""
+    resume_score, resume_bucket = view.resume_score or _NO_SCORE
+    match_score, match_bucket = view.match_score or _NO_SCORE
+    md = [
+        "# Career Buddy Resume Analysis\n",
+        f"**Date:** {date.today().isoformat()}\n",
+        "## 📊 Scores",
+        f"- **Resume Score (Best Practices):** {resume_score}/100 ({resume_bucket})",
+        f"- **Match Score (Against JD):** {match_score / 10:.1f}/10 ({match_bucket})\n",
+        "## 💎 Strengths\n",
+    ]
+    md += [f"* {strength}" for strength in view.strengths or ()]
+    md.append("\n## 🛠️ Areas of Improvement\n")
+    md += [f"* **{area or 'General'}**: {suggestion}" for area, suggestion in view.improvements or ()]
+    md.append("\n## 📝 Rewritten Resume Bullets\n")
+    for original, rewritten in view.rewrites or ():
+        md += ["---", f"**Original:** {original}", f"**Rewritten:** {rewritten}"]
+    return "\n".join(md)
+
+
+def json_report(view):
+    return json.dumps(view.to_dict(), ensure_ascii=False)
+
+
+# Output formats by name; a new format is one function of a FeedbackView added here
+RENDERERS = {"html": html_report, "markdown": markdown_report, "json": json_report}
+
+
+def render(feedback, fmt):
+    """Renders a normalized feedback dict (or a FeedbackView) as `fmt`, one of RENDERERS."""
+    view = feedback if isinstance(feedback, FeedbackView) else FeedbackView(feedback)
+    return view.render(fmt)
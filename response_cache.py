@@ -0,0 +1,88 @@
+# response_cache.py
+import json
+import os
+from cache import LRUCache, SQLiteCache, TieredCache, content_hash
+from prompts import PROMPT
+
+# === CONFIGURATION ===
+RESPONSE_CACHE_BACKEND = os.environ.get("CAREER_BUDDY_RESPONSE_CACHE", "memory")  # memory | sqlite | off
+RESPONSE_CACHE_PATH = os.environ.get("CAREER_BUDDY_RESPONSE_CACHE_PATH", "career_buddy_cache.sqlite3")
+RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+RESPONSE_CACHE_MAX_ITEMS = 2000
+RESPONSE_CACHE_MAX_MB = 16
+
+PROMPT_HASH = content_hash(PROMPT)
+
+
+def _normalize_text(text):
+    # Whitespace-only differences (copy/paste, re-extraction) should not miss the cache
+    return " ".join((text or "").split())
+
+
+def _normalize_years(years_experience):
+    try:
+        return f"{float(years_experience):g}"
+    except (TypeError, ValueError):
+        return str(years_experience)
+
+
+def response_cache_key(jd_text, resume_text, domain, years_experience, model_name, prompt_hash=PROMPT_HASH):
+    """
+    Cache key over everything that determines the model's answer.
+    """
+    return content_hash(
+        _normalize_text(jd_text),
+        _normalize_text(resume_text),
+        _normalize_text(domain or "General").lower(),
+        _normalize_years(years_experience),
+        model_name,
+        prompt_hash,
+    )
+
+
+class ResponseCache:
+    """
+    Stores normalized feedback dicts as JSON on top of a pluggable backend (LRUCache or SQLiteCache).
+    Every `get` returns a fresh dict, so callers may mutate it freely.
+    """
+
+    def __init__(self, backend):
+        self._cache = TieredCache(backend)
+
+    def get(self, key):
+        value = self._cache.get(key)
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+
+    def set(self, key, feedback):
+        self._cache.set(key, json.dumps(feedback, ensure_ascii=False))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def make_response_cache(backend=RESPONSE_CACHE_BACKEND):
+    """
+    Build the configured response cache, or None when caching is turned off.
+    """
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return ResponseCache(SQLiteCache(
+            RESPONSE_CACHE_PATH, max_items=RESPONSE_CACHE_MAX_ITEMS, ttl=RESPONSE_CACHE_TTL_SECONDS,
+        ))
+    return ResponseCache(LRUCache(
+        max_bytes=RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+        max_items=RESPONSE_CACHE_MAX_ITEMS,
+        ttl=RESPONSE_CACHE_TTL_SECONDS,
+    ))
+
+
+response_cache = make_response_cache()
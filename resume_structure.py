@@ -0,0 +1,160 @@
+# resume_structure.py
+import re
+from prescore import bm25_rank
+
+# === CONFIGURATION ===
+COMPACT_TOP_K = 8  # candidate bullets sent in compact prompts (the model rewrites 4 of them)
+SUMMARY_MAX_WORDS = 80
+SECTION_MAX_WORDS = 60  # skills / education / certifications in the condensed profile
+
+# Heading text (lowercased, without trailing ":") -> canonical section
+SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "professional summary": "summary", "about me": "summary",
+    "objective": "summary", "career objective": "summary",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "relevant experience": "experience", "career history": "experience",
+    "projects": "projects", "personal projects": "projects", "key projects": "projects",
+    "education": "education", "academic background": "education",
+    "skills": "skills", "technical skills": "skills", "core competencies": "skills", "key skills": "skills",
+    "tools": "skills", "technologies": "skills",
+    "certifications": "certifications", "certificates": "certifications", "licenses": "certifications",
+    "awards": "awards", "achievements": "awards", "honors": "awards",
+    "publications": "publications", "volunteering": "volunteering", "volunteer experience": "volunteering",
+    "languages": "languages", "interests": "interests",
+}
+BULLET_SECTIONS = ("experience", "projects", "volunteering", "awards")
+
+_BULLET_MARKER = re.compile(r"^\s*(?:[•●▪◦‣∙·○■□➢➤►\-–—*]|\d{1,2}[.)])\s+")
+_DATE_RANGE = re.compile(r"\b(?:19|20)\d{2}\b|\bpresent\b|\bcurrent\b", re.I)
+_INLINE_HEADING = re.compile(r"^([A-Za-z][A-Za-z &]{2,30}):\s*(\S.*)$")
+_DANGLING = (",", "&", " and", " or", " of", " to", " with", " for", " the", " a", " in", " on", " by")
+
+
+def _heading(line):
+    """Returns (section, rest_of_line) for "EXPERIENCE" or "Skills: SQL, Python" lines, else (None, line)."""
+    key = line.strip().rstrip(":").strip().lower()
+    if key in SECTION_HEADINGS:
+        return SECTION_HEADINGS[key], ""
+    inline = _INLINE_HEADING.match(line.strip())
+    if inline and inline.group(1).strip().lower() in SECTION_HEADINGS:
+        return SECTION_HEADINGS[inline.group(1).strip().lower()], inline.group(2)
+    return None, line
+
+
+def _continues(bullet_text, line):
+    # A wrapped line starts lowercase (or with a number), or the bullet above stops mid-phrase
+    return line[0].islower() or line[0].isdigit() or bullet_text.rstrip().lower().endswith(_DANGLING)
+
+
+def _is_role_line(line):
+    # "Company - Title (2019-2022)": short, dated, no sentence-ending punctuation
+    return bool(_DATE_RANGE.search(line)) and len(line.split()) <= 14 and not line.rstrip().endswith(".")
+
+
+def segment_resume(text):
+    """
+    Splits resume text into sections and bullets.
+    Returns {"header": [lines], "sections": {name: [lines]}, "roles": [lines],
+             "bullets": [{"section", "text", "index", "lines"}], "line_sections": [section_or_None]};
+    sections keep their order of appearance; "lines" / "line_sections" index `text.splitlines()`.
+    Bullets are marked lines (•, -, 1. ...) and, inside experience-like sections, unmarked lines
+    long enough to be one; wrapped lines (PDF extraction) are joined onto the bullet above.
+    """
+    header, sections, roles, bullets, line_sections = [], {}, [], [], []
+    section = None
+    current = None  # bullet still open for wrapped continuation lines
+    for line_no, raw_line in enumerate((text or "").splitlines()):
+        line = raw_line.strip()
+        if not line:
+            line_sections.append(section)
+            current = None
+            continue
+        name, line = _heading(line)
+        line_sections.append(name or section)
+        if name:
+            section, current = name, None
+            sections.setdefault(section, [])
+            if not line:
+                continue
+        if section is None:
+            header.append(line)
+            continue
+        sections[section].append(line)
+
+        marked = _BULLET_MARKER.match(line)
+        if marked:
+            current = {"section": section, "text": line[marked.end():].strip(), "index": len(bullets), "lines": [line_no]}
+            bullets.append(current)
+        elif section in BULLET_SECTIONS and _is_role_line(line):
+            roles.append(line)
+            current = None
+        elif current is not None and _continues(current["text"], line):
+            current["text"] = f"{current['text']} {line}"  # wrapped continuation
+            current["lines"].append(line_no)
+        elif section in BULLET_SECTIONS and len(line.split()) >= 6:
+            current = {"section": section, "text": line, "index": len(bullets), "lines": [line_no]}
+            bullets.append(current)
+        else:
+            current = None
+    return {"header": header, "sections": sections, "roles": roles, "bullets": bullets, "line_sections": line_sections}
+
+
+def resume_units(text, structure):
+    """
+    The resume as comparable units, in order: one [section, text] per bullet (wrapped lines joined,
+    marker dropped) and one per other non-empty line. `structure` is segment_resume(text).
+    """
+    bullet_at = {bullet["lines"][0]: bullet for bullet in structure["bullets"]}
+    in_bullet = {i for bullet in structure["bullets"] for i in bullet["lines"]}
+    units = []
+    for i, line in enumerate((text or "").splitlines()):
+        if i in bullet_at:
+            units.append([bullet_at[i]["section"], bullet_at[i]["text"]])
+        elif i not in in_bullet and line.strip():
+            units.append([structure["line_sections"][i], line.strip()])
+    return units
+
+
+def rank_bullets(jd_text, bullets):
+    """Bullets sorted by BM25 relevance to the JD (ties keep resume order)."""
+    if not bullets:
+        return []
+    scores = bm25_rank(jd_text, [b["text"] for b in bullets])
+    order = sorted(range(len(bullets)), key=lambda i: (-float(scores[i]), i))
+    return [dict(bullets[i], score=round(float(scores[i]), 4)) for i in order]
+
+
+def _clip_words(lines, max_words):
+    words = " ".join(lines).split()
+    clipped = " ".join(words[:max_words])
+    return clipped + (" …" if len(words) > max_words else "")
+
+
+def compact_resume(jd_text, resume_text, top_k=COMPACT_TOP_K, structure=None):
+    """
+    Condensed resume for compact prompts: summary, roles, skills/education and only the `top_k`
+    bullets most relevant to the JD. Returns the full text unchanged when condensing would not
+    drop anything (no detectable bullets, or at most `top_k` of them).
+    `structure` is segment_resume(resume_text), if already known.
+    """
+    structure = structure or segment_resume(resume_text)
+    bullets = structure["bullets"]
+    if len(bullets) <= top_k:
+        return resume_text
+    top = sorted(rank_bullets(jd_text, bullets)[:top_k], key=lambda b: b["index"])
+
+    sections = structure["sections"]
+    lines = [f"(Condensed resume: profile plus the {top_k} bullets most relevant to the JD; "
+             f"{len(bullets) - top_k} other bullets omitted.)"]
+    lines += structure["header"][:2]
+    if sections.get("summary"):
+        lines.append(f"SUMMARY: {_clip_words(sections['summary'], SUMMARY_MAX_WORDS)}")
+    if structure["roles"]:
+        lines.append("ROLES: " + " | ".join(structure["roles"]))
+    for name in ("skills", "education", "certifications"):
+        if sections.get(name):
+            lines.append(f"{name.upper()}: {_clip_words(sections[name], SECTION_MAX_WORDS)}")
+    lines.append("KEY BULLETS:")
+    lines += [f"- {b['text']}" for b in top]
+    return "\n".join(lines)
@@ -0,0 +1,408 @@
+# scheduler.py
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+import metrics
+from json_repair import loads_tolerant
+from llm import LLMError
+from metrics import percentile
+
+# === CONFIGURATION ===
+# Whole-call budget, across hedges and retries (each attempt also has the transport timeout in llm.py)
+DEADLINE_SECONDS = float(os.environ.get("CAREER_BUDDY_MODEL_DEADLINE", "120"))
+# A duplicate request is fired once a call runs past this percentile of recent latencies
+# (time to first chunk for streams); the first valid answer wins and the other is cancelled
+HEDGE = os.environ.get("CAREER_BUDDY_HEDGE", "1") != "0"
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20  # no hedging until the percentile means something
+HEDGE_MIN_DELAY_SECONDS = 0.1  # never hedge sooner, however fast recent calls were
+HEDGE_BUDGET = 0.1  # at most this share of recent calls may be hedged, so a slow backend isn't doubled
+LATENCY_WINDOW = 200  # recent calls the percentile and the hedge budget look at
+# Transient errors are retried with exponential backoff and full jitter
+RETRIES = int(os.environ.get("CAREER_BUDDY_MODEL_RETRIES", "2"))
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+# After this many consecutive failures the primary model is skipped (calls go to the fallback tier)
+# for BREAKER_COOLDOWN_SECONDS, then one trial call decides whether it is back
+BREAKER_FAILURES = int(os.environ.get("CAREER_BUDDY_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get("CAREER_BUDDY_BREAKER_COOLDOWN", "30"))
+
+# google.api_core.exceptions worth retrying, matched by name so the SDK is not imported here
+_RETRYABLE_API_ERRORS = frozenset((
+    "TooManyRequests", "ResourceExhausted", "InternalServerError", "ServiceUnavailable", "GatewayTimeout",
+    "DeadlineExceeded",
+))
+_END = object()  # a stream that ended before its first chunk
+# (ScheduledBackend, model_name of the client that answered) for the current context's latest call
+_answered_by = contextvars.ContextVar("answered_by", default=None)
+
+
+def is_retryable(error):
+    """True for transient backend failures: rate limits, 5xx, timeouts, dropped connections."""
+    if isinstance(error, LLMError):
+        return error.retryable
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in _RETRYABLE_API_ERRORS
+
+
+def answered_by(backend):
+    """
+    model_name of the client that answered the caller's latest call to `backend`: for a
+    ScheduledBackend with an open circuit that is its fallback's, otherwise `backend.model_name`.
+    """
+    answered = _answered_by.get()
+    if answered is not None and answered[0] is backend:
+        return answered[1]
+    return backend.model_name
+
+
+def _is_valid(text):
+    return bool(text) and loads_tolerant(text)[0] is not None
+
+
+class LatencyTracker:
+    """Recent call latencies, for the hedging threshold."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """`pct` percentile of recent latencies, or None with fewer than HEDGE_MIN_SAMPLES."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        return percentile(samples, pct)
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through. open (after `failures` consecutive failures): calls are refused for
+    `cooldown` seconds. half-open: one trial call goes through; its outcome closes or reopens.
+    A trial that ends without an outcome (cancelled, see `release`) or reports none within
+    `trial_timeout` seconds is handed to the next caller.
+    """
+
+    def __init__(self, name, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN_SECONDS, trial_timeout=DEADLINE_SECONDS):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.trial_timeout = trial_timeout
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial_at = None  # when the current half-open trial started; None: no trial running
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open":
+                if now - self._opened_at < self.cooldown:
+                    return False
+                self._set("half_open")
+            elif self._trial_at is not None and now - self._trial_at < self.trial_timeout:
+                return False  # half-open, trial still running
+            self._trial_at = now  # this caller is the trial
+            return True
+
+    def release(self):
+        """A call ended without an outcome (cancelled): a half-open trial slot goes to the next caller."""
+        with self._lock:
+            if self.state == "half_open":
+                self._trial_at = None
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self._consecutive = 0
+                if self.state != "closed":
+                    self._set("closed")
+                return
+            self._consecutive += 1
+            if self.state == "half_open" or (self.state == "closed" and self._consecutive >= self.failures):
+                self._opened_at = time.monotonic()
+                self._set("open")
+
+    def _set(self, state):
+        self._trial_at = None
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        metrics.inc("circuit_breaker_transitions_total", model=self.name, state=state)
+        self.state = state
+
+
+class ScheduledBackend:
+    """
+    Wraps a backend client (see llm.BACKENDS) with the same interface, scheduling each call:
+      - a deadline for the whole call (hedges and retries included)
+      - a hedged duplicate once the call runs past the recent p95, first valid answer wins
+      - jittered exponential-backoff retries of transient errors
+      - a circuit breaker that sends calls to `fallback` (a faster tier) while the primary keeps failing
+    Hedging needs the async API. The sync `generate` retries and uses the breaker, but it cannot
+    interrupt a running attempt (those stop at the transport timeout): its deadline only stops retries.
+    """
+
+    def __init__(self, primary, fallback=None, deadline=DEADLINE_SECONDS, hedge=HEDGE, retries=RETRIES):
+        self.primary = primary
+        self.fallback = fallback
+        self.model_name = primary.model_name
+        self.supports_response_schema = getattr(primary, "supports_response_schema", False)
+        self.deadline = deadline
+        self.hedge = hedge
+        self.retries = retries
+        self.breaker = CircuitBreaker(primary.model_name, trial_timeout=deadline)
+        self.latency = LatencyTracker()
+        self.ttfb = LatencyTracker()
+        self._hedged = deque(maxlen=LATENCY_WINDOW)  # per call: was it hedged
+        self._lock = threading.Lock()
+        self._cleanup = set()  # tasks closing abandoned streams
+
+    def warm_up(self):
+        for client in (self.primary, self.fallback):
+            if client is not None and hasattr(client, "warm_up"):
+                client.warm_up()
+
+    # --- scheduling ---
+    def _client(self):
+        """The client for the next attempt; see `answered_by`."""
+        if self.breaker.allow():
+            client = self.primary
+        elif self.fallback is None:
+            raise LLMError(f"{self.model_name} is failing; circuit open", retryable=True)
+        else:
+            metrics.inc("model_fallbacks_total", model=self.model_name, fallback=self.fallback.model_name)
+            client = self.fallback
+        _answered_by.set((self, client.model_name))
+        return client
+
+    def _record(self, client, ok):
+        if client is self.primary:
+            self.breaker.record(ok)
+
+    def _release(self, client):
+        if client is self.primary:
+            self.breaker.release()
+
+    def _kwargs(self, client, response_schema):
+        if response_schema is not None and getattr(client, "supports_response_schema", False):
+            return {"response_schema": response_schema}
+        return {}
+
+    def _hedge_delay(self, tracker):
+        """Seconds after which to hedge this call, or None (no hedging)."""
+        threshold = tracker.percentile(HEDGE_PERCENTILE) if self.hedge else None
+        with self._lock:
+            allowed = sum(self._hedged) < HEDGE_BUDGET * max(1, len(self._hedged))
+            self._hedged.append(False)
+        if threshold is None or not allowed:
+            return None
+        return max(HEDGE_MIN_DELAY_SECONDS, threshold)
+
+    def _mark_hedged(self):
+        with self._lock:
+            if self._hedged:
+                self._hedged[-1] = True
+        metrics.inc("model_hedges_total", model=self.model_name)
+
+    def _deadline_error(self):
+        metrics.inc("model_deadline_exceeded_total", model=self.model_name)
+        return LLMError(f"Model call exceeded its {self.deadline:g}s deadline")
+
+    def _backoff(self, attempt):
+        metrics.inc("model_retries_total", model=self.model_name)
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+    async def _with_retries(self, attempt_fn, deadline):
+        attempt = 0
+        while True:
+            try:
+                return await attempt_fn(self._client())
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                print(f"⚠️ Model call failed ({type(e).__name__}: {e}); retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    # --- one-shot calls ---
+    def generate(self, prompt, response_schema=None):
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            client = self._client()
+            try:
+                text = client.generate(prompt, **self._kwargs(client, response_schema))
+            except Exception as e:
+                self._record(client, False)
+                attempt += 1
+                if attempt > self.retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                print(f"⚠️ Model call failed ({type(e).__name__}: {e}); retry {attempt} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self._record(client, True)
+            return text
+
+    async def _call(self, client, prompt, response_schema):
+        start = time.monotonic()
+        try:
+            text = await client.generate_async(prompt, **self._kwargs(client, response_schema))
+        except asyncio.CancelledError:
+            self._release(client)  # a hedge lost, or the caller went away: no verdict on the model
+            raise
+        except Exception:
+            self._record(client, False)
+            raise
+        self._record(client, True)
+        if client is self.primary:
+            self.latency.observe(time.monotonic() - start)
+        return text
+
+    async def _hedged_call(self, client, prompt, response_schema, deadline):
+        start = time.monotonic()
+        hedge_after = self._hedge_delay(self.latency)
+        pending = {asyncio.ensure_future(self._call(client, prompt, response_schema))}
+        invalid, error = None, None
+        try:
+            while pending:
+                timeout = deadline - time.monotonic()
+                if hedge_after is not None:
+                    timeout = min(timeout, start + hedge_after - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, timeout), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if time.monotonic() >= deadline:
+                        self._record(client, False)
+                        raise self._deadline_error()
+                    hedge_after = None
+                    self._mark_hedged()
+                    pending.add(asyncio.ensure_future(self._call(client, prompt, response_schema)))
+                    continue
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif _is_valid(task.result()):
+                        return task.result()
+                    elif invalid is None:
+                        invalid = task.result()
+            if invalid is not None:
+                return invalid  # both answers were unusable: let the caller's repair path have it
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_async(self, prompt, response_schema=None):
+        deadline = time.monotonic() + self.deadline
+        return await self._with_retries(
+            lambda client: self._hedged_call(client, prompt, response_schema, deadline), deadline
+        )
+
+    # --- streams ---
+    async def _first_chunk(self, stream):
+        try:
+            return await stream.__anext__()
+        except StopAsyncIteration:
+            return _END
+
+    async def _discard(self, task, stream):
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        try:
+            await stream.aclose()
+        except Exception:
+            pass
+
+    def _abandon(self, task, stream):
+        cleanup = asyncio.ensure_future(self._discard(task, stream))
+        self._cleanup.add(cleanup)
+        cleanup.add_done_callback(self._cleanup.discard)
+
+    async def _open_stream(self, client, prompt, response_schema, deadline):
+        """Starts the stream (hedged on time to first chunk). Returns (client, stream, first_chunk_or__END)."""
+        start = time.monotonic()
+        hedge_after = self._hedge_delay(self.ttfb)
+        streams = {}  # first-chunk task -> stream
+
+        def launch():
+            stream = client.generate_stream_async(prompt, **self._kwargs(client, response_schema))
+            streams[asyncio.ensure_future(self._first_chunk(stream))] = stream
+
+        launch()
+        error = None
+        try:
+            while streams:
+                timeout = deadline - time.monotonic()
+                if hedge_after is not None:
+                    timeout = min(timeout, start + hedge_after - time.monotonic())
+                done, _ = await asyncio.wait(list(streams), timeout=max(0.0, timeout), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if time.monotonic() >= deadline:
+                        self._record(client, False)
+                        raise self._deadline_error()
+                    hedge_after = None
+                    self._mark_hedged()
+                    launch()
+                    continue
+                for task in done:
+                    stream = streams.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        self._record(client, False)
+                        continue
+                    if client is self.primary:
+                        self.ttfb.observe(time.monotonic() - start)
+                    return client, stream, task.result()
+            raise error
+        except asyncio.CancelledError:
+            self._release(client)
+            raise
+        finally:
+            for task, stream in streams.items():
+                self._abandon(task, stream)
+
+    async def generate_stream_async(self, prompt, response_schema=None):
+        # Hedges and retries happen before the first chunk; once text has been yielded the stream is committed.
+        # The deadline is on the model: time the consumer spends between chunks pushes it back
+        deadline = time.monotonic() + self.deadline
+        client, stream, chunk = await self._with_retries(
+            lambda client: self._open_stream(client, prompt, response_schema, deadline), deadline
+        )
+        try:
+            while chunk is not _END:
+                yielded_at = time.monotonic()
+                yield chunk
+                deadline += time.monotonic() - yielded_at
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._deadline_error()
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    chunk = _END
+                except TimeoutError:
+                    raise self._deadline_error()
+        except (asyncio.CancelledError, GeneratorExit):
+            self._release(client)  # cancelled, or the consumer stopped reading
+            raise
+        except Exception:
+            self._record(client, False)
+            raise
+        finally:
+            await stream.aclose()
+        self._record(client, True)
@@ -0,0 +1,10 @@
+# conftest.py
+import os
+import sys
+
+# The modules live flat at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never reach a real model, and skip the start-up warm-up
+os.environ.setdefault("CAREER_BUDDY_LLM_BACKEND", "fake")
+os.environ.setdefault("CAREER_BUDDY_WARMUP", "0")
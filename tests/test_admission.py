@@ -0,0 +1,201 @@
+# test_admission.py
+import asyncio
+import ipaddress
+import pytest
+import admission
+from admission import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, InFlight, ModelSlots, Overloaded, RateLimiter, charge, client_address,
+    track_model_calls,
+)
+
+
+# === RATE LIMITING ===
+def test_rate_limiter_allows_a_burst_then_asks_to_wait():
+    limiter = RateLimiter(rate_per_minute=60, burst=2)
+    assert limiter.acquire("client") == 0.0
+    assert limiter.acquire("client") == 0.0
+    assert 0 < limiter.acquire("client") <= 1.0
+    assert limiter.acquire("other") == 0.0  # buckets are per client
+
+
+def test_rate_limiter_disabled():
+    limiter = RateLimiter(rate_per_minute=0, burst=1)
+    assert all(limiter.acquire("client") == 0.0 for _ in range(10))
+
+
+def test_refund_gives_the_token_back():
+    limiter = RateLimiter(rate_per_minute=60, burst=1)
+    assert limiter.acquire("client") == 0.0
+    limiter.refund("client")
+    assert limiter.acquire("client") == 0.0
+    assert limiter.acquire("client") > 0
+    limiter.refund("client")
+    limiter.refund("client")  # never more than the burst
+    assert limiter.acquire("client") == 0.0 and limiter.acquire("client") > 0
+
+
+def test_charge_is_all_or_nothing():
+    session, address = RateLimiter(rate_per_minute=60, burst=5), RateLimiter(rate_per_minute=60, burst=1)
+    assert charge([(session, "s1"), (address, "ip")]) == 0.0
+    # A fresh session from the same address is stopped by the address bucket and keeps its token
+    assert charge([(session, "s2"), (address, "ip")]) > 0
+    assert all(session.acquire("s2") == 0.0 for _ in range(5))
+
+
+def test_only_slots_taken_are_counted_as_model_calls():
+    slots = ModelSlots(slots=1, max_queued=4, max_wait=60)
+
+    async def request(use_model):
+        calls = track_model_calls()
+        if use_model:
+            async with slots.slot():
+                pass
+        return calls
+
+    async def run():
+        return await asyncio.gather(request(False), request(True))  # each task has its own context
+
+    free, charged = asyncio.run(run())
+    assert free == [] and charged == [PRIORITY_INTERACTIVE]
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(admission, "TRUSTED_PROXIES", [])
+    assert client_address("203.0.113.7", "198.51.100.1") == "203.0.113.7"
+
+
+def test_forwarded_for_from_a_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(admission, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+    # A client-supplied first hop is skipped: the rightmost untrusted hop is the client
+    assert client_address("10.0.0.1", "1.2.3.4, 198.51.100.1, 10.0.0.2") == "198.51.100.1"
+    assert client_address("10.0.0.1", None) == "10.0.0.1"
+
+
+# === MODEL SLOTS ===
+def test_slots_queue_then_hand_over():
+    slots = ModelSlots(slots=1, max_queued=4, max_wait=60)
+    order = []
+
+    async def call(name, hold):
+        async with slots.slot():
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def run():
+        await asyncio.gather(call("first", 0.05), call("second", 0))
+        return slots.stats()
+
+    stats = asyncio.run(run())
+    assert order == ["first", "second"]
+    assert stats["busy"] == 0 and stats["queued"] == 0
+
+
+def test_interactive_waiters_go_before_batch():
+    slots = ModelSlots(slots=1, max_queued=4, max_wait=60)
+    order = []
+
+    async def call(name, priority):
+        async with slots.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        holder = asyncio.ensure_future(call("holder", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        batch = asyncio.ensure_future(call("batch", PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(call("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.gather(holder, batch, interactive)
+
+    asyncio.run(run())
+    assert order == ["holder", "interactive", "batch"]
+
+
+def test_full_queue_is_shed():
+    slots = ModelSlots(slots=1, max_queued=0, max_wait=60)
+
+    async def run():
+        async with slots.slot():
+            async with slots.slot():
+                pass
+
+    with pytest.raises(Overloaded) as raised:
+        asyncio.run(run())
+    assert raised.value.retry_after > 0
+    assert str(raised.value).startswith(admission.OVERLOADED_PREFIX)
+
+
+def test_too_long_wait_is_shed():
+    slots = ModelSlots(slots=1, max_queued=10, max_wait=1)
+    slots.service_time = 5.0
+
+    async def run():
+        async with slots.slot():
+            async with slots.slot():
+                pass
+
+    with pytest.raises(Overloaded):
+        asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    slots = ModelSlots(slots=1, max_queued=4, max_wait=60)
+
+    async def run():
+        async def hold():
+            async with slots.slot():
+                await asyncio.sleep(0.05)
+
+        async def wait():
+            async with slots.slot():
+                pass
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(wait())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(holder, waiter, return_exceptions=True)
+        async with slots.slot():  # must not block
+            return slots.stats()
+
+    stats = asyncio.run(asyncio.wait_for(run(), 2))
+    assert stats["busy"] == 1 and stats["queued"] == 0
+
+
+# === IN-FLIGHT DEDUPLICATION ===
+def test_identical_requests_join_the_leader():
+    in_flight = InFlight()
+
+    async def leader():
+        with in_flight.lead("key") as resolve:
+            await asyncio.sleep(0.02)
+            resolve(({"score": 1}, None))
+
+    async def run():
+        task = asyncio.ensure_future(leader())
+        await asyncio.sleep(0)
+        joined = await in_flight.join("key")
+        await task
+        return joined
+
+    assert asyncio.run(run()) == ({"score": 1}, None)
+    assert len(in_flight) == 0
+
+
+def test_join_without_a_leader_or_result_returns_none():
+    in_flight = InFlight()
+
+    async def leader():
+        with in_flight.lead("key"):
+            await asyncio.sleep(0.02)  # leaves without a result
+
+    async def run():
+        task = asyncio.ensure_future(leader())
+        await asyncio.sleep(0)
+        joined = await in_flight.join("key")
+        await task
+        return joined
+
+    assert asyncio.run(in_flight.join("other")) is None
+    assert asyncio.run(run()) is None
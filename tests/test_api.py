@@ -0,0 +1,158 @@
+# test_api.py
+import base64
+import json
+import pytest
+from fastapi.testclient import TestClient
+import api
+import llm
+import pipeline
+import scheduler
+from admission import ModelSlots, RateLimiter
+from cache import LRUCache, TieredCache
+from corpus import make_jd_text, make_resume_lines
+from fake_llm import FakeBackend
+
+JD = make_jd_text(seed=1)
+RESUME = "\n".join(make_resume_lines(12, seed=1))
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    # Fresh clients, no response cache and no rate limit per test
+    monkeypatch.setattr(llm, "_clients", {})
+    monkeypatch.setattr(llm, "_scheduled", {})
+    monkeypatch.setattr(pipeline, "response_cache", None)
+    monkeypatch.setattr(api, "rate_limiter", RateLimiter(rate_per_minute=0))
+    monkeypatch.setattr(scheduler, "RETRY_BASE_SECONDS", 0.01)
+    llm.set_backend(llm.LLM_BACKEND, FakeBackend())
+
+
+@pytest.fixture
+def client():
+    return TestClient(api.api)
+
+
+def ndjson(response):
+    return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+
+# === /v1/analyze ===
+def test_analyze_json(client):
+    response = client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME, "years_experience": "3"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["error"] is None and body["retryable"] is False
+    assert 0 <= body["feedback"]["match_score"]["score"] <= 100
+
+
+def test_analyze_multipart_upload(client):
+    response = client.post(
+        "/v1/analyze", data={"jd_text": JD}, files={"resume_file": ("resume.txt", RESUME.encode(), "text/plain")}
+    )
+    assert response.status_code == 200 and response.json()["feedback"]
+
+
+@pytest.mark.parametrize("fields", [
+    {"jd_text": 123, "resume_text": RESUME},
+    {"jd_text": JD, "resume_text": ["a list"]},
+    {"jd_text": JD, "resume_text": RESUME, "domain": 7},
+    {"jd_text": JD, "resume_text": RESUME, "years_experience": "many"},
+])
+def test_analyze_rejects_wrong_field_types(client, fields):
+    response = client.post("/v1/analyze", json=fields)
+    assert response.status_code == 400
+    assert response.json()["error"].startswith("⚠️") and response.json()["retryable"] is False
+
+
+def test_analyze_rejects_a_body_that_is_not_an_object(client):
+    assert client.post("/v1/analyze", content=b"not json", headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/v1/analyze", json=["a", "list"]).status_code == 400
+
+
+def test_analyze_missing_resume(client):
+    response = client.post("/v1/analyze", json={"jd_text": JD})
+    assert response.status_code == 400 and "both JD and Resume" in response.json()["error"]
+
+
+def test_analyze_model_failure_is_502(client):
+    llm.set_backend(llm.LLM_BACKEND, FakeBackend(error_rate=1.0))
+    response = client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME})
+    assert response.status_code == 502 and response.json()["retryable"] is True
+
+
+def test_analyze_overloaded_is_503_with_retry_after(client, monkeypatch):
+    slots = ModelSlots(slots=1, max_queued=0)
+    slots._busy = 1
+    monkeypatch.setattr(pipeline, "model_slots", slots)
+    response = client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME})
+    assert response.status_code == 503 and response.json()["retryable"] is True
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_analyze_rate_limited_is_429(client, monkeypatch):
+    monkeypatch.setattr(api, "rate_limiter", RateLimiter(rate_per_minute=60, burst=1))
+    assert client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME}).status_code == 200
+    # A made-up X-Forwarded-For or API key does not buy a fresh bucket
+    response = client.post(
+        "/v1/analyze", json={"jd_text": JD, "resume_text": RESUME},
+        headers={"X-Forwarded-For": "198.51.100.9", "X-API-Key": "made-up"},
+    )
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) >= 1
+
+
+def test_cache_hits_are_not_charged(client, monkeypatch):
+    monkeypatch.setattr(pipeline, "response_cache", TieredCache(LRUCache()))
+    monkeypatch.setattr(api, "rate_limiter", RateLimiter(rate_per_minute=1, burst=2))
+    for _ in range(4):  # one model call, then cache hits that are refunded
+        assert client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME}).status_code == 200
+    assert client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME + "\nGo"}).status_code == 200
+    assert client.post("/v1/analyze", json={"jd_text": JD, "resume_text": RESUME + "\nOn"}).status_code == 429
+
+
+# === /v1/batch ===
+def test_batch_streams_one_line_per_item(client):
+    resume_file = {"filename": "resume.txt", "content_base64": base64.b64encode(RESUME.encode()).decode()}
+    items = [{"id": "pasted", "jd_text": JD, "resume_text": RESUME}, {"id": "file", "jd_text": JD, "resume_file": resume_file}]
+    response = client.post("/v1/batch", json={"items": items, "domain": "Tech"})
+    assert response.status_code == 200
+    lines = ndjson(response)
+    assert [line["id"] for line in lines] == ["pasted", "file"]
+    assert all(line["error"] is None and line["feedback"] for line in lines)
+
+
+def test_batch_bad_item_fails_alone(client):
+    items = [
+        {"jd_text": JD, "resume_text": RESUME, "domain": 7},
+        {"jd_text": JD, "resume_file": {"filename": 5, "content_base64": ""}},
+        {"jd_text": JD, "resume_file": {"filename": "r.txt", "content_base64": "not base64!"}},
+        {"jd_text": JD, "resume_text": RESUME},
+    ]
+    lines = ndjson(client.post("/v1/batch", json={"items": items}))
+    assert len(lines) == 4
+    assert [line["error"] is None for line in lines] == [False, False, False, True]
+    assert all(line["error"].startswith("⚠️") for line in lines[:3])
+
+
+def test_batch_oversized_file_is_rejected_before_decoding(client, monkeypatch):
+    monkeypatch.setattr(pipeline, "MAX_FILE_SIZE_MB", 0.001)
+    decoded = []
+    monkeypatch.setattr(api.base64, "b64decode", lambda *args, **kwargs: decoded.append(args) or b"")
+    resume_file = {"filename": "resume.txt", "content_base64": base64.b64encode(b"x" * 2048).decode()}
+    lines = ndjson(client.post("/v1/batch", json={"items": [{"jd_text": JD, "resume_file": resume_file}]}))
+    assert "MB limit" in lines[0]["error"] and decoded == []
+
+
+@pytest.mark.parametrize("body", [{}, {"items": []}, {"items": ["not an object"]}, {"items": {"a": 1}}])
+def test_batch_rejects_bad_items(client, body):
+    assert client.post("/v1/batch", json=body).status_code == 400
+
+
+def test_batch_size_limit(client, monkeypatch):
+    monkeypatch.setattr(api, "BATCH_MAX_ITEMS", 1)
+    items = [{"jd_text": JD, "resume_text": RESUME}] * 2
+    assert client.post("/v1/batch", json={"items": items}).status_code == 400
+
+
+def test_healthz(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200 and response.json()["status"] == "ok"
@@ -0,0 +1,18 @@
+# test_batch.py
+import json
+from batch import jobs_from_manifest
+
+
+def test_default_job_ids_tell_domains_and_years_apart(tmp_path):
+    manifest = tmp_path / "jobs.jsonl"
+    entries = [
+        {"resume": "r.pdf", "jd": "jd.pdf"},
+        {"resume": "r.pdf", "jd": "jd.pdf", "domain": "Data"},
+        {"resume": "r.pdf", "jd": "jd.pdf", "domain": "Data", "years_experience": 5},
+        {"resume": "r.pdf", "jd_text": "Python developer", "domain": "Data", "years_experience": 5},
+        {"resume": "r.pdf", "jd": "jd.pdf", "id": "mine"},
+    ]
+    manifest.write_text("\n".join(json.dumps(entry) for entry in entries))
+    ids = [job["id"] for job in jobs_from_manifest(str(manifest))]
+    assert len(set(ids)) == len(ids) and ids[-1] == "mine"
+    assert ids == [job["id"] for job in jobs_from_manifest(str(manifest))]  # stable across runs
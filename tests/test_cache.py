@@ -0,0 +1,102 @@
+# test_cache.py
+import os
+import time
+from cache import DiskCache, LRUCache, SQLiteCache, TieredCache
+
+
+# === LRU ===
+def test_lru_evicts_least_recently_used_over_max_bytes():
+    evicted = []
+    cache = LRUCache(max_bytes=30, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    cache.set("c", "x" * 10)
+    cache.get("a")  # now "b" is the oldest
+    cache.set("d", "x" * 10)
+    assert evicted == ["b"]
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.size_bytes == 30
+
+
+def test_lru_max_items():
+    cache = LRUCache(max_items=2)
+    for key in "abc":
+        cache.set(key, key)
+    assert len(cache) == 2 and cache.get("a") is None
+
+
+def test_lru_never_stores_a_value_over_the_budget():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", "x" * 5)
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is None and cache.get("a") is not None
+
+
+def test_lru_ttl_expires_on_read():
+    cache = LRUCache(ttl=0.05)
+    cache.set("a", "value")
+    assert cache.get("a") == "value"
+    time.sleep(0.06)
+    assert cache.get("a") is None and cache.size_bytes == 0
+
+
+# === DISK ===
+def _disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("key", "héllo")
+    assert cache.get("key") == "héllo"
+    assert cache.get("missing") is None
+
+
+def test_disk_cache_evicts_oldest_down_to_low_water(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000, low_water=0.5)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 100)
+        os.utime(cache._path(f"k{i}"), (i, i))  # distinct mtimes, oldest first
+    cache.set("k10", "x" * 100)
+    assert _disk_bytes(str(tmp_path)) <= 500
+    assert cache.get("k10") is not None and cache.get("k0") is None
+    assert cache.evictions == 6
+
+
+def test_disk_cache_does_not_rescan_under_budget(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=1_000_000, rescan_writes=1000)
+    scans = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: scans.append(path) or listdir(path))
+    for i in range(100):
+        cache.set(f"k{i}", "x" * 100)
+    assert len(scans) == 1  # the first write learns the size
+    cache.set("k0", "x" * 300)  # replacing an entry counts only the difference
+    assert cache._size == _disk_bytes(str(tmp_path))
+
+
+def test_disk_cache_rescan_picks_up_other_writers(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000, rescan_writes=2)
+    other = DiskCache(str(tmp_path), max_bytes=1000, rescan_writes=2)
+    cache.set("a", "x" * 100)
+    for i in range(9):
+        other.set(f"o{i}", "x" * 100)
+    cache.set("b", "x" * 100)  # second write: rescans and sees the other process's entries
+    assert cache._size == _disk_bytes(str(tmp_path)) <= 1000
+
+
+# === SQLITE / TIERED ===
+def test_sqlite_cache_keeps_max_items(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_items=2)
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.01)  # distinct access times
+    assert len(cache) == 2 and cache.get("a") is None and cache.get("c") == "c"
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    cache = TieredCache(LRUCache(), DiskCache(str(tmp_path)))
+    cache.set("key", "value")
+    cache.memory.clear()
+    assert cache.get("key") == "value"  # from disk
+    assert cache.memory.get("key") == "value"
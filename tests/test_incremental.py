@@ -0,0 +1,37 @@
+# test_incremental.py
+from incremental import carried_rewrites, carried_strengths, diff_units, merge_feedback, plan_update
+
+PREVIOUS = {
+    "strengths": ["Leadership: led a team of 8 engineers at Acme", "Strong Python and SQL skills"],
+    "rewritten_bullets": [
+        {"original": "Built Python ETL pipelines", "rewritten": "Built Python ETL pipelines, cutting load time 40%"},
+        {"original": "Led a team of 8 engineers at Acme", "rewritten": "Led 8 engineers to ship ..."},
+    ],
+}
+RESUME = "EXPERIENCE\nBuilt Python ETL pipelines with SQL\nMigrated 40 services to AWS"
+REMOVED = [["experience", "Led a team of 8 engineers at Acme"]]
+
+
+def test_diff_ignores_case_spacing_and_order():
+    old = [["experience", "Built  ETL"], ["experience", "Led a team"]]
+    new = [["experience", "led a team"], ["experience", "built etl"], ["skills", "SQL"]]
+    assert diff_units(old, new) == {"removed": [], "added": [["skills", "SQL"]], "unchanged": 2}
+
+
+def test_large_edits_need_a_full_analysis():
+    old = [["experience", f"bullet {i}"] for i in range(10)]
+    assert plan_update(old, old[:8] + [["experience", "new"]]) is not None
+    assert plan_update(old, [["experience", f"new {i}"] for i in range(10)]) is None
+
+
+def test_strengths_about_removed_bullets_are_dropped():
+    assert carried_strengths(PREVIOUS, REMOVED, RESUME) == ["Strong Python and SQL skills"]
+    assert carried_strengths(PREVIOUS, [], RESUME) == PREVIOUS["strengths"]
+
+
+def test_merge_keeps_rewrites_of_bullets_still_there():
+    assert [b["original"] for b in carried_rewrites(PREVIOUS, RESUME)] == ["Built Python ETL pipelines"]
+    merged = merge_feedback(PREVIOUS, {"match_score": {"score": 80, "bucket": "High"}}, RESUME, REMOVED)
+    assert merged["match_score"]["score"] == 80
+    assert merged["strengths"] == ["Strong Python and SQL skills"]
+    assert len(merged["rewritten_bullets"]) == 1
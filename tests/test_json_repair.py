@@ -0,0 +1,46 @@
+# test_json_repair.py
+import json
+from json_repair import loads_tolerant
+
+FEEDBACK = {
+    "resume_score": {"score": 72, "bucket": "High"},
+    "strengths": ["Led a team of 8", "Python: 6 years"],
+    "improvement_areas": [{"area": "Impact", "suggestion": "Quantify it."}],
+}
+TEXT = json.dumps(FEEDBACK, indent=2)
+
+
+def test_valid_json_needs_no_repair():
+    assert loads_tolerant(TEXT) == (FEEDBACK, [])
+
+
+def test_markdown_fence():
+    value, repairs = loads_tolerant(f"```json\n{TEXT}\n```")
+    assert value == FEEDBACK and "fence" in repairs
+
+
+def test_prose_around_the_object():
+    value, repairs = loads_tolerant(f"Sure! Here it is:\n{TEXT}\nAnything else?")
+    assert value == FEEDBACK and repairs
+
+
+def test_trailing_commas():
+    value, repairs = loads_tolerant(TEXT.replace("}\n  ]", "},\n  ]").replace("\n}", ",\n}"))
+    assert value == FEEDBACK and "trailing_comma" in repairs
+
+
+def test_single_quotes_and_apostrophes():
+    value, repairs = loads_tolerant("{'strengths': ['user's favourite tool'], 'ok': True}")
+    assert value == {"strengths": ["user's favourite tool"], "ok": True}
+    assert "single_quotes" in repairs and "python_literals" in repairs
+
+
+def test_truncated_output_keeps_complete_fields_only():
+    value, repairs = loads_tolerant(TEXT[: TEXT.index('"improvement_areas"') + 30])
+    assert value == {key: FEEDBACK[key] for key in ("resume_score", "strengths")}
+    assert "truncated" in repairs
+
+
+def test_unparseable_text():
+    assert loads_tolerant("I cannot help with that.")[0] is None
+    assert loads_tolerant("[1, 2, 3]")[0] is None  # not an object
@@ -0,0 +1,39 @@
+# test_parser_pool.py
+import pytest
+import parser_pool
+from parser_pool import PARSE_WORKER_CRASHED, ParserPool
+
+
+class _CannotStart:
+    def __init__(self):
+        raise OSError("Too many open files")
+
+
+@pytest.fixture
+def pool():
+    pool = ParserPool(workers=1, timeout=5)
+    yield pool
+    pool.close()
+
+
+def resume_file(tmp_path, name):
+    path = tmp_path / f"{name}.txt"
+    path.write_text(f"Jane Doe, {name}\nPython developer, 5 years")
+    return str(path)
+
+
+def test_parses_in_a_worker(pool, tmp_path):
+    code, text = pool.parse(resume_file(tmp_path, "first"))
+    assert code is None and "Python developer" in text
+
+
+def test_failed_respawn_keeps_the_slot_and_retries_on_next_use(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(pool, "_run", lambda worker, job: (PARSE_WORKER_CRASHED, "", False))
+    monkeypatch.setattr(parser_pool, "_Worker", _CannotStart)
+    assert pool.parse(resume_file(tmp_path, "crash"))[0] == PARSE_WORKER_CRASHED
+    # No worker can start: the checkout fails at once instead of waiting for a slot that is gone
+    assert pool.parse(resume_file(tmp_path, "still_down"))[0] == PARSE_WORKER_CRASHED
+
+    monkeypatch.undo()
+    code, text = pool.parse(resume_file(tmp_path, "recovered"))
+    assert code is None and "recovered" in text
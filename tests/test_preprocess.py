@@ -0,0 +1,69 @@
+# test_preprocess.py
+from preprocess import preprocess_inputs, strip_boilerplate
+
+EEO = (
+    "We are an equal opportunity employer and consider all applicants without regard to race, religion, "
+    "color, national origin, sexual orientation, gender identity, veteran status or disability."
+)
+BENEFITS = "Benefits:\n- Medical, dental and vision coverage\n- 401(k) with match\n- Generous PTO and parental leave"
+
+
+def stripped(text):
+    return strip_boilerplate(text)[0]
+
+
+# === BOILERPLATE ===
+def test_eeo_statement_and_benefits_section_are_removed():
+    jd = f"Responsibilities:\n- Build data pipelines in Python\n\n{BENEFITS}\n\n{EEO}"
+    text = stripped(jd)
+    assert "Build data pipelines in Python" in text
+    assert "401(k)" not in text and "equal opportunity" not in text
+
+
+def test_benefits_sub_headings_stay_in_the_section():
+    jd = f"{BENEFITS}\nHealth & Wellness\n- Gym stipend and wellness days\nWhat You'll Do:\n- Ship features weekly"
+    text = stripped(jd)
+    assert "Gym stipend" not in text and "Ship features weekly" in text
+
+
+# === DOMAIN JDS ===
+def test_requirements_about_healthcare_and_dental_are_kept():
+    jd = "Requirements:\n- 5+ years building healthcare claims pipelines for dental and vision insurers"
+    assert stripped(jd) == jd
+
+
+def test_compensation_and_equity_work_is_kept():
+    jd = "You will own equity compensation and bonus plan analytics."
+    assert stripped(jd) == jd
+
+
+def test_healthcare_jd_keeps_its_clinical_duties():
+    jd = (
+        "Clinical Data Analyst\n"
+        "Our mission is better healthcare. Health insurance claims and dental benefits data are at the core of the role.\n"
+        "Qualifications:\n- Experience with HIPAA, health insurance claims and vision/dental coding\n\n"
+        f"{EEO}"
+    )
+    text = stripped(jd)
+    assert "Health insurance claims and dental benefits data" in text
+    assert "vision/dental coding" in text and "without regard to" not in text
+
+
+def test_eeo_wording_inside_a_requirement_is_kept():
+    jd = "Skills:\n- Knowledge of equal employment opportunity law and reasonable accommodation requests"
+    assert stripped(jd) == jd
+
+
+# === FALLBACK ===
+def test_nearly_empty_result_falls_back_to_the_original():
+    jd = f"{EEO}\nApply now."
+    jd_text, _, report = preprocess_inputs(jd, "Python developer, 5 years")
+    assert report["boilerplate_fallback"] is True and report["boilerplate_chars"] == 0
+    assert "equal opportunity" in jd_text
+
+
+def test_normal_jd_does_not_fall_back():
+    jd = f"About the role:\nYou will build payroll, equity and bonus systems for 2,000 employees.\n\n{BENEFITS}"
+    jd_text, _, report = preprocess_inputs(jd, "Python developer, 5 years")
+    assert report["boilerplate_fallback"] is False and report["boilerplate_chars"] > 0
+    assert "equity and bonus systems" in jd_text and "401(k)" not in jd_text
@@ -0,0 +1,291 @@
+# test_scheduler.py
+import asyncio
+import time
+import pytest
+import pipeline
+import scheduler
+from cache import LRUCache, TieredCache
+from corpus import make_jd_text, make_resume_lines
+from fake_llm import FakeBackend
+from json_repair import loads_tolerant
+from llm import LLMError
+from scheduler import CircuitBreaker, ScheduledBackend, answered_by
+
+
+class ScriptedBackend(FakeBackend):
+    """FakeBackend whose calls take the scripted delays in order; a "fail" step raises a retryable LLMError."""
+
+    def __init__(self, *script, **kwargs):
+        super().__init__(**kwargs)
+        self.script = list(script)
+
+    def _plan(self):
+        delay, fail, malformed, malform_rng = super()._plan()
+        step = self.script.pop(0) if self.script else delay
+        if step == "fail":
+            return 0.0, True, malformed, malform_rng
+        return step, fail, malformed, malform_rng
+
+
+def scheduled(primary, fallback=None, **kwargs):
+    kwargs.setdefault("hedge", False)
+    return ScheduledBackend(primary, fallback, **kwargs)
+
+
+def open_breaker(backend):
+    for _ in range(backend.breaker.failures):
+        backend.breaker.record(False)
+
+
+async def collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler, "RETRY_BASE_SECONDS", 0.01)
+
+
+# === RETRIES ===
+def test_transient_errors_are_retried():
+    primary = ScriptedBackend("fail", "fail", 0.0)
+    text = asyncio.run(scheduled(primary, retries=2).generate_async("prompt"))
+    assert loads_tolerant(text)[0] is not None
+    assert primary.calls == 3
+
+
+def test_retries_give_up_after_the_limit():
+    primary = ScriptedBackend("fail", "fail", 0.0)
+    with pytest.raises(LLMError):
+        asyncio.run(scheduled(primary, retries=1).generate_async("prompt"))
+    assert primary.calls == 2
+
+
+def test_sync_generate_retries():
+    primary = ScriptedBackend("fail", 0.0)
+    assert scheduled(primary, retries=1).generate("prompt")
+    assert primary.calls == 2
+
+
+def test_backoff_is_jittered_and_capped():
+    backend = scheduled(FakeBackend())
+    delays = [backend._backoff(3) for _ in range(50)]
+    assert all(0 <= delay <= scheduler.RETRY_BASE_SECONDS * 4 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+# === DEADLINES ===
+def test_call_past_its_deadline_fails_fast():
+    backend = scheduled(ScriptedBackend(5.0), deadline=0.1)
+    start = time.monotonic()
+    with pytest.raises(LLMError, match="deadline"):
+        asyncio.run(backend.generate_async("prompt"))
+    assert time.monotonic() - start < 1.0
+
+
+def test_stream_past_its_deadline_fails_fast():
+    # 5s with the default ttfb_fraction: the first chunk alone would take 0.5s
+    backend = scheduled(ScriptedBackend(5.0), deadline=0.1)
+    start = time.monotonic()
+    with pytest.raises(LLMError, match="deadline"):
+        asyncio.run(collect(backend.generate_stream_async("prompt")))
+    assert time.monotonic() - start < 1.0
+
+
+def test_slow_consumer_does_not_use_up_the_stream_deadline():
+    backend = scheduled(ScriptedBackend(0.0), deadline=0.2)
+
+    async def read_slowly():
+        chunks = []
+        async for chunk in backend.generate_stream_async("prompt"):
+            chunks.append(chunk)
+            await asyncio.sleep(0.1)
+        return "".join(chunks)
+
+    text = asyncio.run(read_slowly())
+    assert loads_tolerant(text)[0] is not None
+
+
+def test_sync_generate_does_not_retry_past_its_deadline():
+    primary = ScriptedBackend("fail", 0.0)
+    with pytest.raises(LLMError, match="503"):
+        scheduled(primary, retries=2, deadline=0.0).generate("prompt")
+    assert primary.calls == 1
+
+
+# === HEDGING ===
+def prime(tracker, seconds=0.01):
+    for _ in range(scheduler.HEDGE_MIN_SAMPLES):
+        tracker.observe(seconds)
+
+
+def test_slow_call_is_hedged_and_the_fast_answer_wins():
+    primary = ScriptedBackend(5.0, 0.0)
+    backend = scheduled(primary, hedge=True)
+    prime(backend.latency)
+    start = time.monotonic()
+    text = asyncio.run(backend.generate_async("prompt"))
+    assert time.monotonic() - start < 1.0
+    assert loads_tolerant(text)[0] is not None
+    assert primary.calls == 2
+
+
+def test_hedges_stay_within_budget():
+    primary = ScriptedBackend(5.0, 0.0, 0.3)
+    backend = scheduled(primary, hedge=True)
+    prime(backend.latency)
+    asyncio.run(backend.generate_async("prompt"))
+    # The first call used the whole hedge budget, so the next one is not duplicated
+    asyncio.run(backend.generate_async("prompt"))
+    assert primary.calls == 3
+
+
+def test_slow_stream_start_is_hedged():
+    primary = ScriptedBackend(5.0, 0.0)
+    backend = scheduled(primary, hedge=True)
+    prime(backend.ttfb)
+    start = time.monotonic()
+    text = asyncio.run(collect(backend.generate_stream_async("prompt")))
+    assert time.monotonic() - start < 0.4
+    assert loads_tolerant(text)[0] is not None
+    assert primary.calls == 2
+
+
+def test_no_hedging_without_enough_samples():
+    primary = ScriptedBackend(0.3)
+    asyncio.run(scheduled(primary, hedge=True).generate_async("prompt"))
+    assert primary.calls == 1
+
+
+# === CIRCUIT BREAKER ===
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker("model", failures=2, cooldown=0.05)
+    breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one trial at a time
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker("model", failures=1, cooldown=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_trial_without_an_outcome_is_replaced_after_its_timeout():
+    breaker = CircuitBreaker("model", failures=1, cooldown=0.0, trial_timeout=0.05)
+    breaker.record(False)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+
+
+def test_failing_primary_falls_back_to_the_faster_tier():
+    primary = FakeBackend(error_rate=1.0, model_name="pro")
+    fallback = FakeBackend(model_name="fast")
+    backend = scheduled(primary, fallback, retries=0)
+
+    async def run():
+        for _ in range(backend.breaker.failures):
+            with pytest.raises(LLMError):
+                await backend.generate_async("prompt")
+        text = await backend.generate_async("prompt")
+        return text, answered_by(backend)
+
+    text, model = asyncio.run(run())
+    assert backend.breaker.state == "open"
+    assert loads_tolerant(text)[0] is not None
+    assert model == "fast" and backend.model_name == "pro"
+    assert primary.calls == backend.breaker.failures and fallback.calls == 1
+
+
+def test_answered_by_names_the_primary_while_closed():
+    backend = scheduled(FakeBackend(model_name="pro"), FakeBackend(model_name="fast"))
+
+    async def run():
+        await backend.generate_async("prompt")
+        return answered_by(backend)
+
+    assert asyncio.run(run()) == "pro"
+
+
+# === CANCELLATION ===
+def half_open_backend(primary_latency):
+    primary = ScriptedBackend(primary_latency, model_name="pro")
+    fallback = FakeBackend(model_name="fast")
+    backend = scheduled(primary, fallback, retries=0)
+    backend.breaker.cooldown = 0.0
+    open_breaker(backend)
+    return backend, primary, fallback
+
+
+def test_cancelled_trial_releases_the_breaker():
+    backend, primary, fallback = half_open_backend(5.0)
+
+    async def run():
+        trial = asyncio.ensure_future(backend.generate_async("prompt"))
+        await asyncio.sleep(0.05)
+        assert backend.breaker.state == "half_open"
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        await backend.generate_async("prompt")  # becomes the next trial
+
+    asyncio.run(run())
+    assert backend.breaker.state == "closed"
+    assert primary.calls == 2 and fallback.calls == 0
+
+
+def test_stream_closed_early_during_trial_releases_the_breaker():
+    backend, primary, fallback = half_open_backend(0.0)
+
+    async def run():
+        stream = backend.generate_stream_async("prompt")
+        await stream.__anext__()
+        await stream.aclose()
+        assert backend.breaker.state == "half_open"
+        await backend.generate_async("prompt")
+
+    asyncio.run(run())
+    assert backend.breaker.state == "closed"
+    assert primary.calls == 2 and fallback.calls == 0
+
+
+def test_cancelled_stream_start_releases_the_breaker():
+    backend, primary, fallback = half_open_backend(5.0)
+
+    async def run():
+        trial = asyncio.ensure_future(collect(backend.generate_stream_async("prompt")))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        await backend.generate_async("prompt")
+
+    asyncio.run(run())
+    assert backend.breaker.state == "closed"
+    assert fallback.calls == 0
+
+
+# === RESPONSE CACHE ===
+def test_fallback_answers_are_not_cached(monkeypatch):
+    cache = TieredCache(LRUCache())
+    monkeypatch.setattr(pipeline, "response_cache", cache)
+    backend = scheduled(FakeBackend(model_name="pro"), FakeBackend(model_name="fast"))
+    backend.breaker.cooldown = 60
+    jd, resume = make_jd_text(seed=2), "\n".join(make_resume_lines(10, seed=2))
+
+    open_breaker(backend)
+    feedback, error = asyncio.run(pipeline.analyze_text_async(jd, resume, "Tech", 3, backend))
+    assert feedback and error is None and len(cache.memory) == 0
+
+    backend.breaker.record(True)
+    asyncio.run(pipeline.analyze_text_async(jd, resume, "Tech", 3, backend))
+    assert len(cache.memory) == 1